@@ -0,0 +1,107 @@
+"""Add case full-text search document and index
+
+Revision ID: 007_add_case_search
+Revises: 006_add_case_timestamps
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_add_case_search'
+down_revision = '006_add_case_timestamps'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+# Frozen copies of backend/search.py as of this revision; later changes to the app code must not
+# change what this migration writes.
+SEARCH_RAW_FIELDS = (
+    'case_id', 'case_number', 'caseNumber', 'kobo_case_id', '_uuid',
+    'beneficiary_name', 'beneficiary_last_name', 'name', 'uploaded_by',
+)
+SQLITE_FTS_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5("
+    "search_text, content='cases', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ai AFTER INSERT ON cases BEGIN "
+    "INSERT INTO cases_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ad AFTER DELETE ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_au AFTER UPDATE OF search_text ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO cases_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+)
+
+
+def _raw_field(raw: dict, key: str):
+    value = raw.get(key)
+    if value is None and isinstance(raw.get('body'), dict):
+        value = raw['body'].get(key)
+    return value
+
+
+def _build_search_text(title, description, raw, comments=()) -> str:
+    parts = [title, description]
+    if isinstance(raw, dict):
+        for key in SEARCH_RAW_FIELDS:
+            value = _raw_field(raw, key)
+            if value is not None and not isinstance(value, (dict, list)):
+                parts.append(str(value))
+    parts.extend(comments)
+    return '\n'.join(str(p).strip() for p in parts if p is not None and str(p).strip())
+
+
+def _backfill_search_text(conn):
+    cases = sa.table('cases', sa.column('id'), sa.column('title'), sa.column('description'),
+                     sa.column('raw', sa.JSON()), sa.column('search_text'))
+    comments = sa.table('comments', sa.column('id'), sa.column('case_id'), sa.column('content'))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(cases.c.id, cases.c.title, cases.c.description, cases.c.raw)
+            .where(cases.c.id > last_id).order_by(cases.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        ids = [r.id for r in rows]
+        notes = {}
+        for case_id, content in conn.execute(
+            sa.select(comments.c.case_id, comments.c.content)
+            .where(comments.c.case_id.in_(ids)).order_by(comments.c.id)
+        ):
+            notes.setdefault(case_id, []).append(content)
+        conn.execute(
+            cases.update().where(cases.c.id == sa.bindparam('b_id')).values(search_text=sa.bindparam('b_text')),
+            [{'b_id': r.id, 'b_text': _build_search_text(r.title, r.description, r.raw, notes.get(r.id, ()))}
+             for r in rows],
+        )
+        last_id = ids[-1]
+
+
+def upgrade() -> None:
+    op.add_column('cases', sa.Column('search_text', sa.Text(), nullable=True))
+    conn = op.get_bind()
+    _backfill_search_text(conn)
+    if conn.dialect.name == 'postgresql':
+        op.execute(
+            "ALTER TABLE cases ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(search_text, ''))) STORED"
+        )
+        op.execute('CREATE INDEX ix_cases_search_vector ON cases USING GIN (search_vector)')
+    elif conn.dialect.name == 'sqlite':
+        for stmt in SQLITE_FTS_STATEMENTS:
+            op.execute(stmt)
+        op.execute("INSERT INTO cases_fts(cases_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_cases_search_vector')
+        op.execute('ALTER TABLE cases DROP COLUMN IF EXISTS search_vector')
+    elif conn.dialect.name == 'sqlite':
+        for trigger in ('cases_fts_ai', 'cases_fts_ad', 'cases_fts_au'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS cases_fts')
+    op.drop_column('cases', 'search_text')
@@ -0,0 +1,173 @@
+"""Add normalized beneficiary name and trigram index for duplicate lookups
+
+Revision ID: 008_add_beneficiary_name_index
+Revises: 007_add_case_search
+Create Date: 2026-10-19 00:00:00.000000
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_add_beneficiary_name_index'
+down_revision = '007_add_case_search'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+# Frozen copies of backend/names.py, backend/raw_fields.py and backend/search.py as of this revision;
+# later changes to the app code must not change what this migration writes.
+BENEFICIARY_NAME_FIELDS = ('beneficiary_name', 'beneficiary_last_name')
+SEARCH_RAW_FIELDS = (
+    'case_id', 'case_number', 'caseNumber', 'kobo_case_id', '_uuid',
+    'beneficiary_name', 'beneficiary_last_name', 'name', 'uploaded_by',
+)
+_DIACRITICS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]')
+_TATWEEL = '\u0640'
+_ARABIC_FOLD = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ی': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+    'ک': 'ك',
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+    **{chr(0x06f0 + d): str(d) for d in range(10)},
+})
+_NON_WORD_RE = re.compile(r'[^\w\s]+', re.UNICODE)
+_SPACES_RE = re.compile(r'\s+')
+
+
+def _fold_arabic(value: str) -> str:
+    if not value:
+        return value
+    s = unicodedata.normalize('NFKC', value)
+    s = _DIACRITICS_RE.sub('', s).replace(_TATWEEL, '')
+    return s.translate(_ARABIC_FOLD).casefold()
+
+
+def _normalize_name(value) -> str:
+    if value is None:
+        return ''
+    s = _fold_arabic(str(value))
+    s = _NON_WORD_RE.sub(' ', s).replace('_', ' ')
+    return _SPACES_RE.sub(' ', s).strip()
+
+
+def _name_trigrams(normalized: str) -> set:
+    grams = set()
+    for word in normalized.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _raw_value(raw, key: str):
+    if not isinstance(raw, dict):
+        return None
+    value = raw.get(key)
+    if value is None and isinstance(raw.get('body'), dict):
+        value = raw['body'].get(key)
+    if isinstance(value, (dict, list)):
+        return None
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+
+def _beneficiary_full_name(raw) -> str | None:
+    parts = [str(v).strip() for v in (_raw_value(raw, k) for k in BENEFICIARY_NAME_FIELDS) if v is not None]
+    return ' '.join(parts) or None
+
+
+def _build_search_text(title, description, raw, comments=()) -> str:
+    parts = [title, description]
+    if isinstance(raw, dict):
+        for key in SEARCH_RAW_FIELDS:
+            value = raw.get(key)
+            if value is None and isinstance(raw.get('body'), dict):
+                value = raw['body'].get(key)
+            if value is not None and not isinstance(value, (dict, list)):
+                parts.append(str(value))
+    parts.extend(comments)
+    return '\n'.join(_fold_arabic(str(p).strip()) for p in parts if p is not None and str(p).strip())
+
+
+def _backfill_search_text(conn):
+    cases = sa.table('cases', sa.column('id'), sa.column('title'), sa.column('description'),
+                     sa.column('raw', sa.JSON()), sa.column('search_text'))
+    comments = sa.table('comments', sa.column('id'), sa.column('case_id'), sa.column('content'))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(cases.c.id, cases.c.title, cases.c.description, cases.c.raw)
+            .where(cases.c.id > last_id).order_by(cases.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        ids = [r.id for r in rows]
+        notes = {}
+        for case_id, content in conn.execute(
+            sa.select(comments.c.case_id, comments.c.content)
+            .where(comments.c.case_id.in_(ids)).order_by(comments.c.id)
+        ):
+            notes.setdefault(case_id, []).append(content)
+        conn.execute(
+            cases.update().where(cases.c.id == sa.bindparam('b_id')).values(search_text=sa.bindparam('b_text')),
+            [{'b_id': r.id, 'b_text': _build_search_text(r.title, r.description, r.raw, notes.get(r.id, ()))}
+             for r in rows],
+        )
+        last_id = ids[-1]
+
+
+def _backfill_names(conn):
+    cases = sa.table('cases', sa.column('id'), sa.column('raw', sa.JSON()), sa.column('beneficiary_name_norm'))
+    trigrams = sa.table('case_name_trigrams', sa.column('case_id'), sa.column('trigram'))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(cases.c.id, cases.c.raw).where(cases.c.id > last_id).order_by(cases.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        updates = []
+        postings = []
+        for r in rows:
+            normalized = _normalize_name(_beneficiary_full_name(r.raw))[:255] or None
+            if not normalized:
+                continue
+            updates.append({'b_id': r.id, 'b_norm': normalized})
+            postings.extend({'case_id': r.id, 'trigram': g} for g in _name_trigrams(normalized))
+        if updates:
+            conn.execute(
+                cases.update().where(cases.c.id == sa.bindparam('b_id'))
+                .values(beneficiary_name_norm=sa.bindparam('b_norm')),
+                updates,
+            )
+        if postings:
+            conn.execute(trigrams.insert(), postings)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column('cases', sa.Column('beneficiary_name_norm', sa.String(length=255), nullable=True))
+    op.create_index('ix_cases_beneficiary_name_norm', 'cases', ['beneficiary_name_norm'])
+    op.create_table(
+        'case_name_trigrams',
+        sa.Column('case_id', sa.Integer(), sa.ForeignKey('cases.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('trigram', sa.String(length=16), primary_key=True),
+    )
+    op.create_index('ix_case_name_trigrams_trigram_case', 'case_name_trigrams', ['trigram', 'case_id'])
+    conn = op.get_bind()
+    _backfill_names(conn)
+    # search documents are now folded the same way as names
+    _backfill_search_text(conn)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_case_name_trigrams_trigram_case', table_name='case_name_trigrams')
+    op.drop_table('case_name_trigrams')
+    op.drop_index('ix_cases_beneficiary_name_norm', table_name='cases')
+    op.drop_column('cases', 'beneficiary_name_norm')
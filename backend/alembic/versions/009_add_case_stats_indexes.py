@@ -0,0 +1,25 @@
+"""Index case columns grouped by the dashboard statistics
+
+Revision ID: 009_add_case_stats_indexes
+Revises: 008_add_beneficiary_name_index
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '009_add_case_stats_indexes'
+down_revision = '008_add_beneficiary_name_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_cases_status'), 'cases', ['status'], unique=False)
+    op.create_index(op.f('ix_cases_assigned_to_id'), 'cases', ['assigned_to_id'], unique=False)
+    op.create_index(op.f('ix_cases_completed_at'), 'cases', ['completed_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_cases_completed_at'), table_name='cases')
+    op.drop_index(op.f('ix_cases_assigned_to_id'), table_name='cases')
+    op.drop_index(op.f('ix_cases_status'), table_name='cases')
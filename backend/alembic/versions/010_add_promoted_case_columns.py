@@ -0,0 +1,152 @@
+"""Promote category, case number, beneficiary name and submission time to typed case columns
+
+Revision ID: 010_add_promoted_case_columns
+Revises: 009_add_case_stats_indexes
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_add_promoted_case_columns'
+down_revision = '009_add_case_stats_indexes'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+# Frozen copy of backend/raw_fields.py as of this revision: the backfill writes exactly the four columns
+# added here, whatever the app promotes later.
+SUBMISSION_TIME_FIELDS = (
+    '_submission_time', 'submissiontime', 'submission_time', 'end', 'start',
+    'submitted_at', 'submissiondate', 'submissionDate',
+)
+CASE_NUMBER_FIELDS = ('case_number', 'caseNumber', 'case_id', 'kobo_caseNumber', 'kobo_case_id')
+CATEGORY_PRIORITY = (
+    'category', 'case_category', 'caseCategory',
+    'law_followup5', 'law_followup4', 'law_followup3', 'law_followup1', 'law_followup',
+    'eng_followup1', 'eng_followup',
+)
+BENEFICIARY_NAME_FIELDS = ('beneficiary_name', 'beneficiary_last_name')
+_MAX_TEXT = 255
+
+
+def _raw_value(raw, key: str):
+    if not isinstance(raw, dict):
+        return None
+    value = raw.get(key)
+    if value is None and isinstance(raw.get('body'), dict):
+        value = raw['body'].get(key)
+    if isinstance(value, (dict, list)):
+        return None
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+
+def _first_value(raw, keys):
+    for key in keys:
+        value = _raw_value(raw, key)
+        if value is not None:
+            return value
+    return None
+
+
+def _text(value):
+    if value is None:
+        return None
+    return str(value).strip()[:_MAX_TEXT] or None
+
+
+def _parse_submission_time(value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value.strip())
+        if isinstance(value, (int, float)):
+            ts = int(value)
+            if ts > 1e12:  # milliseconds
+                ts = ts // 1000
+            return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+        if isinstance(value, str):
+            s = value.strip()
+            if ' ' in s and 'T' not in s:
+                s = s.replace(' ', 'T', 1)
+            dt = datetime.fromisoformat(s.replace('Z', '+00:00'))
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            return dt
+    except (ValueError, OverflowError, OSError):
+        return None
+    return None
+
+
+def _promoted_values(raw) -> dict:
+    submitted_at = None
+    for key in SUBMISSION_TIME_FIELDS:
+        submitted_at = _parse_submission_time(_raw_value(raw, key))
+        if submitted_at is not None:
+            break
+    names = [str(v).strip() for v in (_raw_value(raw, k) for k in BENEFICIARY_NAME_FIELDS) if v is not None]
+    return {
+        'category': _text(_first_value(raw, CATEGORY_PRIORITY)),
+        'case_number': _text(_first_value(raw, CASE_NUMBER_FIELDS)),
+        'beneficiary_name': _text(' '.join(names) or None),
+        'submitted_at': submitted_at,
+    }
+
+
+def _backfill(conn):
+    cases = sa.table(
+        'cases', sa.column('id'), sa.column('raw', sa.JSON()), sa.column('category'), sa.column('case_number'),
+        sa.column('beneficiary_name'), sa.column('submitted_at', sa.DateTime()),
+    )
+    update = cases.update().where(cases.c.id == sa.bindparam('b_id')).values(
+        category=sa.bindparam('b_category'),
+        case_number=sa.bindparam('b_case_number'),
+        beneficiary_name=sa.bindparam('b_beneficiary_name'),
+        submitted_at=sa.bindparam('b_submitted_at', type_=sa.DateTime()),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(cases.c.id, cases.c.raw).where(cases.c.id > last_id).order_by(cases.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for r in rows:
+            values = _promoted_values(r.raw)
+            if any(v is not None for v in values.values()):
+                params.append({'b_id': r.id, **{f'b_{k}': v for k, v in values.items()}})
+        if params:
+            conn.execute(update, params)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    op.add_column('cases', sa.Column('category', sa.String(length=255), nullable=True))
+    op.add_column('cases', sa.Column('case_number', sa.String(length=255), nullable=True))
+    op.add_column('cases', sa.Column('beneficiary_name', sa.String(length=255), nullable=True))
+    op.add_column('cases', sa.Column('submitted_at', sa.DateTime(), nullable=True))
+    _backfill(op.get_bind())
+    op.create_index(op.f('ix_cases_case_number'), 'cases', ['case_number'], unique=False)
+    op.create_index(op.f('ix_cases_submitted_at'), 'cases', ['submitted_at'], unique=False)
+    op.create_index('ix_cases_status_created_at', 'cases', ['status', 'created_at'], unique=False)
+    op.create_index('ix_cases_category_status', 'cases', ['category', 'status'], unique=False)
+    op.create_index('ix_cases_assigned_to_id_status', 'cases', ['assigned_to_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_cases_assigned_to_id_status', table_name='cases')
+    op.drop_index('ix_cases_category_status', table_name='cases')
+    op.drop_index('ix_cases_status_created_at', table_name='cases')
+    op.drop_index(op.f('ix_cases_submitted_at'), table_name='cases')
+    op.drop_index(op.f('ix_cases_case_number'), table_name='cases')
+    op.drop_column('cases', 'submitted_at')
+    op.drop_column('cases', 'beneficiary_name')
+    op.drop_column('cases', 'case_number')
+    op.drop_column('cases', 'category')
@@ -0,0 +1,74 @@
+"""Store large raw._body_backup copies zlib-compressed
+
+Revision ID: 011_compress_body_backup
+Revises: 010_add_promoted_case_columns
+Create Date: 2026-10-19 00:00:00.000000
+"""
+import base64
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_compress_body_backup'
+down_revision = '010_add_promoted_case_columns'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+# Frozen copy of the backend/raw_fields.py codec as of this revision
+BODY_BACKUP_COMPRESS_MIN = 256
+
+
+def encode_body_backup(body: dict) -> dict:
+    data = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(data) < BODY_BACKUP_COMPRESS_MIN:
+        return dict(body)
+    return {'$zlib': base64.b64encode(zlib.compress(data, 6)).decode('ascii')}
+
+
+def decode_body_backup(value) -> dict | None:
+    if isinstance(value, dict) and set(value) == {'$zlib'}:
+        try:
+            return json.loads(zlib.decompress(base64.b64decode(value['$zlib'])).decode('utf-8'))
+        except (ValueError, zlib.error):
+            return None
+    return value if isinstance(value, dict) else None
+
+
+def _rewrite_backups(conn, transform):
+    cases = sa.table('cases', sa.column('id'), sa.column('raw', sa.JSON()))
+    update = cases.update().where(cases.c.id == sa.bindparam('b_id')).values(raw=sa.bindparam('b_raw', type_=sa.JSON()))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(cases.c.id, cases.c.raw).where(cases.c.id > last_id).order_by(cases.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        params = []
+        for r in rows:
+            raw = r.raw
+            if not isinstance(raw, dict) or not isinstance(raw.get('_body_backup'), dict):
+                continue
+            backup = transform(raw['_body_backup'])
+            if backup is not None and backup != raw['_body_backup']:
+                params.append({'b_id': r.id, 'b_raw': {**raw, '_body_backup': backup}})
+        if params:
+            conn.execute(update, params)
+        last_id = rows[-1].id
+
+
+def _compress(backup):
+    # already compressed backups decode to a different dict; leave them alone
+    return encode_body_backup(backup) if set(backup) != {'$zlib'} else None
+
+
+def upgrade() -> None:
+    _rewrite_backups(op.get_bind(), _compress)
+
+
+def downgrade() -> None:
+    _rewrite_backups(op.get_bind(), decode_body_backup)
@@ -0,0 +1,76 @@
+"""Compressed import row payloads and retention bookkeeping
+
+Revision ID: 012_compress_import_row_payloads
+Revises: 011_compress_body_backup
+Create Date: 2026-10-19 00:00:00.000000
+"""
+import json
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012_compress_import_row_payloads'
+down_revision = '011_compress_body_backup'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 500
+
+import_rows = sa.table(
+    'import_rows', sa.column('id'),
+    sa.column('raw', sa.JSON(none_as_null=True)), sa.column('raw_zlib', sa.LargeBinary()),
+)
+
+
+def _compress_payload(data) -> bytes:
+    # frozen copy of backend.import_payloads.compress_payload as of this revision
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def _decompress_payload(blob: bytes):
+    return json.loads(zlib.decompress(blob).decode('utf-8'))
+
+
+def _batches(conn, where):
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(import_rows.c.id, import_rows.c.raw, import_rows.c.raw_zlib)
+            .where(import_rows.c.id > last_id, where).order_by(import_rows.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def _update(conn, params):
+    conn.execute(
+        import_rows.update().where(import_rows.c.id == sa.bindparam('b_id'))
+        .values(raw=sa.bindparam('b_raw', type_=sa.JSON(none_as_null=True)),
+                raw_zlib=sa.bindparam('b_zlib', type_=sa.LargeBinary())),
+        params,
+    )
+
+
+def upgrade() -> None:
+    op.add_column('import_rows', sa.Column('raw_zlib', sa.LargeBinary(), nullable=True))
+    op.add_column('import_rows', sa.Column('payload_pruned_at', sa.DateTime(), nullable=True))
+    op.create_index('ix_import_rows_status_created_at', 'import_rows', ['status', 'created_at'], unique=False)
+    conn = op.get_bind()
+    for rows in _batches(conn, import_rows.c.raw.is_not(None)):
+        params = [{'b_id': r.id, 'b_raw': None, 'b_zlib': _compress_payload(r.raw)} for r in rows if r.raw is not None]
+        if params:
+            _update(conn, params)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    for rows in _batches(conn, import_rows.c.raw_zlib.is_not(None)):
+        _update(conn, [{'b_id': r.id, 'b_raw': _decompress_payload(r.raw_zlib), 'b_zlib': None}
+                       for r in rows])
+    op.drop_index('ix_import_rows_status_created_at', table_name='import_rows')
+    op.drop_column('import_rows', 'payload_pruned_at')
+    op.drop_column('import_rows', 'raw_zlib')
@@ -0,0 +1,30 @@
+"""Cache version table and indexes for user directory lookups
+
+Revision ID: 013_add_user_directory_cache
+Revises: 012_compress_import_row_payloads
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_add_user_directory_cache'
+down_revision = '012_compress_import_row_payloads'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(length=64), primary_key=True),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('ix_users_name', 'users', ['name'])
+    op.create_index('ix_users_ability', 'users', ['ability'])
+
+
+def downgrade():
+    op.drop_index('ix_users_ability', table_name='users')
+    op.drop_index('ix_users_name', table_name='users')
+    op.drop_table('cache_versions')
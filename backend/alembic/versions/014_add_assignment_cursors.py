@@ -0,0 +1,27 @@
+"""Round-robin cursors for case auto-assignment
+
+Revision ID: 014_add_assignment_cursors
+Revises: 013_add_user_directory_cache
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014_add_assignment_cursors'
+down_revision = '013_add_user_directory_cache'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'assignment_cursors',
+        sa.Column('ability', sa.String(length=255), primary_key=True),
+        sa.Column('last_user_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table('assignment_cursors')
@@ -0,0 +1,55 @@
+"""ON DELETE rules for case and user references, and indexes on the referencing columns
+
+Revision ID: 015_add_on_delete_rules
+Revises: 014_add_assignment_cursors
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015_add_on_delete_rules'
+down_revision = '014_add_assignment_cursors'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table, ON DELETE rule)
+RULES = (
+    ('comments', 'case_id', 'cases', 'CASCADE'),
+    ('comments', 'user_id', 'users', 'SET NULL'),
+    ('import_rows', 'case_id', 'cases', 'SET NULL'),
+    ('cases', 'assigned_to_id', 'users', 'SET NULL'),
+    ('import_jobs', 'uploader_id', 'users', 'SET NULL'),
+)
+# without these, every cascaded delete / SET NULL scans the referencing table; comments.case_id is
+# covered by the (case_id, created_at) index of migration 016
+INDEXES = (
+    ('ix_comments_user_id', 'comments', 'user_id'),
+    ('ix_import_rows_case_id', 'import_rows', 'case_id'),
+)
+
+
+def _replace_foreign_keys(ondelete_for):
+    # SQLite cannot alter constraints in place and only enforces them with PRAGMA foreign_keys=ON; the
+    # application deletes dependents itself there (backend/deletion.py), so only Postgres is rewritten.
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    inspector = sa.inspect(bind)
+    for table, column, referred, rule in RULES:
+        for fk in inspector.get_foreign_keys(table):
+            if fk['constrained_columns'] == [column] and fk['referred_table'] == referred:
+                op.drop_constraint(fk['name'], table, type_='foreignkey')
+        op.create_foreign_key(f'{table}_{column}_fkey', table, referred, [column], ['id'], ondelete=ondelete_for(rule))
+
+
+def upgrade():
+    for name, table, column in INDEXES:
+        op.create_index(name, table, [column])
+    _replace_foreign_keys(lambda rule: rule)
+
+
+def downgrade():
+    _replace_foreign_keys(lambda rule: None)
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,29 @@
+"""Comment listing index and denormalized case comment counts
+
+Revision ID: 016_add_comment_pagination
+Revises: 015_add_on_delete_rules
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016_add_comment_pagination'
+down_revision = '015_add_on_delete_rules'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # also serves the case_id lookups of cascaded case deletes
+    op.create_index('ix_comments_case_id_created_at', 'comments', ['case_id', 'created_at'])
+    op.add_column('cases', sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        'UPDATE cases SET comment_count = (SELECT count(*) FROM comments WHERE comments.case_id = cases.id) '
+        'WHERE EXISTS (SELECT 1 FROM comments WHERE comments.case_id = cases.id)'
+    )
+
+
+def downgrade():
+    op.drop_column('cases', 'comment_count')
+    op.drop_index('ix_comments_case_id_created_at', table_name='comments')
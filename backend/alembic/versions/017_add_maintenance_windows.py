@@ -0,0 +1,34 @@
+"""Persisted maintenance windows
+
+Revision ID: 017_add_maintenance_windows
+Revises: 016_add_comment_pagination
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '017_add_maintenance_windows'
+down_revision = '016_add_comment_pagination'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'maintenance_windows',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('start_at', sa.DateTime(), nullable=False),
+        sa.Column('end_at', sa.DateTime(), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_maintenance_windows_id', 'maintenance_windows', ['id'])
+    op.create_index('ix_maintenance_windows_end_at', 'maintenance_windows', ['end_at'])
+
+
+def downgrade():
+    op.drop_index('ix_maintenance_windows_end_at', table_name='maintenance_windows')
+    op.drop_index('ix_maintenance_windows_id', table_name='maintenance_windows')
+    op.drop_table('maintenance_windows')
@@ -0,0 +1,265 @@
+"""Family roster rows extracted from KoBo repeat groups, and case family sizes
+
+Revision ID: 018_add_family_members
+Revises: 017_add_maintenance_windows
+Create Date: 2026-10-19 00:00:00.000000
+"""
+import functools
+import re
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '018_add_family_members'
+down_revision = '017_add_maintenance_windows'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 1000
+
+# Frozen copy of the roster extractor (backend/roster.py and the helpers it uses from backend/raw_fields.py)
+# as of this revision; later changes to the app code must not change what this migration writes.
+ROSTER_FIELDS = (
+    'family_roster', 'family', 'roster', 'household', 'household_members', 'members',
+    'family_members', 'familymembers', 'householdMembers',
+)
+ROSTER_GROUP = 'group_fj2tt69_partnernu1_'
+SLOT_ORDER = ('7_1', '5_1', '3_1', '2_1', '1', '6_1', '4_1')
+MAX_AGE = 130
+_ROSTER_MARKER = 'partnernu1'
+_KEY_RE = re.compile(r'^' + ROSTER_GROUP + r'(\d+(?:_\d+)*)_(.+)$')
+_NON_KEY_CHARS = re.compile(r'[^a-z0-9_]+')
+_UNDERSCORES = re.compile(r'_+')
+_SUFFIX_FIELDS = tuple((re.compile(pattern), field) for pattern, field in (
+    (r'relation|kinship', 'relation'),
+    (r'govreg|registr', 'govreg'),
+    (r'last|family_name|surname|title', 'last_name'),
+    (r'name', 'name'),
+    (r'gender|sex', 'gender'),
+    (r'(?:^|_)age(?:_|$)', 'age'),
+    (r'^partner$|birth|dob|date', 'birth_date'),
+    (r'national|country', 'nationality'),
+))
+_MEMBER_ALIASES = {
+    'name': 'name', 'firstname': 'name', 'givenname': 'name', 'partnername': 'name',
+    'lastname': 'last_name', 'familyname': 'last_name', 'surname': 'last_name', 'partnerlastname': 'last_name',
+    'relation': 'relation', 'relationship': 'relation', 'kinship': 'relation', 'partnerrelation1': 'relation',
+    'gender': 'gender', 'sex': 'gender',
+    'birthdate': 'birth_date', 'dateofbirth': 'birth_date', 'dob': 'birth_date', 'partner': 'birth_date',
+    'age': 'age',
+    'nationality': 'nationality', 'partnernationality': 'nationality',
+    'govreg': 'govreg', 'registered': 'govreg', 'partnergovreg': 'govreg',
+}
+_LENGTHS = {'name': 255, 'last_name': 255, 'relation': 64, 'gender': 32, 'nationality': 64, 'govreg': 64}
+
+
+@functools.lru_cache(maxsize=4096)
+def _roster_key(key: str):
+    normalized = _UNDERSCORES.sub('_', _NON_KEY_CHARS.sub('_', key.lower()))
+    start = normalized.rfind(ROSTER_GROUP)
+    if start < 0:
+        return None
+    match = _KEY_RE.match(normalized[start:])
+    if match is None:
+        return None
+    field = next((field for pattern, field in _SUFFIX_FIELDS if pattern.search(match.group(2))), None)
+    return (match.group(1), field) if field else None
+
+
+def _member_field(key: str):
+    field = _MEMBER_ALIASES.get(re.sub(r'[^a-z0-9]', '', key.lower()))
+    if field is None:
+        parsed = _roster_key(key)
+        field = parsed[1] if parsed else None
+    return field
+
+
+def _slot_sort_key(slot: str):
+    if slot in SLOT_ORDER:
+        return (0, SLOT_ORDER.index(slot), ())
+    return (1, 0, tuple(int(part) for part in slot.split('_')))
+
+
+def _parse_submission_time(value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value.strip())
+        if isinstance(value, (int, float)):
+            ts = int(value)
+            if ts > 1e12:  # milliseconds
+                ts = ts // 1000
+            return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+        if isinstance(value, str):
+            s = value.strip()
+            if ' ' in s and 'T' not in s:
+                s = s.replace(' ', 'T', 1)
+            dt = datetime.fromisoformat(s.replace('Z', '+00:00'))
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            return dt
+    except (ValueError, OverflowError, OSError):
+        return None
+    return None
+
+
+def _birth_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if str(value).strip().isdigit() and len(str(value).strip()) == 4:
+        year = int(str(value).strip())
+        return date(year, 1, 1) if 1880 <= year <= 2100 else None
+    parsed = _parse_submission_time(value)
+    return parsed.date() if parsed is not None else None
+
+
+def _age(value):
+    try:
+        age = int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return age if 0 <= age <= MAX_AGE else None
+
+
+def _normalize_member(fields: dict, reference: date):
+    member = {}
+    for field, value in fields.items():
+        if value is None or (isinstance(value, str) and not value.strip()) or isinstance(value, (dict, list)):
+            continue
+        if field == 'birth_date':
+            member[field] = _birth_date(value)
+        elif field == 'age':
+            member[field] = _age(value)
+        else:
+            text = str(value).strip()[:_LENGTHS[field]]
+            member[field] = text.casefold() if field in ('relation', 'gender') else text
+    member = {field: value for field, value in member.items() if value is not None}
+    if not member:
+        return None
+    if 'age' not in member and 'birth_date' in member:
+        born = member['birth_date']
+        age = reference.year - born.year - ((reference.month, reference.day) < (born.month, born.day))
+        if 0 <= age <= MAX_AGE:
+            member['age'] = age
+    return member
+
+
+def _extract_roster(raw, reference: date) -> list:
+    if not isinstance(raw, dict):
+        return []
+    sources = [raw]
+    for nested in (raw.get('body'), raw.get('formFields')):
+        if isinstance(nested, dict):
+            sources.append(nested)
+    members = []
+    slots = {}
+    for source in sources:
+        for key, value in source.items():
+            parsed = _roster_key(key) if isinstance(key, str) and _ROSTER_MARKER in key.lower() else None
+            if parsed is not None:
+                slots.setdefault(parsed[0], {}).setdefault(parsed[1], value)
+    if slots:
+        for slot in sorted(slots, key=_slot_sort_key):
+            member = _normalize_member(slots[slot], reference)
+            if member is not None:
+                members.append({'slot': slot, **member})
+        return members
+    entries = None
+    for source in sources:
+        form_fields = source.get('formFields')
+        if isinstance(form_fields, dict) and isinstance(form_fields.get('family'), list):
+            entries = form_fields['family']
+        else:
+            entries = next((source[key] for key in ROSTER_FIELDS if isinstance(source.get(key), list)), None)
+        if entries is not None:
+            break
+    for entry in entries or ():
+        if not isinstance(entry, dict):
+            continue
+        fields = {}
+        for key, value in entry.items():
+            field = _member_field(key) if isinstance(key, str) else None
+            if field is not None:
+                fields.setdefault(field, value)
+        member = _normalize_member(fields, reference)
+        if member is not None:
+            slot = entry.get('slot')
+            members.append({'slot': str(slot)[:32] if slot else None, **member})
+    return members
+
+
+def _backfill_rosters(conn):
+    cases = sa.table('cases', sa.column('id'), sa.column('raw', sa.JSON()), sa.column('submitted_at', sa.DateTime()),
+                     sa.column('created_at', sa.DateTime()), sa.column('family_member_count'))
+    members = sa.table(
+        'family_members', sa.column('case_id'), sa.column('position'), sa.column('slot'), sa.column('name'),
+        sa.column('last_name'), sa.column('relation'), sa.column('gender'), sa.column('birth_date', sa.Date()),
+        sa.column('age'), sa.column('nationality'), sa.column('govreg'),
+    )
+    columns = ('slot', 'name', 'last_name', 'relation', 'gender', 'birth_date', 'age', 'nationality', 'govreg')
+    today = datetime.utcnow().date()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(cases.c.id, cases.c.raw, cases.c.submitted_at, cases.c.created_at)
+            .where(cases.c.id > last_id).order_by(cases.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        counts = []
+        inserts = []
+        for r in rows:
+            started = r.submitted_at or r.created_at
+            roster = _extract_roster(r.raw, started.date() if started is not None else today)
+            if not roster:
+                continue
+            counts.append({'b_id': r.id, 'b_count': len(roster)})
+            inserts.extend({'case_id': r.id, 'position': position, **{c: member.get(c) for c in columns}}
+                           for position, member in enumerate(roster))
+        if counts:
+            conn.execute(
+                cases.update().where(cases.c.id == sa.bindparam('b_id'))
+                .values(family_member_count=sa.bindparam('b_count')),
+                counts,
+            )
+        if inserts:
+            conn.execute(members.insert(), inserts)
+        last_id = rows[-1].id
+
+
+def upgrade():
+    op.add_column('cases', sa.Column('family_member_count', sa.Integer(), nullable=False, server_default='0'))
+    op.create_index('ix_cases_family_member_count', 'cases', ['family_member_count'])
+    op.create_table(
+        'family_members',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('case_id', sa.Integer(), sa.ForeignKey('cases.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('slot', sa.String(length=32), nullable=True),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('last_name', sa.String(length=255), nullable=True),
+        sa.Column('relation', sa.String(length=64), nullable=True),
+        sa.Column('gender', sa.String(length=32), nullable=True),
+        sa.Column('birth_date', sa.Date(), nullable=True),
+        sa.Column('age', sa.Integer(), nullable=True),
+        sa.Column('nationality', sa.String(length=64), nullable=True),
+        sa.Column('govreg', sa.String(length=64), nullable=True),
+    )
+    op.create_index('ix_family_members_case_id_position', 'family_members', ['case_id', 'position'])
+    op.create_index('ix_family_members_relation_age', 'family_members', ['relation', 'age'])
+    op.create_index('ix_family_members_age', 'family_members', ['age'])
+    _backfill_rosters(op.get_bind())
+
+
+def downgrade():
+    op.drop_index('ix_family_members_age', table_name='family_members')
+    op.drop_index('ix_family_members_relation_age', table_name='family_members')
+    op.drop_index('ix_family_members_case_id_position', table_name='family_members')
+    op.drop_table('family_members')
+    op.drop_index('ix_cases_family_member_count', table_name='cases')
+    op.drop_column('cases', 'family_member_count')
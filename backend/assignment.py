@@ -0,0 +1,157 @@
+"""Workload-aware auto-assignment of cases to the users of an ability.
+
+The open-case count of every candidate comes from one grouped query over
+`ix_cases_assigned_to_id_status`, so picking an assignee never scans cases. Two strategies are
+available (`ASSIGNMENT_STRATEGY` sets the default):
+
+- `least_loaded`: the candidate with the fewest open cases; ties rotate like round-robin.
+- `round_robin`: candidates in id order, continuing after the user who received the previous case.
+
+The last user that received a case is persisted per ability in `assignment_cursors`, so rotation
+survives restarts and is shared by workers. The cursor row is created with an upsert and locked for
+the rest of the caller's transaction, so concurrent assignments for one ability take turns instead of
+starting from the same position. `auto_assign_cases` assigns a whole batch of unassigned
+cases with a fixed number of statements, however many cases are in the batch.
+"""
+import os
+from datetime import datetime
+
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend import search
+from backend.models import AssignmentCursor, Case, Comment, ImportRow, User
+
+STRATEGIES = ('least_loaded', 'round_robin')
+ASSIGNMENT_STRATEGY = os.getenv('ASSIGNMENT_STRATEGY', 'least_loaded')
+RESOLVED_STATUSES = ('Completed', 'Closed')
+AUTO_ASSIGN_MAX_BATCH = 5000
+
+
+def open_case_filter():
+    """Cases still counted towards an assignee's workload."""
+    return or_(Case.status.is_(None), Case.status.not_in(RESOLVED_STATUSES))
+
+
+def assignment_comment(name: str | None) -> str:
+    return f"Assigned to {name or 'Unassigned'}"
+
+
+def lock_cursor(db: Session, ability: str) -> AssignmentCursor:
+    """The ability's rotation cursor, created if missing and locked until the caller's transaction ends."""
+    dialect = db.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        upsert = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(AssignmentCursor)
+        db.execute(upsert.values(ability=ability).on_conflict_do_nothing(index_elements=['ability']))
+    elif db.get(AssignmentCursor, ability) is None:
+        try:
+            with db.begin_nested():
+                db.execute(insert(AssignmentCursor).values(ability=ability))
+        except IntegrityError:
+            # another transaction created it first
+            pass
+    return db.execute(
+        select(AssignmentCursor).where(AssignmentCursor.ability == ability)
+        .with_for_update().execution_options(populate_existing=True)
+    ).scalar_one()
+
+
+class Assigner:
+    """Picks assignees for one ability. Candidates and their loads are read once; every pick updates
+    the in-memory loads, so a batch spreads out exactly as if cases were assigned one by one."""
+
+    def __init__(self, db: Session, ability: str, strategy: str | None = None):
+        strategy = strategy or ASSIGNMENT_STRATEGY
+        if strategy not in STRATEGIES:
+            raise ValueError(f'Unknown assignment strategy {strategy!r}; use one of {", ".join(STRATEGIES)}')
+        self.db = db
+        self.ability = ability
+        self.strategy = strategy
+        # lock the cursor before reading loads, so they include the assignments of a batch that held it
+        self._cursor = lock_cursor(db, ability)
+        self.last_user_id = self._cursor.last_user_id
+        rows = db.execute(
+            select(User.id, User.name, func.count(Case.id))
+            .outerjoin(Case, and_(Case.assigned_to_id == User.id, open_case_filter()))
+            .where(User.ability == ability)
+            .group_by(User.id, User.name)
+            .order_by(User.id)
+        ).all()
+        self.names = {user_id: name for user_id, name, _ in rows}
+        self.loads = {user_id: count for user_id, _, count in rows}
+
+    def __bool__(self):
+        return bool(self.loads)
+
+    def _after_cursor(self, user_id: int) -> tuple:
+        # users after the previous assignee come first, then wrap around to the lowest ids
+        last = self.last_user_id if self.last_user_id is not None else -1
+        return (0 if user_id > last else 1, user_id)
+
+    def pick(self) -> int | None:
+        """Id of the next assignee (None without candidates); counts the new case towards their load."""
+        if not self.loads:
+            return None
+        if self.strategy == 'round_robin':
+            user_id = min(self.loads, key=self._after_cursor)
+        else:
+            user_id = min(self.loads, key=lambda uid: (self.loads[uid], self._after_cursor(uid)))
+        self.loads[user_id] += 1
+        self.last_user_id = user_id
+        return user_id
+
+    def save(self):
+        """Persist the rotation position in the caller's transaction."""
+        if self.last_user_id is not None and self.last_user_id != self._cursor.last_user_id:
+            self._cursor.last_user_id = self.last_user_id
+
+
+def unassigned_cases_query(status: str | None = 'Pending', job_id: int | None = None, case_ids=None):
+    query = select(Case).where(Case.assigned_to_id.is_(None))
+    if status:
+        query = query.where(Case.status == status)
+    if job_id is not None:
+        query = query.where(Case.id.in_(select(ImportRow.case_id).where(ImportRow.job_id == job_id)))
+    if case_ids:
+        query = query.where(Case.id.in_(case_ids))
+    return query.order_by(Case.created_at, Case.id)
+
+
+def auto_assign_cases(db: Session, ability: str, strategy: str | None = None, status: str | None = 'Pending',
+                      job_id: int | None = None, case_ids=None, limit: int = 500, user_id: int | None = None):
+    """Assign up to `limit` unassigned cases to users with `ability` and add the usual audit comment.
+
+    Statements issued do not depend on the batch size: an upsert and a locking SELECT for the cursor, one
+    SELECT for the candidates and their loads, one for the cases, one executemany UPDATE for the cases and
+    one for the comments.
+    Returns `(assigner, [(case_id, user_id), ...])`; the caller commits.
+    """
+    assigner = Assigner(db, ability, strategy)
+    if not assigner:
+        return assigner, []
+    limit = max(1, min(limit, AUTO_ASSIGN_MAX_BATCH))
+    query = unassigned_cases_query(status, job_id, case_ids).limit(limit)
+    # concurrent batches skip each other's rows instead of assigning them twice (ignored by SQLite)
+    cases = db.execute(query.with_for_update(skip_locked=True, of=Case)).scalars().all()
+    now = datetime.utcnow()
+    assignments = []
+    comments = []
+    for case in cases:
+        assignee_id = assigner.pick()
+        # set the column only: touching the relationship would load every assignee's case collection
+        case.assigned_to_id = assignee_id
+        case.updated_at = now
+        content = assignment_comment(assigner.names[assignee_id])
+        comments.append({'case_id': case.id, 'user_id': user_id, 'content': content, 'created_at': now})
+        search.append_comment_text(case, content)
+        # the case row is locked for this transaction (Postgres), so a plain increment is safe
+        case.comment_count = (case.comment_count or 0) + 1
+        assignments.append((case.id, assignee_id))
+    assigner.save()
+    db.flush()
+    if comments:
+        # one executemany INSERT; ORM-added comments would each need their own INSERT ... RETURNING
+        db.execute(insert(Comment), comments)
+    return assigner, assignments
@@ -0,0 +1 @@
+"""Benchmarks for backend hot paths. Run modules directly, e.g. `python -m backend.benchmarks.export_xlsx`."""
@@ -0,0 +1,105 @@
+"""Shared helpers for benchmarks: a scratch database and synthetic Kobo-like cases."""
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# roster slots as KoBo names them (group_..._partnernu1_<slot>_partner_*), in the order forms fill them
+ROSTER_SLOTS = ('7_1', '5_1', '3_1', '2_1', '1_1')
+STATUSES = ('Pending', 'Pending', 'In Progress', 'Completed', 'Closed')
+SUBMISSION_EPOCH = datetime(2025, 1, 1, 10, 0, 0)
+
+
+def use_scratch_database(name: str) -> str:
+    """Point DATABASE_URL at a fresh SQLite file. Must run before `backend.api` is imported."""
+    workdir = tempfile.mkdtemp(prefix='hlp-bench-')
+    url = f"sqlite:///{os.path.join(workdir, name)}"
+    os.environ['DATABASE_URL'] = url
+    return url
+
+
+def use_database(url: str | None, name: str) -> str:
+    """Point DATABASE_URL at `url` (e.g. a local Postgres container), or at a scratch SQLite file."""
+    if not url:
+        return use_scratch_database(name)
+    os.environ['DATABASE_URL'] = url
+    return url
+
+
+def prepare_schema(engine):
+    """Create the schema: Alembic migrations on Postgres (as deployed), `create_all` plus FTS on SQLite."""
+    from backend import search
+    from backend.models import Base
+
+    if engine.dialect.name != 'postgresql':
+        Base.metadata.create_all(bind=engine)
+        search.ensure_search_index(engine)
+        return
+    from alembic import command
+    from alembic.config import Config
+
+    from backend import startup
+
+    # env.py reads DATABASE_URL, which use_database() has already set
+    config = Config(startup.ALEMBIC_INI)
+    config.set_main_option('script_location', os.path.join(os.path.dirname(startup.ALEMBIC_INI), 'alembic'))
+    command.upgrade(config, 'head')
+
+
+def synthetic_raw(i: int, roster: int = 3) -> dict:
+    """A flat KoBo submission: Arabic names, `roster` family members and 20 free-text answers."""
+    submitted = SUBMISSION_EPOCH + timedelta(minutes=37 * i)
+    raw = {
+        'case_id': f'BENCH-{i:06d}',
+        '_uuid': f'00000000-0000-0000-0000-{i:012d}',
+        '_submission_time': submitted.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'beneficiary_name': 'محمد' if i % 2 else 'فاطمة',
+        'beneficiary_last_name': f'العلي {i}',
+        'law_followup': 'legal_consultation' if i % 3 else 'documentation',
+        'ben_gender': 'male' if i % 2 else 'female',
+        'id_card_nu': f'{i:011d}',
+    }
+    for slot in ROSTER_SLOTS[:roster]:
+        raw[f'group_fj2tt69_partnernu1_{slot}_partner_name'] = f'فرد {slot} {i}'
+        raw[f'group_fj2tt69_partnernu1_{slot}_partner_relation1'] = 'child'
+    for n in range(20):
+        raw[f'question_{n}'] = f'answer {n} for case {i}'
+    return raw
+
+
+def kobo_submission(i: int) -> dict:
+    """Case `i` as the n8n webhook forwards it: the submission nested under `body`, with a 0-4 member roster."""
+    return {
+        'headers': {'content-type': 'application/json', 'user-agent': 'KoboToolbox'},
+        'params': {},
+        'query': {},
+        'body': synthetic_raw(i, roster=i % len(ROSTER_SLOTS)),
+        'kobo_case_id': f'kobo-{i}',
+        'executionMode': 'production',
+    }
+
+
+def seed_cases(engine, start: int, stop: int, batch: int = 5000, wrapped_every: int = 0):
+    """Bulk insert synthetic cases [start, stop). Core inserts skip the ORM hooks, so derived columns are set here.
+
+    With `wrapped_every=n`, every n-th case is stored as its webhook envelope (`kobo_submission`), like rows
+    imported before wrappers were flattened on write; reads flatten those on the fly.
+    """
+    from backend.models import Case
+    from backend.raw_fields import promoted_values
+    from backend.search import build_search_text
+
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for lo in range(start, stop, batch):
+            rows = []
+            for i in range(lo, min(lo + batch, stop)):
+                if wrapped_every and i % wrapped_every == 0:
+                    raw = kobo_submission(i)
+                    title = raw['body']['case_id']
+                else:
+                    raw = synthetic_raw(i)
+                    title = raw['case_id']
+                rows.append({'title': title, 'description': '', 'status': STATUSES[i % len(STATUSES)], 'raw': raw,
+                             'search_text': build_search_text(title, '', raw),
+                             'created_at': now, 'updated_at': now, **promoted_values(raw)})
+            conn.execute(Case.__table__.insert(), rows)
@@ -0,0 +1,75 @@
+"""Compare two scenario benchmark runs and flag regressions.
+
+Reads the JSON written by `backend.benchmarks.scenarios --output` for a base and a head commit,
+matches results by scenario and row count, and flags a scenario when its latency grew by more than
+--threshold percent and by more than --min-delta-ms (so sub-millisecond noise is not a regression).
+Exits with status 1 when anything regressed, so it can gate CI.
+
+Usage:
+  python -m backend.benchmarks.compare bench-base.json bench-head.json
+  python -m backend.benchmarks.compare bench-base.json bench-head.json --metric p95_ms --threshold 15 --json
+"""
+import argparse
+import json
+import sys
+
+METRICS = ('p50_ms', 'p95_ms', 'mean_ms', 'max_ms')
+
+
+def load(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base: dict, head: dict, metric: str = 'p50_ms', threshold: float = 10.0,
+            min_delta_ms: float = 1.0) -> list[dict]:
+    """One entry per scenario and row count present in either run, with `regressed` set on regressions."""
+    base_results = {(r['scenario'], r['rows']): r for r in base['results']}
+    head_results = {(r['scenario'], r['rows']): r for r in head['results']}
+    rows = []
+    # in run order: scenarios as listed by the head run, then any only the base ran
+    for key in dict.fromkeys([*head_results, *base_results]):
+        before, after = base_results.get(key), head_results.get(key)
+        entry = {'scenario': key[0], 'rows': key[1], 'base': before and before[metric],
+                 'head': after and after[metric], 'change_pct': None, 'regressed': False}
+        if before and after and before[metric]:
+            delta = after[metric] - before[metric]
+            entry['change_pct'] = round(delta / before[metric] * 100, 1)
+            entry['regressed'] = entry['change_pct'] > threshold and delta > min_delta_ms
+        rows.append(entry)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Flag benchmark regressions between two scenario runs')
+    parser.add_argument('base', help='Results of the base commit')
+    parser.add_argument('head', help='Results of the commit under test')
+    parser.add_argument('--metric', choices=METRICS, default='p50_ms', help='Latency figure to compare')
+    parser.add_argument('--threshold', type=float, default=10.0, help='Regression threshold in percent')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='Ignore changes smaller than this')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args(argv)
+
+    base, head = load(args.base), load(args.head)
+    rows = compare(base, head, args.metric, args.threshold, args.min_delta_ms)
+    regressions = [row for row in rows if row['regressed']]
+    if base['meta'].get('dialect') != head['meta'].get('dialect'):
+        print(f"warning: comparing {base['meta'].get('dialect')} with {head['meta'].get('dialect')} results",
+              file=sys.stderr)
+    if args.json:
+        print(json.dumps({'base': base['meta'].get('revision'), 'head': head['meta'].get('revision'),
+                          'metric': args.metric, 'threshold_pct': args.threshold, 'results': rows,
+                          'regressions': len(regressions)}, indent=2))
+    else:
+        print(f"{args.metric}: {base['meta'].get('revision')} -> {head['meta'].get('revision')}")
+        for row in rows:
+            change = f"{row['change_pct']:+.1f}%" if row['change_pct'] is not None else 'n/a'
+            flag = '  REGRESSION' if row['regressed'] else ''
+            print(f"{row['scenario']:>15} rows={row['rows']:<7} {row['base']!s:>10} -> {row['head']!s:>10} "
+                  f"{change:>8}{flag}")
+        print(f'{len(regressions)} regression(s) above {args.threshold}%')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Memory benchmark for the streaming XLSX case export.
+
+Seeds synthetic cases into a throwaway SQLite database, streams them through the same code
+path as `GET /cases/export?format=xlsx` and reports wall time, output size and the peak
+Python heap (tracemalloc). Peak memory should stay roughly flat as the row count grows;
+the run fails when the peak exceeds --max-peak-mb.
+
+Usage:
+  python -m backend.benchmarks.export_xlsx --rows 5000 --rows 50000
+  python -m backend.benchmarks.export_xlsx --rows 50000 --json
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+import tracemalloc
+
+from backend.benchmarks.common import seed_cases, use_scratch_database
+
+ADMIN = {'sub': 'bench', 'role': 'admin'}
+
+
+def measure(api, export) -> dict:
+    db = api.SessionLocal()
+    try:
+        tracemalloc.start()
+        started = time.perf_counter()
+        columns = api._discover_export_columns(db, ADMIN, case_fields_first=False)
+        size = 0
+        for chunk in export.iter_xlsx(api._iter_export_records(ADMIN), columns):
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        db.close()
+    return {
+        'seconds': round(elapsed, 3),
+        'bytes': size,
+        'peak_heap_mb': round(peak / (1024 * 1024), 2),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark streaming XLSX export memory use')
+    parser.add_argument('--rows', type=int, action='append',
+                        help='Row counts to measure (repeatable, default 5000 and 50000)')
+    parser.add_argument('--max-peak-mb', type=float, default=64.0, help='Fail if the traced heap peak exceeds this')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args(argv)
+    row_counts = sorted(set(args.rows or [5000, 50000]))
+
+    # The API module reads DATABASE_URL at import time, so point it at the scratch database first
+    use_scratch_database('export.db')
+    from backend import api, export
+    from backend.models import Base
+
+    Base.metadata.create_all(bind=api.engine)
+    results = []
+    seeded = 0
+    for n in row_counts:
+        seed_cases(api.engine, seeded, n)
+        seeded = n
+        result = {'rows': n, **measure(api, export)}
+        results.append(result)
+        if not args.json:
+            print(f"rows={n:>7} time={result['seconds']:>8.2f}s size={result['bytes'] / 1e6:>7.1f}MB "
+                  f"peak_heap={result['peak_heap_mb']:>6.1f}MB max_rss={result['max_rss_mb']:>7.1f}MB")
+    if args.json:
+        print(json.dumps(results, indent=2))
+    worst = max(r['peak_heap_mb'] for r in results)
+    if worst > args.max_peak_mb:
+        print(f'FAIL: peak heap {worst}MB exceeds {args.max_peak_mb}MB', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
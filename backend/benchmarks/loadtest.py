@@ -0,0 +1,365 @@
+"""Load test replaying a realistic mix of case workers, supervisors and integrations, stepped to saturation.
+
+Starts the app (`backend.main:app` under gunicorn or uvicorn, as in `workers.py`) on a seeded database,
+or targets a running deployment with --base-url, and runs virtual users on threads:
+
+- case workers poll the dashboard (`GET /cases`), open a case (`GET /cases/{id}` and its comments)
+  and sometimes comment on it;
+- supervisors read the stats and the pending queue and assign cases (workload-aware, by ability);
+- one n8n integration posts KoBo submissions to `POST /cases` in bursts;
+- one importer uploads an XLSX workbook to `POST /import` periodically.
+
+Users think for an exponentially distributed time (mean --think-time) between actions. The number of
+human users starts at --start-users and grows by --step-users every --step-duration seconds. Each
+step reports p50/p95/p99 latency and the error rate per endpoint. The run stops at the first step that
+breaks the SLO (overall p95 above --slo-p95-ms, or error rate above --max-error-rate), or whose
+throughput no longer grows with the user count. The last step that kept the SLO is the saturation
+point.
+
+Usage:
+  python -m backend.benchmarks.loadtest --workers 2 --rows 10000
+  python -m backend.benchmarks.loadtest --start-users 10 --step-users 10 --max-users 200 --output load.json
+  python -m backend.benchmarks.loadtest --base-url http://localhost:8000/api --admin-password ...
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import threading
+import time
+
+import httpx
+
+from backend.benchmarks.common import kobo_submission, prepare_schema, seed_cases, use_database
+from backend.benchmarks.search import percentile
+from backend.benchmarks.workers import free_port, start_server, wait_ready
+
+WORKER_PASSWORD = 'Str0ngPassw0rd!'
+ABILITY = 'legal'
+# a step whose throughput grew by less than this share of its user growth is saturated
+PLATEAU_GROWTH = 0.5
+# ids for cases posted by the n8n and import users, clear of any seeded range
+CREATED_IDS_START = 20_000_000
+
+
+class Recorder:
+    """Request outcomes of the whole run; steps slice them by time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = []
+
+    def record(self, started: float, endpoint: str, ms: float, ok: bool, status: int | None):
+        with self._lock:
+            self.samples.append((started, endpoint, ms, ok, status))
+
+    def window(self, start: float, stop: float) -> list:
+        with self._lock:
+            return [s for s in self.samples if start <= s[0] < stop]
+
+
+class Shared:
+    """State the virtual users share: the case ids to open and the counter for new submissions."""
+
+    def __init__(self, case_ids: list, args):
+        self.case_ids = case_ids
+        self.args = args
+        self.stop = threading.Event()
+        self._lock = threading.Lock()
+        self._next_id = CREATED_IDS_START
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._next_id += 1
+            return self._next_id
+
+
+class VirtualUser:
+    def __init__(self, http: httpx.Client, token: str, recorder: Recorder, shared: Shared, seed: int):
+        self.http = http
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.recorder = recorder
+        self.shared = shared
+        self.rng = random.Random(seed)
+
+    def call(self, endpoint: str, method: str, url: str, **kwargs):
+        started = time.monotonic()
+        t0 = time.perf_counter()
+        try:
+            res = self.http.request(method, url, headers=self.headers, **kwargs)
+            status = res.status_code
+        except httpx.HTTPError:
+            res, status = None, None
+        self.recorder.record(started, endpoint, (time.perf_counter() - t0) * 1000,
+                             status is not None and status < 400, status)
+        return res
+
+    def think(self, mean: float | None = None):
+        self.shared.stop.wait(self.rng.expovariate(1.0 / (mean or self.shared.args.think_time)))
+
+    def case_id(self) -> int:
+        return self.rng.choice(self.shared.case_ids)
+
+
+def case_worker(user: VirtualUser):
+    user.call('GET /cases', 'GET', '/cases')
+    user.think()
+    case_id = user.case_id()
+    user.call('GET /cases/{id}', 'GET', f'/cases/{case_id}')
+    user.call('GET /cases/{id}/comments', 'GET', f'/cases/{case_id}/comments', params={'limit': 50})
+    if user.rng.random() < 0.3:
+        user.think()
+        user.call('POST /cases/{id}/comments', 'POST', f'/cases/{case_id}/comments',
+                  json={'content': f'Followed up on {time.strftime("%H:%M:%S")}'})
+    user.think()
+
+
+def supervisor(user: VirtualUser):
+    user.call('GET /cases/stats', 'GET', '/cases/stats')
+    user.call('GET /cases?status', 'GET', '/cases', params={'status': 'Pending', 'sort': '-submitted_at'})
+    user.think()
+    for _ in range(user.rng.randint(1, 3)):
+        user.call('POST /cases/{id}/assign', 'POST', f'/cases/{user.case_id()}/assign', json={'ability': ABILITY})
+    user.think()
+
+
+def n8n(user: VirtualUser):
+    args = user.shared.args
+    for _ in range(args.burst_size):
+        payload = {'title': 'Kobo Submission', 'description': '', 'raw': kobo_submission(user.shared.next_id())}
+        user.call('POST /cases', 'POST', '/cases', json=payload)
+    user.think(args.burst_interval)
+
+
+def workbook(shared: Shared, rows: int) -> bytes:
+    import openpyxl
+
+    records = [kobo_submission(shared.next_id())['body'] for _ in range(rows)]
+    headers = sorted({key for record in records for key in record})
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(headers)
+    for record in records:
+        ws.append([record.get(key) for key in headers])
+    out = io.BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+def importer(user: VirtualUser):
+    args = user.shared.args
+    content = workbook(user.shared, args.import_rows)
+    files = {'file': ('load.xlsx', content, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')}
+    user.call('POST /import', 'POST', '/import', files=files)
+    user.think(args.import_interval)
+
+
+def run_user(base_url: str, token: str, persona, recorder: Recorder, shared: Shared, seed: int):
+    with httpx.Client(base_url=base_url, timeout=shared.args.timeout) as http:
+        user = VirtualUser(http, token, recorder, shared, seed)
+        # spread the first actions so a new step does not arrive as one burst
+        user.think()
+        while not shared.stop.is_set():
+            persona(user)
+
+
+def login(base_url: str, username: str, password: str) -> str:
+    res = httpx.post(f'{base_url}/auth/login', json={'username': username, 'password': password}, timeout=60)
+    res.raise_for_status()
+    return res.json()['token']
+
+
+def worker_tokens(base_url: str, count: int) -> list[str]:
+    """Tokens for `count` case-worker accounts, registered on first use."""
+    tokens = []
+    for n in range(count):
+        username = f'loadtest_worker_{n}'
+        res = httpx.post(f'{base_url}/auth/register', timeout=60, json={
+            'username': username, 'email': f'{username}@example.com', 'password': WORKER_PASSWORD,
+            'ability': ABILITY})
+        tokens.append(res.json()['token'] if res.status_code == 200 else login(base_url, username, WORKER_PASSWORD))
+    return tokens
+
+
+def summarize(samples: list, seconds: float) -> dict:
+    latencies = [s[2] for s in samples]
+    errors = sum(1 for s in samples if not s[3])
+    statuses = {}
+    for s in samples:
+        if not s[3]:
+            key = str(s[4]) if s[4] is not None else 'connection'
+            statuses[key] = statuses.get(key, 0) + 1
+    return {
+        'requests': len(samples),
+        'rps': round(len(samples) / seconds, 1) if seconds else None,
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'error_statuses': statuses,
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+    }
+
+
+def step_report(users: int, samples: list, seconds: float) -> dict:
+    by_endpoint = {}
+    for s in samples:
+        by_endpoint.setdefault(s[1], []).append(s)
+    return {
+        'users': users,
+        'seconds': round(seconds, 1),
+        'overall': summarize(samples, seconds),
+        'endpoints': {endpoint: summarize(rows, seconds) for endpoint, rows in sorted(by_endpoint.items())},
+    }
+
+
+def verdict(step: dict, previous: dict | None, args) -> str | None:
+    """Why the step is past saturation, or None while it keeps the SLO."""
+    overall = step['overall']
+    if not overall['requests']:
+        return 'no requests completed'
+    if overall['p95_ms'] > args.slo_p95_ms:
+        return f"p95 {overall['p95_ms']}ms above {args.slo_p95_ms}ms"
+    if overall['error_rate'] > args.max_error_rate:
+        return f"error rate {overall['error_rate']:.2%} above {args.max_error_rate:.2%}"
+    user_growth = step['users'] / previous['users'] - 1 if previous is not None else 0
+    if user_growth and overall['rps'] < previous['overall']['rps'] * (1 + PLATEAU_GROWTH * user_growth):
+        return f"throughput plateaued at {overall['rps']} req/s"
+    return None
+
+
+def run(base_url: str, admin_token: str, args) -> dict:
+    recorder = Recorder()
+    # the ids of every case, read once; users open random ones
+    res = httpx.get(f'{base_url}/cases', headers={'Authorization': f'Bearer {admin_token}'}, timeout=600)
+    res.raise_for_status()
+    shared = Shared([case['id'] for case in res.json()], args)
+    if not shared.case_ids:
+        raise RuntimeError('the database has no cases to open')
+    tokens = worker_tokens(base_url, args.worker_accounts)
+
+    threads = []
+
+    def spawn(persona, token):
+        thread = threading.Thread(target=run_user, daemon=True,
+                                  args=(base_url, token, persona, recorder, shared, args.seed + len(threads)))
+        threads.append(thread)
+        thread.start()
+
+    if args.burst_size:
+        spawn(n8n, admin_token)
+    if args.import_rows:
+        spawn(importer, admin_token)
+
+    steps, saturation, humans = [], None, 0
+    try:
+        for users in range(args.start_users, args.max_users + 1, args.step_users):
+            while humans < users:
+                if random.Random(args.seed + humans).random() < args.supervisor_share:
+                    spawn(supervisor, admin_token)
+                else:
+                    spawn(case_worker, tokens[humans % len(tokens)])
+                humans += 1
+            started = time.monotonic()
+            shared.stop.wait(args.step_duration)
+            stopped = time.monotonic()
+            step = step_report(users, recorder.window(started, stopped), stopped - started)
+            reason = verdict(step, steps[-1] if steps else None, args)
+            step['saturated'] = reason
+            steps.append(step)
+            if not args.json:
+                overall = step['overall']
+                print(f"users={users:>4} rps={overall['rps']:>7} p50={overall['p50_ms']}ms p95={overall['p95_ms']}ms "
+                      f"p99={overall['p99_ms']}ms errors={overall['error_rate']:.2%}"
+                      + (f'  SATURATED: {reason}' if reason else ''), flush=True)
+            if reason:
+                saturation = {'users': steps[-2]['users'] if len(steps) > 1 else None, 'reason': reason}
+                break
+    finally:
+        shared.stop.set()
+        for thread in threads:
+            thread.join(timeout=args.timeout + 5)
+    return {'steps': steps, 'saturation': saturation}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test with a realistic user mix, stepped to saturation')
+    parser.add_argument('--base-url', help='Test a running deployment (API root, e.g. http://host:8000/api)')
+    parser.add_argument('--admin-user', default='admin')
+    parser.add_argument('--admin-password', default='admin123')
+    parser.add_argument('--server', choices=('gunicorn', 'uvicorn'), default='gunicorn')
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+    parser.add_argument('--rows', type=int, default=10000, help='Number of cases to seed')
+    parser.add_argument('--database-url', help='Seed this (empty) database instead of a scratch SQLite file')
+    parser.add_argument('--start-users', type=int, default=5, help='Human users in the first step')
+    parser.add_argument('--step-users', type=int, default=5, help='Users added per step')
+    parser.add_argument('--max-users', type=int, default=200, help='Stop stepping here')
+    parser.add_argument('--step-duration', type=float, default=30.0, help='Seconds per step')
+    parser.add_argument('--think-time', type=float, default=2.0, help='Mean seconds between user actions')
+    parser.add_argument('--supervisor-share', type=float, default=0.15, help='Fraction of users that supervise')
+    parser.add_argument('--worker-accounts', type=int, default=10, help='Case-worker accounts the users share')
+    parser.add_argument('--burst-size', type=int, default=20, help='Cases per n8n burst (0: no n8n user)')
+    parser.add_argument('--burst-interval', type=float, default=15.0, help='Mean seconds between n8n bursts')
+    parser.add_argument('--import-rows', type=int, default=50, help='Rows per XLSX import (0: no importer)')
+    parser.add_argument('--import-interval', type=float, default=60.0, help='Mean seconds between imports')
+    parser.add_argument('--slo-p95-ms', type=float, default=1000.0, help='Saturated when overall p95 exceeds this')
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help='Saturated when errors exceed this')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the user mix')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args(argv)
+
+    proc = None
+    if args.base_url:
+        base_url = args.base_url.rstrip('/')
+    else:
+        use_database(args.database_url, 'loadtest.db')
+        from backend import api
+
+        prepare_schema(api.engine)
+        seed_cases(api.engine, 0, args.rows, wrapped_every=4)
+        api.engine.dispose()
+        port = free_port()
+        proc = start_server(args.server, args.workers, port)
+    try:
+        if proc is not None:
+            wait_ready(f'http://127.0.0.1:{port}')
+            base_url = f'http://127.0.0.1:{port}/api'
+        with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+            admin_token = login(base_url, args.admin_user, args.admin_password)
+            result = run(base_url, admin_token, args)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    report = {
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('admin_password', 'output', 'json')},
+        **result,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        saturation = result['saturation']
+        if saturation is None:
+            print(f'Not saturated at {args.max_users} users')
+        else:
+            users = saturation['users'] or f'below {args.start_users}'
+            print(f"Saturation: {users} users ({saturation['reason']})")
+        if result['steps']:
+            print('Endpoints at the last step:')
+            for endpoint, s in result['steps'][-1]['endpoints'].items():
+                print(f"{endpoint:>28}: n={s['requests']:<6} p50={s['p50_ms']}ms p95={s['p95_ms']}ms "
+                      f"p99={s['p99_ms']}ms errors={s['error_rate']:.2%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
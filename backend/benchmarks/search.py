@@ -0,0 +1,92 @@
+"""Latency benchmark for case full-text search.
+
+Seeds synthetic cases into a throwaway SQLite database (FTS5 path) and times
+`backend.search.search_case_ids` for a mix of case-number, Arabic name and prefix queries.
+Reports p50/p95/p99 per query kind and fails when the overall p95 exceeds --target-p95-ms.
+
+Usage:
+  python -m backend.benchmarks.search --rows 100000
+  python -m backend.benchmarks.search --rows 100000 --json
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from backend.benchmarks.common import seed_cases, use_scratch_database
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def query_mix(rows: int, rng: random.Random):
+    yield 'case_number', f'BENCH-{rng.randrange(rows):06d}'
+    yield 'name', f'العلي {rng.randrange(rows)}'
+    yield 'prefix', 'فاط'
+    yield 'name_and_prefix', 'محمد العل'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark case search latency')
+    parser.add_argument('--rows', type=int, default=100000, help='Number of cases to seed')
+    parser.add_argument('--iterations', type=int, default=50, help='Rounds of the query mix to time')
+    parser.add_argument('--limit', type=int, default=20, help='Page size per query')
+    parser.add_argument('--target-p95-ms', type=float, default=100.0, help='Fail when overall p95 exceeds this')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args(argv)
+
+    use_scratch_database('search.db')
+    from backend import api, search
+    from backend.models import Base
+
+    Base.metadata.create_all(bind=api.engine)
+    search.ensure_search_index(api.engine)
+    started = time.perf_counter()
+    seed_cases(api.engine, 0, args.rows)
+    seed_seconds = time.perf_counter() - started
+
+    rng = random.Random(42)
+    timings = {}
+    db = api.SessionLocal()
+    try:
+        for _ in range(args.iterations):
+            for kind, q in query_mix(args.rows, rng):
+                t0 = time.perf_counter()
+                total, hits = search.search_case_ids(db, q, limit=args.limit)
+                timings.setdefault(kind, []).append((time.perf_counter() - t0) * 1000)
+    finally:
+        db.close()
+
+    def summary(samples):
+        return {
+            'p50_ms': round(statistics.median(samples), 2),
+            'p95_ms': round(percentile(samples, 95), 2),
+            'p99_ms': round(percentile(samples, 99), 2),
+        }
+
+    everything = [t for samples in timings.values() for t in samples]
+    result = {
+        'rows': args.rows,
+        'seed_seconds': round(seed_seconds, 1),
+        'overall': summary(everything),
+        'by_kind': {kind: summary(samples) for kind, samples in timings.items()},
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"rows={args.rows} seeded in {result['seed_seconds']}s")
+        for kind, s in [('overall', result['overall'])] + list(result['by_kind'].items()):
+            print(f"{kind:>16}: p50={s['p50_ms']:>7.2f}ms p95={s['p95_ms']:>7.2f}ms p99={s['p99_ms']:>7.2f}ms")
+    if result['overall']['p95_ms'] > args.target_p95_ms:
+        print(f"FAIL: p95 {result['overall']['p95_ms']}ms exceeds {args.target_p95_ms}ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
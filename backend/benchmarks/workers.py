@@ -0,0 +1,150 @@
+"""Throughput benchmark of the HTTP server at different worker counts.
+
+Seeds a throwaway SQLite database, starts the app once per worker count under gunicorn with uvicorn
+workers (`backend/gunicorn.conf.py`, or `uvicorn --workers` with --server uvicorn), and drives it with
+concurrent clients for a fixed duration. The request mix is case list reads plus logins, whose bcrypt
+check is the CPU-bound work a single process serializes. Reports requests/s and p50/p95 latency.
+
+Measured on a 1-CPU container (uvicorn --workers, SQLite, 1000 cases, 16 clients, 15 s each):
+
+  workers=1:  8.4 req/s  p95 2103 ms
+  workers=2:  7.5 req/s  p95 2330 ms
+  workers=4:  7.1 req/s  p95 2993 ms
+
+With one CPU extra workers only add contention; the gain needs as many cores as workers.
+
+Usage:
+  python -m backend.benchmarks.workers --workers 1 2 4
+  python -m backend.benchmarks.workers --workers 1 2 4 --clients 32 --duration 20 --json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+from backend.benchmarks.common import seed_cases, use_scratch_database
+from backend.benchmarks.search import percentile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+GUNICORN_CONF = os.path.join(REPO_ROOT, 'backend', 'gunicorn.conf.py')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(server: str, workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_BIND=f'127.0.0.1:{port}',
+               GUNICORN_ACCESS_LOG='/dev/null', PYTHONPATH=REPO_ROOT)
+    if server == 'gunicorn':
+        cmd = [sys.executable, '-m', 'gunicorn', '-c', GUNICORN_CONF, 'backend.main:app']
+    else:
+        cmd = [sys.executable, '-m', 'uvicorn', 'backend.main:app', '--port', str(port),
+               '--workers', str(workers), '--no-access-log']
+    return subprocess.Popen(cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+
+def wait_ready(base_url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f'{base_url}/api/health', timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'server at {base_url} did not become ready')
+
+
+def drive(base_url: str, clients: int, duration: float, login_every: int) -> dict:
+    token = httpx.post(f'{base_url}/api/auth/login', json={'username': 'admin', 'password': 'admin123'}).json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client_loop():
+        local, failed, n = [], 0, 0
+        with httpx.Client(base_url=base_url, timeout=30) as http:
+            while time.monotonic() < stop_at:
+                n += 1
+                t0 = time.perf_counter()
+                if login_every and n % login_every == 0:
+                    res = http.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+                else:
+                    res = http.get('/api/cases', headers=headers)
+                local.append((time.perf_counter() - t0) * 1000)
+                failed += res.status_code != 200
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark server throughput per worker count')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to compare')
+    parser.add_argument('--server', choices=('gunicorn', 'uvicorn'), default='gunicorn')
+    parser.add_argument('--rows', type=int, default=1000, help='Number of cases to seed (each list read returns all)')
+    parser.add_argument('--clients', type=int, default=16, help='Concurrent client threads')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to drive each configuration')
+    parser.add_argument('--login-every', type=int, default=10, help='Every Nth request is a login (0: none)')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+    args = parser.parse_args(argv)
+
+    use_scratch_database('workers.db')
+    from backend import api
+    from backend.models import Base
+
+    Base.metadata.create_all(bind=api.engine)
+    seed_cases(api.engine, 0, args.rows)
+    api.engine.dispose()
+
+    results = []
+    for workers in args.workers:
+        port = free_port()
+        proc = start_server(args.server, workers, port)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            wait_ready(base_url)
+            results.append({'workers': workers, **drive(base_url, args.clients, args.duration, args.login_every)})
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    if args.json:
+        print(json.dumps({'server': args.server, 'rows': args.rows, 'clients': args.clients, 'results': results},
+                         indent=2))
+    else:
+        print(f'server={args.server} rows={args.rows} clients={args.clients} duration={args.duration}s')
+        for r in results:
+            print(f"workers={r['workers']:>2}: {r['rps']:>8.1f} req/s  p50={r['p50_ms']}ms  p95={r['p95_ms']}ms"
+                  f"  errors={r['errors']}")
+    return 1 if any(r['errors'] for r in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
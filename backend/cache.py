@@ -0,0 +1,181 @@
+"""Small in-process caches for expensive, read-mostly API responses.
+
+Entries expire after a TTL and can be invalidated explicitly (see `backend/indexing.py`, which clears
+caches when a transaction that wrote the underlying rows commits). Each worker process keeps its own
+entries; invalidations are shared between workers through a pluggable version store selected with
+`CACHE_BACKEND`:
+
+- `local` (default): versions live in this process only, so other workers rely on the TTL.
+- `database`: versions live in the `cache_versions` table. A cache compares its namespace version at
+  most every `CACHE_VERSION_CHECK_INTERVAL` seconds and drops its entries when another worker bumped it.
+"""
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from backend.models import CacheVersion
+
+CACHE_VERSION_CHECK_INTERVAL = float(os.getenv('CACHE_VERSION_CHECK_INTERVAL', '1'))
+
+
+class LocalVersionStore:
+    """Namespace versions kept in this process."""
+    check_interval = 0.0
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def bump(self, namespace: str) -> int:
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+
+class DatabaseVersionStore:
+    """Namespace versions in the `cache_versions` table, shared by every worker using the database."""
+
+    def __init__(self, engine, check_interval: float = CACHE_VERSION_CHECK_INTERVAL):
+        self.engine = engine
+        self.check_interval = check_interval
+        self._table = CacheVersion.__table__
+
+    def get(self, namespace: str) -> int:
+        with self.engine.connect() as conn:
+            version = conn.execute(select(self._table.c.version).where(self._table.c.name == namespace)).scalar()
+        return version or 0
+
+    def bump(self, namespace: str) -> int:
+        t = self._table
+        for _ in range(2):
+            try:
+                with self.engine.begin() as conn:
+                    updated = conn.execute(update(t).where(t.c.name == namespace).values(version=t.c.version + 1))
+                    if not updated.rowcount:
+                        conn.execute(t.insert().values(name=namespace, version=1))
+                return self.get(namespace)
+            except IntegrityError:
+                # another worker inserted the namespace row first; retry as an UPDATE
+                continue
+        return self.get(namespace)
+
+
+_version_store = LocalVersionStore()
+
+
+def configure(backend: str = 'local', engine=None):
+    """Select the version store used by namespaced caches (`local` or `database`)."""
+    global _version_store
+    if backend == 'database':
+        if engine is None:
+            raise ValueError('CACHE_BACKEND=database requires an engine')
+        _version_store = DatabaseVersionStore(engine)
+    elif backend == 'local':
+        _version_store = LocalVersionStore()
+    else:
+        raise ValueError(f'Unknown CACHE_BACKEND {backend!r}; use local or database')
+    return _version_store
+
+
+def version_store():
+    return _version_store
+
+
+class TTLCache:
+    """Thread-safe key/value cache with per-entry expiry and a version counter.
+
+    `get_or_compute` only stores a freshly computed value if no invalidation happened while it was being
+    computed, so a slow query that started before a write can never repopulate the cache with stale data.
+    With a `namespace`, invalidations go through the version store so caches in other workers drop
+    their entries as well.
+    """
+
+    def __init__(self, ttl: float, maxsize: int = 128, namespace: str | None = None, store=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.namespace = namespace
+        self._store = store
+        self._data = {}
+        self._version = 0
+        self._seen_shared = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        return self._store or _version_store
+
+    def _sync_shared_version(self):
+        if self.namespace is None:
+            return
+        store = self.store
+        now = time.monotonic()
+        if self._seen_shared is not None and now - self._checked_at < store.check_interval:
+            return
+        try:
+            shared = store.get(self.namespace)
+        except Exception as e:
+            logging.warning('Cache version check for %s failed: %s', self.namespace, e)
+            return
+        with self._lock:
+            self._checked_at = now
+            if shared != self._seen_shared:
+                # also on the first check: entries stored before it have no known version
+                self._version += 1
+                self._data.clear()
+                self._seen_shared = shared
+
+    def get(self, key, default=None):
+        self._sync_shared_version()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value, version: int | None = None) -> bool:
+        if self.ttl <= 0:
+            return False
+        with self._lock:
+            if version is not None and version != self._version:
+                return False
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            return True
+
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        version = self._version
+        value = compute()
+        self.set(key, value, version=version)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._data.clear()
+        if self.namespace is None:
+            return
+        try:
+            shared = self.store.bump(self.namespace)
+        except Exception as e:
+            logging.warning('Could not publish cache invalidation for %s: %s', self.namespace, e)
+            return
+        with self._lock:
+            self._seen_shared = shared
+            self._checked_at = time.monotonic()
@@ -0,0 +1,179 @@
+"""Bulk case operations (`POST /cases/batch`) applied in one transaction.
+
+Operations are validated one by one in request order against the current state of the cases
+(loaded with a single query), then the accepted ones are written with set-based statements:
+one `UPDATE ... WHERE id IN (...)` per distinct status or assignee, one executemany INSERT for the
+audit comments (plus one executemany UPDATE of the commented cases' search documents and comment
+counts), and `deletion.delete_cases` for deleted cases. A rejected operation does not stop the
+others; every operation gets its own outcome.
+
+These statements bypass the ORM flush hooks in `backend/indexing.py`, so the search documents and
+comment counts of commented cases are refreshed here. Cache invalidation still happens: the hooks track bulk
+UPDATE/DELETE statements on cases.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import bindparam, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from backend import assignment, deletion, search
+from backend.models import Case, Comment, User
+
+OPERATIONS = ('status', 'assign', 'delete')
+RESOLVED_STATUSES = assignment.RESOLVED_STATUSES
+CASE_BATCH_MAX = 500
+RESOLVE_COMMENT_REQUIRED = 'Resolve comment is required when changing status to a resolved state'
+
+
+class _Outcome(dict):
+    def fail(self, status_code: int, detail: str):
+        self.update(ok=False, status_code=status_code, detail=detail)
+        return self
+
+
+def _resolve_named_users(db: Session, operations) -> dict:
+    """`{('id', id) | ('name', name): (user_id, name)}` for every user referenced by id or name, in one query."""
+    ids = {op.user_id for op in operations if op.op == 'assign' and op.user_id is not None}
+    names = {op.user for op in operations if op.op == 'assign' and op.user_id is None and op.user}
+    if not ids and not names:
+        return {}
+    found = {}
+    rows = db.execute(
+        select(User.id, User.name).where(or_(User.id.in_(ids), User.name.in_(names))).order_by(User.id)
+    ).all()
+    for user_id, name in rows:
+        if user_id in ids:
+            found[('id', user_id)] = (user_id, name)
+        if name in names:
+            found.setdefault(('name', name), (user_id, name))
+    return found
+
+
+def apply_case_batch(db: Session, operations, user_id=None, can_delete: bool = False) -> list[dict]:
+    """Validate and apply `operations` (see `schemas.CaseBatchOperation`); returns one outcome per operation.
+
+    The caller commits. Nothing is written when every operation was rejected.
+    """
+    outcomes = [_Outcome(index=i, op=op.op, case_id=op.case_id, ok=True, status_code=200, detail=None,
+                         assigned_to_id=None) for i, op in enumerate(operations)]
+    case_ids = {op.case_id for op in operations}
+    state = {case_id: {'status': status, 'search_text': search_text} for case_id, status, search_text in db.execute(
+        select(Case.id, Case.status, Case.search_text).where(Case.id.in_(case_ids))
+    )}
+    users = _resolve_named_users(db, operations)
+    assigners = {}
+    now = datetime.utcnow()
+
+    new_status = {}
+    resolved = set()
+    new_assignee = {}
+    deleted = set()
+    comments = []
+
+    for op, outcome in zip(operations, outcomes):
+        if op.case_id not in state:
+            outcome.fail(404, 'Case not found')
+            continue
+        if op.case_id in deleted:
+            outcome.fail(409, 'Case is deleted by an earlier operation in this batch')
+            continue
+        current = state[op.case_id]
+        if op.op == 'status':
+            if not op.status:
+                outcome.fail(400, 'status is required')
+                continue
+            if op.status in RESOLVED_STATUSES and op.status != (current['status'] or ''):
+                if not op.resolve_comment or not op.resolve_comment.strip():
+                    outcome.fail(400, RESOLVE_COMMENT_REQUIRED)
+                    continue
+                comments.append((op.case_id, op.resolve_comment))
+            current['status'] = op.status
+            new_status[op.case_id] = op.status
+            if op.status in RESOLVED_STATUSES:
+                resolved.add(op.case_id)
+            else:
+                resolved.discard(op.case_id)
+        elif op.op == 'assign':
+            if op.user_id is not None:
+                if ('id', op.user_id) not in users:
+                    outcome.fail(404, 'User not found')
+                    continue
+                assignee = users[('id', op.user_id)]
+            elif op.user:
+                if ('name', op.user) not in users:
+                    # same as assign_case: unknown assignees are created on the fly
+                    created = User(name=op.user, ability=op.ability)
+                    db.add(created)
+                    db.flush()
+                    users[('name', op.user)] = (created.id, created.name)
+                assignee = users[('name', op.user)]
+            elif op.ability:
+                if op.ability not in assigners:
+                    try:
+                        assigners[op.ability] = assignment.Assigner(db, op.ability, op.strategy)
+                    except ValueError as e:
+                        outcome.fail(400, str(e))
+                        continue
+                assigner = assigners[op.ability]
+                picked = assigner.pick()
+                if picked is None:
+                    outcome.fail(404, f'No users with ability {op.ability!r}')
+                    continue
+                assignee = (picked, assigner.names[picked])
+            else:
+                assignee = (None, None)
+            new_assignee[op.case_id] = assignee[0]
+            outcome['assigned_to_id'] = assignee[0]
+            comments.append((op.case_id, assignment.assignment_comment(assignee[1])))
+        elif op.op == 'delete':
+            if not can_delete:
+                outcome.fail(403, 'Insufficient permissions to delete case')
+                continue
+            deleted.add(op.case_id)
+        else:
+            outcome.fail(400, f'Unknown operation {op.op!r}; use one of {", ".join(OPERATIONS)}')
+
+    for assigner in assigners.values():
+        assigner.save()
+
+    by_status = defaultdict(list)
+    for case_id, status in new_status.items():
+        if case_id not in deleted:
+            by_status[(status, case_id in resolved)].append(case_id)
+    for (status, is_resolved), ids in by_status.items():
+        values = {'status': status, 'updated_at': now}
+        if is_resolved:
+            values['completed_at'] = now
+        db.execute(update(Case).where(Case.id.in_(ids)).values(**values).execution_options(synchronize_session=False))
+
+    by_assignee = defaultdict(list)
+    for case_id, assignee_id in new_assignee.items():
+        if case_id not in deleted:
+            by_assignee[assignee_id].append(case_id)
+    for assignee_id, ids in by_assignee.items():
+        db.execute(
+            update(Case).where(Case.id.in_(ids)).values(assigned_to_id=assignee_id, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    comments = [(case_id, content) for case_id, content in comments if case_id not in deleted]
+    if comments:
+        db.execute(insert(Comment), [{'case_id': case_id, 'user_id': user_id, 'content': content, 'created_at': now}
+                                     for case_id, content in comments])
+        documents = {}
+        added = defaultdict(int)
+        for case_id, content in comments:
+            previous = documents.get(case_id, state[case_id]['search_text'])
+            documents[case_id] = search.with_comment_text(previous, content)
+            added[case_id] += 1
+        cases = Case.__table__
+        db.execute(
+            update(cases).where(cases.c.id == bindparam('b_id'))
+            .values(search_text=bindparam('b_text'), comment_count=cases.c.comment_count + bindparam('b_added')),
+            [{'b_id': case_id, 'b_text': text, 'b_added': added[case_id]} for case_id, text in documents.items()],
+        )
+
+    if deleted:
+        deletion.delete_cases(db, deleted)
+    return outcomes
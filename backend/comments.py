@@ -0,0 +1,90 @@
+"""Comment listing with keyset pagination, and the denormalized `Case.comment_count`.
+
+Comments of a case are listed oldest first, ordered by `(created_at, id)`, which is served by
+`ix_comments_case_id_created_at`. A page ends with an opaque cursor for that position: pass it back
+as `cursor` to get the next page. `after=<comment id>` returns everything newer than a comment
+the client already has, for incremental polling.
+
+`Case.comment_count` lets list views show activity without joining comments. The `before_flush`
+hook in `backend/indexing.py` keeps it in sync for comments added or deleted through the ORM.
+Bulk comment INSERTs bump it themselves (see `backend/case_batch.py` and `backend/assignment.py`).
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import and_, inspect, or_
+from sqlalchemy.orm import Session, joinedload
+
+from backend.models import Case, Comment
+
+COMMENTS_PAGE_MAX = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(comment: Comment) -> str:
+    created = comment.created_at.isoformat() if comment.created_at else ''
+    return base64.urlsafe_b64encode(f'{created}|{comment.id}'.encode()).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """`(created_at, id)` of the position encoded by `encode_cursor`."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created, comment_id = raw.rsplit('|', 1)
+        return (datetime.fromisoformat(created) if created else None), int(comment_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def _after_position(created_at, comment_id):
+    if created_at is None:
+        return Comment.id > comment_id
+    return or_(Comment.created_at > created_at, and_(Comment.created_at == created_at, Comment.id > comment_id))
+
+
+def list_comments(db: Session, case_id: int, limit: int | None = None, cursor: str | None = None,
+                  after: int | None = None) -> tuple[list, str | None]:
+    """One page of comments with their authors loaded, and the cursor of the next page (None on the last)."""
+    query = (
+        db.query(Comment).options(joinedload(Comment.user))
+        .filter(Comment.case_id == case_id)
+        .order_by(Comment.created_at, Comment.id)
+    )
+    if cursor:
+        query = query.filter(_after_position(*decode_cursor(cursor)))
+    elif after is not None:
+        anchor = db.query(Comment.created_at, Comment.id).filter(Comment.id == after).first()
+        # a deleted anchor still orders correctly by id, ids grow with created_at
+        query = query.filter(_after_position(*anchor) if anchor else Comment.id > after)
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def sync_comment_counts(session: Session):
+    """Adjust `comment_count` of cases gaining or losing comments in this flush. Called from `before_flush`."""
+    deltas = {}
+    for obj in session.new:
+        if isinstance(obj, Comment):
+            case = obj.case if obj.case is not None else (session.get(Case, obj.case_id) if obj.case_id else None)
+            if case is not None:
+                deltas[case] = deltas.get(case, 0) + 1
+    for obj in session.deleted:
+        if isinstance(obj, Comment) and obj.case_id is not None:
+            case = session.get(Case, obj.case_id)
+            if case is not None and case not in session.deleted:
+                deltas[case] = deltas.get(case, 0) - 1
+    for case, delta in deltas.items():
+        if case in session.new or inspect(case).transient:
+            case.comment_count = (case.comment_count or 0) + delta
+        else:
+            # an SQL expression, so concurrent comments on the same case do not overwrite each other
+            case.comment_count = Case.comment_count + delta
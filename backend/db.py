@@ -0,0 +1,103 @@
+"""Database engines and session factories, created on first use rather than at import.
+
+A `Database` owns one engine and a `SessionLocal` sessionmaker that creates the engine the first
+time a session is opened. Apps built by `backend.main.create_app` get their own `Database`, opened
+and disposed by the app's lifespan. The module-level default (built from `Settings.from_env()`, so
+with the DB_POOL_* options) serves the app built without settings, `backend.api.app`, scripts and
+tests: importing the API does not load the DB driver or connect, and `get_engine()` / `SessionLocal`
+/ `backend.api.engine` resolve to it.
+"""
+import logging
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import cache
+from backend.settings import Settings
+
+
+def _create_engine(url: str, **options):
+    try:
+        # Provide an explicit, more helpful error if the DB driver is missing
+        if url.startswith('postgresql'):
+            try:
+                import psycopg2  # noqa: F401
+            except ModuleNotFoundError:
+                logging.error('psycopg2 driver not found in Python environment. '
+                              'Install via: pip install psycopg2-binary')
+                raise RuntimeError('psycopg2 driver not found; please install psycopg2-binary '
+                                   'or set DATABASE_URL to use sqlite for local testing')
+        return create_engine(url, **options)
+    except Exception as e:
+        logging.exception('Failed to create database engine: %s', e)
+        # Re-raise so startup fails explicitly with a clearer message
+        raise
+
+
+class _LazySessionMaker(sessionmaker):
+    def __init__(self, database: 'Database', **kw):
+        super().__init__(**kw)
+        self._database = database
+
+    def __call__(self, **local_kw):
+        if self._database._engine is None and 'bind' not in local_kw:
+            self._database.get_engine()
+        return super().__call__(**local_kw)
+
+
+class Database:
+    def __init__(self, url: str, cache_backend: str | None = None, **engine_options):
+        self.url = url
+        # when set, the process-wide cache version store (backend/cache.py) is pointed at this engine
+        self.cache_backend = cache_backend
+        self.engine_options = engine_options
+        self._engine = None
+        self._lock = threading.Lock()
+        self.SessionLocal = _LazySessionMaker(self, autocommit=False, autoflush=False)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> 'Database':
+        return cls(settings.database_url, cache_backend=settings.cache_backend, **settings.engine_options())
+
+    def get_engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    engine = _create_engine(self.url, **self.engine_options)
+                    self.SessionLocal.configure(bind=engine)
+                    if self.cache_backend:
+                        # `database` shares cache invalidations between workers through the cache_versions table
+                        cache.configure(self.cache_backend, engine)
+                    self._engine = engine
+        return self._engine
+
+    def warm(self, connections: int) -> int:
+        """Open `connections` pooled connections and return them to the pool; returns how many were opened."""
+        engine = self.get_engine()
+        opened = []
+        try:
+            for _ in range(max(0, connections)):
+                opened.append(engine.connect())
+        finally:
+            for conn in opened:
+                conn.close()
+        return len(opened)
+
+    def dispose(self, close: bool = True):
+        """Drop pooled connections, if the engine exists (app shutdown, before/after forking workers)."""
+        if self._engine is not None:
+            self._engine.dispose(close=close)
+
+
+default = Database.from_settings(Settings.from_env())
+DATABASE_URL = default.url
+SessionLocal = default.SessionLocal
+
+
+def get_engine():
+    return default.get_engine()
+
+
+def dispose_engine(close: bool = True):
+    default.dispose(close=close)
@@ -0,0 +1,54 @@
+"""Set-based deletion of cases and users.
+
+Postgres enforces the ON DELETE rules added by migrations 015 and 018: comments, name trigrams and
+family members go with their case, import rows and assignments referencing a deleted row are nulled.
+SQLite only enforces foreign keys with `PRAGMA foreign_keys=ON`, so these helpers still clear dependents
+explicitly. Every helper
+issues a fixed number of statements, however many rows are affected, and never loads the ORM
+collections of the deleted rows. The statements are ORM-enabled bulk UPDATE/DELETEs, so the hooks in
+`backend/indexing.py` still invalidate the caches that depend on cases and users.
+"""
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from backend.models import Case, CaseNameTrigram, Comment, FamilyMember, ImportJob, ImportRow, User
+
+_BULK = {'synchronize_session': False}
+
+
+def delete_cases(db: Session, case_ids) -> dict:
+    """Delete cases with their comments, name postings and family members, and detach their import rows.
+    The caller commits."""
+    case_ids = list(case_ids)
+    if not case_ids:
+        return {'deleted_cases': 0, 'deleted_comments': 0, 'updated_import_rows': 0}
+    deleted_comments = db.execute(
+        delete(Comment).where(Comment.case_id.in_(case_ids)).execution_options(**_BULK)
+    ).rowcount
+    updated_import_rows = db.execute(
+        update(ImportRow).where(ImportRow.case_id.in_(case_ids)).values(case_id=None).execution_options(**_BULK)
+    ).rowcount
+    db.execute(delete(CaseNameTrigram).where(CaseNameTrigram.case_id.in_(case_ids)).execution_options(**_BULK))
+    db.execute(delete(FamilyMember).where(FamilyMember.case_id.in_(case_ids)).execution_options(**_BULK))
+    deleted_cases = db.execute(delete(Case).where(Case.id.in_(case_ids)).execution_options(**_BULK)).rowcount
+    return {'deleted_cases': deleted_cases, 'deleted_comments': deleted_comments,
+            'updated_import_rows': updated_import_rows}
+
+
+def delete_user(db: Session, user_id: int, reassign_to: int | None = None) -> dict:
+    """Delete a user, handing their cases to `reassign_to` (or unassigning them) in one UPDATE.
+
+    Comments and import jobs keep their content but lose the reference, like ON DELETE SET NULL.
+    The caller checks that both users exist and commits.
+    """
+    reassigned = db.execute(
+        update(Case).where(Case.assigned_to_id == user_id).values(assigned_to_id=reassign_to)
+        .execution_options(**_BULK)
+    ).rowcount
+    db.execute(update(Comment).where(Comment.user_id == user_id).values(user_id=None).execution_options(**_BULK))
+    db.execute(
+        update(ImportJob).where(ImportJob.uploader_id == user_id).values(uploader_id=None).execution_options(**_BULK)
+    )
+    deleted = db.execute(delete(User).where(User.id == user_id).execution_options(**_BULK)).rowcount
+    key = 'reassigned_cases' if reassign_to is not None else 'unassigned_cases'
+    return {'deleted_users': deleted, key: reassigned}
@@ -0,0 +1,52 @@
+"""Cached user directory and ability list.
+
+`GET /users` and `GET /abilities` fill the assignment dropdowns on every page load, and `assign_case`
+resolves users by name or ability on every assignment. All of them read from one cached snapshot of
+the users table. The snapshot is dropped whenever a transaction that wrote users commits (see
+`backend/indexing.py`), so create/update/delete, registration and assignment auto-creation never
+serve stale entries; with `CACHE_BACKEND=database` the invalidation reaches every worker.
+"""
+import os
+
+from sqlalchemy.orm import Session
+
+from backend.cache import TTLCache
+from backend.models import User
+from backend.schemas import UserRead
+
+users_cache = TTLCache(ttl=float(os.getenv('USER_DIRECTORY_CACHE_TTL', '300')), maxsize=2, namespace='users')
+
+
+def _load_users(db: Session) -> list[UserRead]:
+    users = []
+    for u in db.query(User).order_by(User.id).all():
+        user = UserRead.model_validate(u, from_attributes=True)
+        # Normalize empty email strings to None to avoid Pydantic EmailStr validation errors
+        if isinstance(user.email, str) and user.email.strip() == '':
+            user.email = None
+        users.append(user)
+    return users
+
+
+def list_users(db: Session) -> list[UserRead]:
+    return users_cache.get_or_compute('users', lambda: _load_users(db))
+
+
+def list_abilities(db: Session) -> list[str]:
+    def compute():
+        seen = {}
+        for user in list_users(db):
+            if user.ability:
+                seen.setdefault(user.ability, None)
+        return list(seen)
+    return users_cache.get_or_compute('abilities', compute)
+
+
+def find_user_id(db: Session, name: str | None = None, ability: str | None = None) -> int | None:
+    """Id of the first user (lowest id) with the given name, or else with the given ability."""
+    for user in list_users(db):
+        if name is not None and user.name == name:
+            return user.id
+        if name is None and ability is not None and user.ability == ability:
+            return user.id
+    return None
@@ -17,5 +17,9 @@ else
   echo "[entrypoint] RUN_MIGRATIONS not enabled; skipping migrations"
 fi
 
-# Start the application
+# Start the application: a single uvicorn process (default) or gunicorn managing uvicorn workers
+if [ "${SERVER_MODE:-uvicorn}" = "gunicorn" ]; then
+  echo "[entrypoint] Starting gunicorn (WEB_CONCURRENCY=${WEB_CONCURRENCY:-one per CPU})"
+  exec gunicorn -c /app/backend/gunicorn.conf.py backend.main:app
+fi
 exec uvicorn backend.main:app --host 0.0.0.0 --port 8000
@@ -0,0 +1,147 @@
+"""Streaming serializers for the case export endpoint (`GET /cases/export`).
+
+The API layer reads cases from a server-side cursor, applies the same redaction and
+raw flattening as `GET /cases`, and feeds plain dict records into the generators below.
+Each generator yields chunks as rows arrive so memory stays flat regardless of table size.
+"""
+import csv
+import io
+import json
+import re
+import tempfile
+from datetime import datetime
+
+# Case columns always available in exports (in output order)
+EXPORT_CASE_FIELDS = ['id', 'title', 'description', 'status', 'assigned_to', 'created_at', 'updated_at', 'completed_at']
+EXPORT_FORMATS = ('ndjson', 'csv', 'xlsx')
+# Wrapper/backup keys are already merged into the flattened raw and would only duplicate columns
+EXPORT_SKIP_RAW_KEYS = {'body', '_body_backup'}
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def case_record(case, raw) -> dict:
+    """Build the export record for a case; `raw` must already be redacted and flattened."""
+    return {
+        'id': case.id,
+        'title': case.title,
+        'description': case.description,
+        'status': case.status,
+        'assigned_to': case.assigned_to.name if case.assigned_to else None,
+        'created_at': _iso(case.created_at),
+        'updated_at': _iso(case.updated_at),
+        'completed_at': _iso(case.completed_at),
+        'raw': raw if isinstance(raw, dict) else None,
+    }
+
+
+def raw_column_name(key: str) -> str:
+    """Column name for a raw key; prefixed with `raw.` only when it would shadow a case column."""
+    return f'raw.{key}' if key in EXPORT_CASE_FIELDS else key
+
+
+def default_columns(raw_keys, case_fields_first: bool = True) -> list:
+    """Case fields plus flattened raw keys. XLSX exports put raw keys first so sheets mirror the Kobo export layout."""
+    raw_columns = [raw_column_name(k) for k in raw_keys if k not in EXPORT_SKIP_RAW_KEYS]
+    if case_fields_first:
+        return EXPORT_CASE_FIELDS + raw_columns
+    return raw_columns + EXPORT_CASE_FIELDS
+
+
+def parse_columns(columns: str | None) -> list | None:
+    """Parse a comma separated `columns` query value; returns None when no selection was given."""
+    if not columns:
+        return None
+    parsed = [c.strip() for c in columns.split(',') if c.strip()]
+    return parsed or None
+
+
+def column_value(record: dict, column: str):
+    if column in EXPORT_CASE_FIELDS:
+        return record.get(column)
+    key = column[4:] if column.startswith('raw.') else column
+    raw = record.get('raw') or {}
+    return raw.get(key)
+
+
+def cell_value(value):
+    """Render a value for a flat (CSV/XLSX) cell: nested structures such as rosters become JSON text."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    return value
+
+
+def iter_ndjson(records, columns=None, chunk_size=500):
+    """Yield newline-delimited JSON, one case per line, in chunks of `chunk_size` lines."""
+    lines = []
+    for rec in records:
+        if columns:
+            rec = {c: column_value(rec, c) for c in columns}
+        lines.append(json.dumps(rec, ensure_ascii=False, default=str))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def iter_csv(records, columns, chunk_size=500):
+    """Yield CSV text with a header row. A UTF-8 BOM is emitted first so Excel opens Arabic text correctly."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    out.write('\ufeff')
+    writer.writerow(columns)
+    pending = 0
+    for rec in records:
+        writer.writerow([cell_value(column_value(rec, c)) for c in columns])
+        pending += 1
+        if pending >= chunk_size:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate(0)
+            pending = 0
+    remaining = out.getvalue()
+    if remaining:
+        yield remaining
+
+
+# Excel limits: control characters are rejected by openpyxl and cells hold at most 32767 characters
+_XLSX_ILLEGAL_CHARS_RE = re.compile(r'[\000-\010]|[\013-\014]|[\016-\037]')
+_XLSX_MAX_CELL_CHARS = 32767
+
+
+def xlsx_cell_value(value):
+    value = cell_value(value)
+    if isinstance(value, str):
+        value = _XLSX_ILLEGAL_CHARS_RE.sub('', value)[:_XLSX_MAX_CELL_CHARS]
+    return value
+
+
+def iter_xlsx(records, columns, sheet_title='Cases', chunk_size=64 * 1024):
+    """Yield an XLSX workbook built with openpyxl's write-only mode.
+
+    Write-only worksheets serialize each appended row to a temporary file with inline strings,
+    so memory does not grow with the row count. The zip container can only be finalized once
+    every row is written, after which the file is streamed back in `chunk_size` byte chunks.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title)
+    ws.append(columns)
+    for rec in records:
+        ws.append([xlsx_cell_value(column_value(rec, c)) for c in columns])
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while True:
+            chunk = tmp.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,70 @@
+"""Gunicorn settings for `SERVER_MODE=gunicorn` (see entrypoint.sh): several uvicorn workers under one master.
+
+    gunicorn -c backend/gunicorn.conf.py backend.main:app
+
+Environment:
+  WEB_CONCURRENCY          worker processes (default: one per CPU, at most GUNICORN_MAX_WORKERS=8)
+  GUNICORN_BIND            listen address (default 0.0.0.0:8000)
+  GUNICORN_MAX_REQUESTS    recycle a worker after this many requests, 0 disables (default 2000)
+  GUNICORN_MAX_REQUESTS_JITTER  random extra requests so workers do not recycle together (default 200)
+  GUNICORN_TIMEOUT         seconds a silent worker is given before it is killed (default 60)
+  GUNICORN_GRACEFUL_TIMEOUT  seconds workers get to finish requests on reload/stop (default 30)
+  GUNICORN_PRELOAD         import the app in the master and fork it (less memory, no per-worker
+                           code reload on HUP), default off
+
+With more than one worker, set CACHE_BACKEND=database (as docker-compose.yml does): with the `local`
+backend a write only invalidates the caches of the worker that handled it, and the other workers
+serve stale users and stats until their TTLs expire.
+
+`kill -HUP <master>` reloads gracefully: new workers start, old ones finish in-flight requests.
+Startup tasks (backend/startup.py) run once in the master, not in every worker.
+"""
+import logging
+import multiprocessing
+import os
+
+
+def _int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def default_workers() -> int:
+    return max(1, min(multiprocessing.cpu_count(), _int('GUNICORN_MAX_WORKERS', 8)))
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = _int('WEB_CONCURRENCY', 0) or default_workers()
+worker_class = 'uvicorn.workers.UvicornWorker'
+max_requests = _int('GUNICORN_MAX_REQUESTS', 2000)
+max_requests_jitter = _int('GUNICORN_MAX_REQUESTS_JITTER', 200)
+timeout = _int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _int('GUNICORN_KEEPALIVE', 5)
+preload_app = os.getenv('GUNICORN_PRELOAD', '').strip().lower() in ('1', 'true', 'yes')
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+def on_starting(server):
+    """Run the startup tasks once, in the master, before any worker exists."""
+    # not backend.api: modules imported here are inherited by every worker, also the ones forked on HUP
+    from backend import db, startup
+    from backend.passwords import hash_password
+
+    if workers > 1 and os.getenv('CACHE_BACKEND', 'local') == 'local':
+        logging.warning('[gunicorn] %d workers with CACHE_BACKEND=local: cache invalidations stay in the '
+                        'worker that made the write; set CACHE_BACKEND=database', workers)
+    if not startup.startup_tasks_done():
+        startup.run_startup_tasks(db.get_engine(), db.SessionLocal, hash_password)
+        startup.mark_startup_tasks_done()
+    # no pooled connections may cross the fork
+    db.dispose_engine()
+
+
+def post_fork(server, worker):
+    from backend import db
+
+    # the engine may exist in the master; start with an empty pool of this worker's own connections
+    db.dispose_engine(close=False)
@@ -0,0 +1,102 @@
+"""Liveness and readiness probes.
+
+`GET /health/live` only proves the process serves requests. `GET /health/ready` answers 503 unless:
+
+- database: `SELECT 1` succeeds;
+- pool: fewer than `HEALTH_POOL_SATURATION` (default 0.9) of the pool's connections (size plus
+  overflow) are checked out;
+- migrations: the database is at the migration head shipped with the code. Databases created
+  without Alembic (local SQLite) are reported as `unmanaged` and pass;
+- import_queue: at most `HEALTH_MAX_PENDING_IMPORT_ROWS` import rows are still pending (0, the
+  default, only reports the depth).
+
+A readiness report is cached for `HEALTH_CACHE_TTL` seconds (default 5) per engine, so frequent
+probes from Docker, the load balancer and `scripts/healthcheck.sh` cost at most one round of
+queries per TTL and worker.
+"""
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import func, text
+
+from backend import startup
+from backend.cache import TTLCache
+from backend.models import ImportRow
+
+HEALTH_CACHE_TTL = float(os.getenv('HEALTH_CACHE_TTL', '5'))
+HEALTH_POOL_SATURATION = float(os.getenv('HEALTH_POOL_SATURATION', '0.9'))
+HEALTH_MAX_PENDING_IMPORT_ROWS = int(os.getenv('HEALTH_MAX_PENDING_IMPORT_ROWS', '0'))
+
+readiness_cache = TTLCache(ttl=HEALTH_CACHE_TTL, maxsize=8)
+
+
+def check_database(engine) -> dict:
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 2)}
+
+
+def check_pool(engine) -> dict:
+    pool = engine.pool
+    result = {'ok': True, 'type': type(pool).__name__}
+    # only QueuePool-like pools have a bounded size worth reporting
+    if not all(hasattr(pool, attr) for attr in ('size', 'checkedout', 'overflow')):
+        return result
+    capacity = pool.size() + max(0, getattr(pool, '_max_overflow', 0))
+    checked_out = pool.checkedout()
+    saturation = checked_out / capacity if capacity > 0 else 0.0
+    result.update({'size': pool.size(), 'checked_out': checked_out, 'overflow': pool.overflow(),
+                   'saturation': round(saturation, 3), 'ok': saturation < HEALTH_POOL_SATURATION})
+    return result
+
+
+def check_migrations(engine) -> dict:
+    heads = sorted(startup.script_heads())
+    current = sorted(startup.database_revisions(engine))
+    if not current:
+        return {'ok': True, 'state': 'unmanaged', 'head': heads}
+    return {'ok': current == heads, 'state': 'current' if current == heads else 'behind',
+            'current': current, 'head': heads}
+
+
+def check_import_queue(session_factory) -> dict:
+    db = session_factory()
+    try:
+        pending, oldest = (
+            db.query(func.count(ImportRow.id), func.min(ImportRow.created_at))
+            .filter(ImportRow.status == 'pending').one()
+        )
+    finally:
+        db.close()
+    result = {'ok': True, 'pending_rows': pending}
+    if oldest is not None:
+        result['oldest_pending_seconds'] = round((datetime.utcnow() - oldest).total_seconds())
+    if HEALTH_MAX_PENDING_IMPORT_ROWS:
+        result['ok'] = pending <= HEALTH_MAX_PENDING_IMPORT_ROWS
+    return result
+
+
+def _run(name, check, *args) -> dict:
+    try:
+        return check(*args)
+    except Exception as e:
+        logging.warning('Readiness check %s failed: %s', name, e)
+        return {'ok': False, 'error': type(e).__name__}
+
+
+def readiness_report(engine, session_factory) -> dict:
+    checks = {'database': _run('database', check_database, engine)}
+    if checks['database']['ok']:
+        checks['pool'] = _run('pool', check_pool, engine)
+        checks['migrations'] = _run('migrations', check_migrations, engine)
+        checks['import_queue'] = _run('import_queue', check_import_queue, session_factory)
+    ready = all(c['ok'] for c in checks.values())
+    return {'status': 'ok' if ready else 'unavailable', 'checked_at': datetime.utcnow().isoformat() + 'Z',
+            'checks': checks}
+
+
+def readiness(engine, session_factory) -> dict:
+    return readiness_cache.get_or_compute(id(engine), lambda: readiness_report(engine, session_factory))
@@ -0,0 +1,129 @@
+"""Storage and retention of `ImportRow` payloads.
+
+Every imported row is also stored in full on the case it created, so the copy kept on the import row
+only matters for failed/skipped rows (retry, troubleshooting). `IMPORT_ROW_PAYLOAD_STORAGE` selects
+how that copy is kept:
+
+- `zlib` (default): zlib-compressed JSON in `raw_zlib`.
+- `failed_only`: compressed, and dropped as soon as the row is imported successfully.
+- `json`: plain JSON in `raw` (the historical behaviour).
+
+`prune_import_payloads` is the retention job: it clears payloads of successful rows older than N days
+in batches, optionally archiving them to gzip NDJSON first (see `backend/scripts/prune_import_rows.py`).
+"""
+import gzip
+import json
+import logging
+import os
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import Text, cast, func, or_, select, text, update
+from sqlalchemy.orm import Session, undefer_group
+
+from backend.models import ImportRow
+
+STORAGE_MODES = ('zlib', 'failed_only', 'json')
+IMPORT_ROW_PAYLOAD_STORAGE = os.getenv('IMPORT_ROW_PAYLOAD_STORAGE', 'zlib')
+IMPORT_ROW_RETENTION_DAYS = int(os.getenv('IMPORT_ROW_RETENTION_DAYS', '90'))
+PRUNE_STATUSES = ('success',)
+DEFAULT_PRUNE_BATCH = 500
+
+
+def storage_mode() -> str:
+    if IMPORT_ROW_PAYLOAD_STORAGE not in STORAGE_MODES:
+        logging.warning('Unknown IMPORT_ROW_PAYLOAD_STORAGE=%r; using zlib', IMPORT_ROW_PAYLOAD_STORAGE)
+        return 'zlib'
+    return IMPORT_ROW_PAYLOAD_STORAGE
+
+
+def compress_payload(data) -> bytes:
+    return zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), 6)
+
+
+def store_payload(row: ImportRow, data):
+    """Set the payload of an import row according to the configured storage mode."""
+    if data is None:
+        row.raw, row.raw_zlib = None, None
+    elif storage_mode() == 'json':
+        row.raw, row.raw_zlib = data, None
+    else:
+        row.raw, row.raw_zlib = None, compress_payload(data)
+
+
+def release_payload(row: ImportRow):
+    """Called once a row was imported successfully; drops the payload in `failed_only` mode."""
+    if storage_mode() == 'failed_only':
+        row.raw, row.raw_zlib = None, None
+        row.payload_pruned_at = datetime.utcnow()
+
+
+def _payload_bytes():
+    """SQL expression for the stored size of a row's payload."""
+    return (func.coalesce(func.length(ImportRow.raw_zlib), 0)
+            + func.coalesce(func.length(cast(ImportRow.raw, Text)), 0))
+
+
+def table_size_bytes(db: Session) -> int | None:
+    """On-disk size of `import_rows` where the database can report it (Postgres), else None."""
+    if db.get_bind().dialect.name == 'postgresql':
+        return db.execute(text("SELECT pg_total_relation_size('import_rows')")).scalar()
+    return None
+
+
+def prune_import_payloads(db: Session, older_than_days: int = IMPORT_ROW_RETENTION_DAYS,
+                          batch_size: int = DEFAULT_PRUNE_BATCH, archive_path: str | None = None,
+                          dry_run: bool = False, now: datetime | None = None) -> dict:
+    """Clear payloads of successfully imported rows older than `older_than_days`, one transaction per batch.
+
+    With `archive_path` the payloads are appended to a gzip NDJSON file before they are cleared.
+    Returns metrics: rows pruned, payload bytes reclaimed and (Postgres) table size before/after.
+    Space freed inside the table is reused by new rows; VACUUM FULL / VACUUM returns it to the OS.
+    """
+    cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+    candidates = (
+        ImportRow.status.in_(PRUNE_STATUSES),
+        ImportRow.created_at < cutoff,
+        ImportRow.payload_pruned_at.is_(None),
+        or_(ImportRow.raw.is_not(None), ImportRow.raw_zlib.is_not(None)),
+    )
+    metrics = {'cutoff': cutoff.isoformat(), 'rows_pruned': 0, 'payload_bytes_reclaimed': 0, 'batches': 0,
+               'table_bytes_before': table_size_bytes(db), 'table_bytes_after': None, 'dry_run': dry_run}
+    archive = gzip.open(archive_path, 'at', encoding='utf-8') if archive_path and not dry_run else None
+    last_id = 0
+    try:
+        while True:
+            rows = db.execute(
+                select(ImportRow.id, _payload_bytes()).where(ImportRow.id > last_id, *candidates)
+                .order_by(ImportRow.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            ids = [r[0] for r in rows]
+            last_id = ids[-1]
+            metrics['batches'] += 1
+            metrics['rows_pruned'] += len(ids)
+            metrics['payload_bytes_reclaimed'] += sum(int(r[1] or 0) for r in rows)
+            if dry_run:
+                continue
+            if archive is not None:
+                for row in db.query(ImportRow).options(undefer_group('payload')).filter(ImportRow.id.in_(ids)):
+                    archive.write(json.dumps({
+                        'id': row.id, 'job_id': row.job_id, 'row_number': row.row_number, 'case_id': row.case_id,
+                        'created_at': row.created_at.isoformat() if row.created_at else None, 'payload': row.payload,
+                    }, ensure_ascii=False) + '\n')
+                archive.flush()
+            db.execute(
+                update(ImportRow).where(ImportRow.id.in_(ids))
+                .values(raw=None, raw_zlib=None, payload_pruned_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            logging.info('Pruned %s import row payloads (up to id %s, %s bytes so far)',
+                         metrics['rows_pruned'], last_id, metrics['payload_bytes_reclaimed'])
+    finally:
+        if archive is not None:
+            archive.close()
+    db.rollback()
+    metrics['table_bytes_after'] = table_size_bytes(db)
+    return metrics
@@ -0,0 +1,69 @@
+"""Write-time maintenance of derived case data.
+
+A single `before_flush` listener keeps denormalized columns in sync whenever cases or comments
+are written through the ORM, so every write path (API handlers, imports, scripts) gets the same
+treatment without calling helpers by hand. Set-based UPDATE/DELETE statements bypass the ORM
+unit of work and must maintain derived data themselves.
+
+The same hooks track which caches a transaction made stale — dashboard statistics when it touched
+cases (or the users they are assigned to), the user directory when it touched users, the maintenance
+schedule when it touched maintenance windows — and clear them once it commits.
+"""
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend import comments, directory, maintenance, names, raw_fields, roster, search, stats
+from backend.models import Case, MaintenanceWindow, User
+
+_STALE_CACHES = 'stale_caches'
+
+
+def _stale_caches(session, objects) -> set:
+    caches = set()
+    for obj in objects:
+        if isinstance(obj, Case):
+            caches.add(stats.stats_cache)
+        # a user whose own columns did not change is only dirty because a case was (un)assigned to them
+        elif isinstance(obj, User) and (obj not in session.dirty
+                                        or session.is_modified(obj, include_collections=False)):
+            caches.update((stats.stats_cache, directory.users_cache))
+        elif isinstance(obj, MaintenanceWindow):
+            caches.add(maintenance.schedule_cache)
+    return caches
+
+
+def _mark_stale(session, caches):
+    if caches:
+        session.info.setdefault(_STALE_CACHES, set()).update(caches)
+
+
+@event.listens_for(Session, 'before_flush')
+def _maintain_derived_case_data(session, flush_context, instances):
+    raw_fields.sync_promoted_columns(session)
+    search.sync_search_text(session)
+    names.sync_name_index(session)
+    roster.sync_family_members(session)
+    comments.sync_comment_counts(session)
+    _mark_stale(session, _stale_caches(session, list(session.new) + list(session.dirty) + list(session.deleted)))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_case_writes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is Case:
+        _mark_stale(orm_execute_state.session, {stats.stats_cache})
+    elif mapper is not None and mapper.class_ is User:
+        _mark_stale(orm_execute_state.session, {stats.stats_cache, directory.users_cache})
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_case_caches(session):
+    for cache in session.info.pop(_STALE_CACHES, ()):
+        cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_cache_marks(session):
+    session.info.pop(_STALE_CACHES, None)
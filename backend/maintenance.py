@@ -0,0 +1,92 @@
+"""Maintenance windows, persisted in `maintenance_windows` and read through a short-lived per-process cache.
+
+Every open frontend tab polls `GET /maintenance`, so reads are served from a `Schedule` snapshot in
+`schedule_cache` (TTL `MAINTENANCE_CACHE_TTL`, default 5s). Writes go through the ORM, and the hooks in
+`backend/indexing.py` drop the snapshot on commit. With `CACHE_BACKEND=database`, other workers drop
+theirs as well (see `backend/cache.py`); otherwise they catch up within the TTL.
+
+A snapshot answers "which window is active now" in O(1). It remembers the answer together with the
+next instant at which that answer can change, and only rescans its windows once that instant has
+passed. The maintenance-mode middleware in `backend/api.py` uses this to reject writes from non-admins
+during a window when `MAINTENANCE_ENFORCE` is set.
+"""
+import os
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from backend.cache import TTLCache
+from backend.models import MaintenanceWindow
+
+MAINTENANCE_CACHE_TTL = float(os.getenv('MAINTENANCE_CACHE_TTL', '5'))
+MAINTENANCE_ENFORCE = os.getenv('MAINTENANCE_ENFORCE', '').strip().lower() in ('1', 'true', 'yes')
+# requests that stay possible during an enforced window (paths without the /api mount prefix)
+EXEMPT_PATH_PREFIXES = ('/auth/', '/maintenance', '/health')
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+schedule_cache = TTLCache(ttl=MAINTENANCE_CACHE_TTL, maxsize=1, namespace='maintenance')
+
+
+def _iso(dt: datetime) -> str:
+    # stored as naive UTC; the offset keeps browsers from reading it as local time
+    return dt.replace(tzinfo=timezone.utc).isoformat()
+
+
+def serialize(window: MaintenanceWindow) -> dict:
+    return {
+        'id': window.id,
+        'start': _iso(window.start_at),
+        'end': _iso(window.end_at),
+        'message': window.message,
+        'created_by': window.created_by_id,
+    }
+
+
+class Schedule:
+    """Immutable list of windows plus a memoized answer to `active()`."""
+
+    def __init__(self, windows):
+        self._windows = sorted((w.start_at, w.end_at, serialize(w)) for w in windows)
+        self.entries = [entry for _, _, entry in self._windows]
+        # (valid_from, valid_until, active entry); replaced atomically, so no lock is needed
+        self._memo = None
+
+    def active(self, now: datetime | None = None) -> dict | None:
+        now = now or datetime.utcnow()
+        memo = self._memo
+        if memo is not None and memo[0] <= now < memo[1]:
+            return memo[2]
+        current = None
+        valid_until = datetime.max
+        for start, end, entry in self._windows:
+            if start <= now < end:
+                current = current or entry
+                valid_until = min(valid_until, end)
+            elif start > now:
+                valid_until = min(valid_until, start)
+                break
+        self._memo = (now, valid_until, current)
+        return current
+
+
+def load_schedule(db: Session) -> Schedule:
+    return Schedule(db.query(MaintenanceWindow).order_by(MaintenanceWindow.start_at, MaintenanceWindow.id).all())
+
+
+def get_schedule(db: Session) -> Schedule:
+    return schedule_cache.get_or_compute('schedule', lambda: load_schedule(db))
+
+
+def current_schedule(session_factory) -> Schedule:
+    """Cached schedule for callers without a request session (middleware); opens one only on a miss."""
+    cached = schedule_cache.get('schedule')
+    if cached is not None:
+        return cached
+    with session_factory() as db:
+        return get_schedule(db)
+
+
+def is_exempt(method: str, path: str) -> bool:
+    if path.startswith('/api/'):
+        path = path[len('/api'):]
+    return method in READ_METHODS or path.startswith(EXEMPT_PATH_PREFIXES)
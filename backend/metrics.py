@@ -0,0 +1,64 @@
+"""Process-local counters and gauges exposed at `GET /metrics` in the Prometheus text format.
+
+Each worker reports its own values; the scraper (or the dashboard) sums them across workers. Only
+what operators asked for is recorded here: traffic-control decisions (see `backend/ratelimit.py`),
+in-flight requests and drops, so there is no dependency on a metrics client library.
+"""
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_help = {}
+
+
+def _key(name: str, labels: dict | None):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def describe(name: str, kind: str, text: str):
+    _help[name] = (kind, text)
+
+
+def inc(name: str, labels: dict | None = None, value: float = 1):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, labels: dict | None = None):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def value(name: str, labels: dict | None = None) -> float:
+    key = _key(name, labels)
+    with _lock:
+        return _counters.get(key, _gauges.get(key, 0))
+
+
+def _format(name, labels, val) -> str:
+    label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+    return f'{name}{{{label_text}}} {val:g}' if label_text else f'{name} {val:g}'
+
+
+def render() -> str:
+    with _lock:
+        samples = sorted(list(_counters.items()) + list(_gauges.items()))
+    lines = []
+    described = set()
+    for (name, labels), val in samples:
+        if name not in described and name in _help:
+            kind, text = _help[name]
+            lines.append(f'# HELP {name} {text}')
+            lines.append(f'# TYPE {name} {kind}')
+            described.add(name)
+        lines.append(_format(name, labels, val))
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Clear every sample (tests)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
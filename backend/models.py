@@ -1,15 +1,17 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, JSON, Boolean, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 import datetime
+import json
+import zlib
 
 Base = declarative_base()
 
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String(255), nullable=False)
-    ability = Column(String(255), nullable=True)
+    name = Column(String(255), nullable=False, index=True)
+    ability = Column(String(255), nullable=True, index=True)
     # Authentication fields
     username = Column(String(255), unique=True, nullable=True, index=True)
     email = Column(String(255), unique=True, nullable=True, index=True)
@@ -17,42 +19,125 @@ class User(Base):
     role = Column(String(50), default="user")
     must_change_password = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    cases = relationship("Case", back_populates="assigned_to")
+    # assigned_to_id is nulled by the database (ON DELETE SET NULL); never load the collection to delete a user
+    cases = relationship("Case", back_populates="assigned_to", passive_deletes=True)
 
 
+class AssignmentCursor(Base):
+    """Last user that received a case per ability, so round-robin auto-assignment resumes where it stopped"""
+    __tablename__ = "assignment_cursors"
+    ability = Column(String(255), primary_key=True)
+    last_user_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+
+class MaintenanceWindow(Base):
+    """Scheduled maintenance announced to every client; read through the cache in backend/maintenance.py"""
+    __tablename__ = "maintenance_windows"
+    id = Column(Integer, primary_key=True, index=True)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=False, index=True)
+    message = Column(Text, nullable=True)
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class CacheVersion(Base):
+    """Invalidation counter per cache namespace, shared by all workers; see backend/cache.py"""
+    __tablename__ = "cache_versions"
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 
 class Case(Base):
     __tablename__ = "cases"
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    status = Column(String(50), default="open")
-    assigned_to_id = Column(Integer, ForeignKey("users.id"))
+    status = Column(String(50), default="open", index=True)
+    assigned_to_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), index=True)
     assigned_to = relationship("User", back_populates="cases")
-    comments = relationship("Comment", back_populates="case")
+    comments = relationship("Comment", back_populates="case", passive_deletes=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
-    completed_at = Column(DateTime, nullable=True)
-    # Raw form data (incoming XLSX JSON) — used by frontend to backfill formFields
-    raw = Column(JSON, nullable=True)
+    completed_at = Column(DateTime, nullable=True, index=True)
+    # Raw form data (incoming XLSX JSON) — used by frontend to backfill formFields.
+    # Deferred: the payload is large and most write paths only touch the columns above, so queries that
+    # need it opt in with `undefer(Case.raw)`.
+    raw = deferred(Column(JSON, nullable=True))
+    # Denormalized full-text document (title, description, comments, identifying raw fields); see backend/search.py
+    search_text = Column(Text, nullable=True)
+    # Folded beneficiary full name used for duplicate detection; see backend/names.py
+    beneficiary_name_norm = Column(String(255), nullable=True, index=True)
+    # Typed copies of frequently filtered raw fields, filled on every write; see backend/raw_fields.py
+    category = Column(String(255), nullable=True)
+    case_number = Column(String(255), nullable=True, index=True)
+    beneficiary_name = Column(String(255), nullable=True)
+    submitted_at = Column(DateTime, nullable=True, index=True)
+    # Number of comments, maintained at write time so list views need no join; see backend/comments.py
+    comment_count = Column(Integer, nullable=False, default=0, server_default='0')
+    # Size of the family roster extracted from raw at write time; see backend/roster.py
+    family_member_count = Column(Integer, nullable=False, default=0, server_default='0', index=True)
+    __table_args__ = (
+        Index('ix_cases_status_created_at', 'status', 'created_at'),
+        Index('ix_cases_category_status', 'category', 'status'),
+        Index('ix_cases_assigned_to_id_status', 'assigned_to_id', 'status'),
+    )
+
+
+
+class CaseNameTrigram(Base):
+    """Trigram postings of `Case.beneficiary_name_norm`, maintained at write time for duplicate lookups."""
+    __tablename__ = 'case_name_trigrams'
+    case_id = Column(Integer, ForeignKey('cases.id', ondelete='CASCADE'), primary_key=True)
+    trigram = Column(String(16), primary_key=True)
+    case = relationship('Case')
+    __table_args__ = (Index('ix_case_name_trigrams_trigram_case', 'trigram', 'case_id'),)
+
+
+class FamilyMember(Base):
+    """One member of a case's family roster, extracted from `Case.raw` at write time; see backend/roster.py."""
+    __tablename__ = 'family_members'
+    id = Column(Integer, primary_key=True)
+    case_id = Column(Integer, ForeignKey('cases.id', ondelete='CASCADE'), nullable=False)
+    # order in the form (KoBo slot order), and the KoBo slot itself (`7_1`) for repeat-group columns
+    position = Column(Integer, nullable=False)
+    slot = Column(String(32), nullable=True)
+    name = Column(String(255), nullable=True)
+    last_name = Column(String(255), nullable=True)
+    relation = Column(String(64), nullable=True)
+    gender = Column(String(32), nullable=True)
+    birth_date = Column(Date, nullable=True)
+    # answered, or computed from birth_date on the submission date
+    age = Column(Integer, nullable=True)
+    nationality = Column(String(64), nullable=True)
+    govreg = Column(String(64), nullable=True)
+    case = relationship('Case')
+    __table_args__ = (
+        Index('ix_family_members_case_id_position', 'case_id', 'position'),
+        Index('ix_family_members_relation_age', 'relation', 'age'),
+        Index('ix_family_members_age', 'age'),
+    )
 
 
 
 class Comment(Base):
     __tablename__ = "comments"
     id = Column(Integer, primary_key=True, index=True)
-    case_id = Column(Integer, ForeignKey("cases.id"))
-    user_id = Column(Integer, ForeignKey("users.id"))
+    case_id = Column(Integer, ForeignKey("cases.id", ondelete="CASCADE"))
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), index=True)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     case = relationship("Case", back_populates="comments")
     user = relationship("User")
+    # comments are always listed per case in (created_at, id) order; see backend/comments.py
+    __table_args__ = (Index('ix_comments_case_id_created_at', 'case_id', 'created_at'),)
 
 
 class ImportJob(Base):
     __tablename__ = 'import_jobs'
     id = Column(Integer, primary_key=True, index=True)
-    uploader_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+    uploader_id = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
     uploader_name = Column(String(255), nullable=True)
     filename = Column(String(512), nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -65,8 +150,20 @@ class ImportRow(Base):
     job_id = Column(Integer, ForeignKey('import_jobs.id'))
     job = relationship('ImportJob', back_populates='rows')
     row_number = Column(Integer, nullable=True)
-    raw = Column(JSON, nullable=True)
+    # Row payload: plain JSON (older rows, IMPORT_ROW_PAYLOAD_STORAGE=json) or zlib-compressed JSON in
+    # `raw_zlib`. Both are cleared once the retention job prunes the row; read it through `payload`.
+    raw = deferred(Column(JSON(none_as_null=True), nullable=True), group='payload')
+    raw_zlib = deferred(Column(LargeBinary, nullable=True), group='payload')
+    payload_pruned_at = Column(DateTime, nullable=True)
     status = Column(String(32), default='pending')
     error = Column(Text, nullable=True)
-    case_id = Column(Integer, ForeignKey('cases.id'), nullable=True)
+    case_id = Column(Integer, ForeignKey('cases.id', ondelete='SET NULL'), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    __table_args__ = (Index('ix_import_rows_status_created_at', 'status', 'created_at'),)
+
+    @property
+    def payload(self):
+        """The imported row data whichever way it is stored, or None once pruned."""
+        if self.raw_zlib is not None:
+            return json.loads(zlib.decompress(self.raw_zlib).decode('utf-8'))
+        return self.raw
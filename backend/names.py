@@ -0,0 +1,116 @@
+"""Arabic-aware beneficiary name matching.
+
+Kobo submissions spell the same Arabic name in several ways (hamza forms of alef, ta marbuta vs ha,
+alef maqsura vs ya, optional diacritics and tatweel). Names are folded to a canonical form at write
+time and broken into trigrams stored in `case_name_trigrams`, so "possible duplicate" lookups are
+an indexed trigram count followed by an exact similarity check on a handful of candidates.
+"""
+import math
+import re
+import unicodedata
+
+from sqlalchemy import delete, func, inspect
+from sqlalchemy.orm import Session
+
+from backend.models import Case, CaseNameTrigram
+from backend.raw_fields import BENEFICIARY_NAME_FIELDS, beneficiary_full_name  # noqa: F401
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.5
+
+# Harakat, Quranic annotation marks and superscript alef
+_DIACRITICS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed]')
+_TATWEEL = '\u0640'
+_ARABIC_FOLD = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ی': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+    'ک': 'ك',
+    **{chr(0x0660 + d): str(d) for d in range(10)},
+    **{chr(0x06f0 + d): str(d) for d in range(10)},
+})
+_NON_WORD_RE = re.compile(r'[^\w\s]+', re.UNICODE)
+_SPACES_RE = re.compile(r'\s+')
+
+
+def fold_arabic(value: str) -> str:
+    """Fold Arabic spelling variants and case without touching punctuation (used for search documents)."""
+    if not value:
+        return value
+    s = unicodedata.normalize('NFKC', value)
+    s = _DIACRITICS_RE.sub('', s).replace(_TATWEEL, '')
+    return s.translate(_ARABIC_FOLD).casefold()
+
+
+def normalize_name(value) -> str:
+    """Canonical form of a person name: folded, punctuation removed, single spaces."""
+    if value is None:
+        return ''
+    s = fold_arabic(str(value))
+    s = _NON_WORD_RE.sub(' ', s).replace('_', ' ')
+    return _SPACES_RE.sub(' ', s).strip()
+
+
+def name_trigrams(normalized: str) -> set:
+    """pg_trgm style trigrams: each word padded with two leading spaces and one trailing space."""
+    grams = set()
+    for word in normalized.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / float(len(a) + len(b) - shared)
+
+
+def sync_name_index(session: Session):
+    """Refresh `beneficiary_name_norm` and trigram rows for new or changed cases. Called from `before_flush`."""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Case):
+            continue
+        is_new = obj in session.new
+        if not is_new and not inspect(obj).attrs.raw.history.has_changes():
+            continue
+        normalized = normalize_name(beneficiary_full_name(obj.raw))[:255] or None
+        if not is_new and normalized == obj.beneficiary_name_norm:
+            continue
+        obj.beneficiary_name_norm = normalized
+        if obj.id is not None:
+            session.execute(
+                delete(CaseNameTrigram).where(CaseNameTrigram.case_id == obj.id),
+                execution_options={'synchronize_session': False},
+            )
+        for gram in name_trigrams(normalized or ''):
+            session.add(CaseNameTrigram(case=obj, trigram=gram))
+
+
+def find_similar_cases(db: Session, name: str, limit: int = 10,
+                       threshold: float = DEFAULT_SIMILARITY_THRESHOLD, exclude_case_id: int | None = None):
+    """Return `[(case_id, score, normalized_name), ...]` for cases whose beneficiary name resembles `name`.
+
+    Candidates come from the trigram index: a case can only reach `threshold` similarity if it shares
+    at least `threshold * len(query trigrams)` trigrams, which the GROUP BY/HAVING enforces in the database.
+    """
+    query_grams = name_trigrams(normalize_name(name))
+    if not query_grams:
+        return []
+    min_shared = max(1, math.ceil(threshold * len(query_grams)))
+    shared = func.count(CaseNameTrigram.trigram)
+    candidates = db.query(CaseNameTrigram.case_id).filter(CaseNameTrigram.trigram.in_(sorted(query_grams)))
+    if exclude_case_id is not None:
+        candidates = candidates.filter(CaseNameTrigram.case_id != exclude_case_id)
+    candidate_ids = [row[0] for row in candidates.group_by(CaseNameTrigram.case_id)
+                     .having(shared >= min_shared).order_by(shared.desc()).limit(limit * 5)]
+    if not candidate_ids:
+        return []
+    scored = []
+    for case_id, normalized in db.query(Case.id, Case.beneficiary_name_norm).filter(Case.id.in_(candidate_ids)):
+        score = similarity(query_grams, name_trigrams(normalized or ''))
+        if score >= threshold:
+            scored.append((case_id, round(score, 3), normalized))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:limit]
@@ -0,0 +1,13 @@
+"""Password hashing. bcrypt is imported on first use: it is slow to import and only logins and user writes need it."""
+
+
+def hash_password(password: str) -> str:
+    import bcrypt
+
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    import bcrypt
+
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
@@ -0,0 +1,234 @@
+"""Sampling profiler for live requests, with output in the folded-stack format.
+
+Folded stacks (`frame;frame;frame count` per line) load directly into flamegraph.pl,
+speedscope and most flamegraph viewers.
+
+- Per request: an admin sends `X-Profile: 1` or `?profile=1`. While that request runs, a sampler thread
+  snapshots its stacks every `PROFILE_REQUEST_INTERVAL` seconds (default 0.005). The profile is kept in
+  memory (the last `PROFILE_KEEP`, default 20) and its id is returned in `X-Profile-Id`.
+- Background (`PROFILE_BACKGROUND=1`): one daemon thread per worker samples every
+  `PROFILE_BACKGROUND_INTERVAL` seconds (default 0.1) and aggregates stack counts per route.
+  At that rate one sample costs well under a millisecond.
+
+Sampling uses `sys._current_frames()`, so it needs no dependency. Stacks are attributed to requests
+by walking outwards to the frame that runs the request. On the event loop that is an ASGI frame whose
+`scope` carries the request's `RequestTag`. In the threadpool it is the AnyIO worker frame whose
+`context` local holds the request's copied context. Frames outside the request (server loop,
+threadpool plumbing) are not recorded.
+"""
+import contextvars
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+PROFILE_REQUEST_INTERVAL = float(os.getenv('PROFILE_REQUEST_INTERVAL', '0.005'))
+PROFILE_BACKGROUND = os.getenv('PROFILE_BACKGROUND', '').strip().lower() in ('1', 'true', 'yes')
+PROFILE_BACKGROUND_INTERVAL = float(os.getenv('PROFILE_BACKGROUND_INTERVAL', '0.1'))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+PROFILE_MAX_CONCURRENT = 2
+MAX_STACK_DEPTH = 128
+MAX_BACKGROUND_STACKS = 5000
+SCOPE_KEY = 'backend.profiler'
+
+_request_tag: contextvars.ContextVar = contextvars.ContextVar('profiler_request', default=None)
+
+
+class RequestTag:
+    """Identifies a request in sampled stacks; `profile` is set when the request itself is profiled."""
+    __slots__ = ('scope', 'profile')
+
+    def __init__(self, scope: dict, profile: 'RequestProfile | None' = None):
+        self.scope = scope
+        self.profile = profile
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get('route')
+        return f"{self.scope.get('method')} {getattr(route, 'path', None) or self.scope.get('path')}"
+
+
+def tag_request(scope: dict, profile: 'RequestProfile | None' = None):
+    """Attach a tag to the request; returns the context token for `untag_request`."""
+    tag = RequestTag(scope, profile)
+    scope[SCOPE_KEY] = tag
+    return _request_tag.set(tag)
+
+
+def untag_request(token):
+    _request_tag.reset(token)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _request_stack(frame):
+    """(tag, labels root-first) for a thread's current frame, or (None, None) if it is not serving a request."""
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        tag = None
+        if code.co_name == 'run' and 'context' in code.co_varnames:
+            context = frame.f_locals.get('context')
+            if isinstance(context, contextvars.Context):
+                tag = context.get(_request_tag)
+        elif 'scope' in code.co_varnames:
+            scope = frame.f_locals.get('scope')
+            if isinstance(scope, dict):
+                tag = scope.get(SCOPE_KEY)
+        if tag is not None:
+            labels.reverse()
+            return tag, labels
+        if len(labels) < MAX_STACK_DEPTH:
+            labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return None, None
+
+
+def _samples(exclude: int):
+    for thread_id, frame in sys._current_frames().items():
+        if thread_id == exclude:
+            continue
+        tag, labels = _request_stack(frame)
+        if tag is not None and labels:
+            yield tag, labels
+
+
+def folded(counts: Counter, root: str | None = None) -> str:
+    prefix = f'{root};' if root else ''
+    return ''.join(f"{prefix}{';'.join(stack)} {count}\n" for stack, count in counts.most_common())
+
+
+class RequestProfile:
+    _ids = itertools.count(1)
+
+    def __init__(self, interval: float = PROFILE_REQUEST_INTERVAL):
+        self.id = next(self._ids)
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self.route = None
+        self.started_at = datetime.utcnow()
+        self.duration_ms = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'profile-{self.id}', daemon=True)
+        self._started = time.perf_counter()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for tag, labels in _samples(me):
+                if tag.profile is self:
+                    self.counts[tuple(labels)] += 1
+                    self.samples += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, route: str):
+        self._stop.set()
+        self._thread.join()
+        self.route = route
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 2)
+
+    def summary(self) -> dict:
+        return {'id': self.id, 'route': self.route, 'started_at': self.started_at.isoformat() + 'Z',
+                'duration_ms': self.duration_ms, 'samples': self.samples,
+                'interval_ms': self.interval * 1000}
+
+
+_lock = threading.Lock()
+_profiles = deque(maxlen=PROFILE_KEEP)
+_active = 0
+
+
+def start_request_profile() -> RequestProfile | None:
+    """A running profile, or None when PROFILE_MAX_CONCURRENT profiles are already running."""
+    global _active
+    with _lock:
+        if _active >= PROFILE_MAX_CONCURRENT:
+            return None
+        _active += 1
+    profile = RequestProfile()
+    profile.start()
+    return profile
+
+
+def finish_request_profile(profile: RequestProfile, route: str):
+    global _active
+    profile.stop(route)
+    with _lock:
+        _active -= 1
+        _profiles.append(profile)
+
+
+def list_profiles() -> list[dict]:
+    with _lock:
+        return [p.summary() for p in reversed(_profiles)]
+
+
+def get_profile(profile_id: int) -> RequestProfile | None:
+    with _lock:
+        return next((p for p in _profiles if p.id == profile_id), None)
+
+
+class BackgroundSampler:
+    def __init__(self, interval: float = PROFILE_BACKGROUND_INTERVAL):
+        self.interval = interval
+        self.counts = {}
+        self.samples = 0
+        self.started_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def ensure_started(self):
+        # threads do not survive a fork; each worker starts its own sampler on its first request
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.started_at = datetime.utcnow()
+            self._thread = threading.Thread(target=self._run, name='profile-background', daemon=True)
+            self._thread.start()
+
+    def sample(self, exclude: int | None = None):
+        for tag, labels in _samples(exclude if exclude is not None else threading.get_ident()):
+            route = tag.route
+            stack = tuple(labels)
+            with self._lock:
+                counts = self.counts.setdefault(route, Counter())
+                if stack not in counts and sum(len(c) for c in self.counts.values()) >= MAX_BACKGROUND_STACKS:
+                    stack = ('[other stacks]',)
+                counts[stack] += 1
+                self.samples += 1
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            self.sample(me)
+
+    def folded(self, route: str | None = None) -> str:
+        with self._lock:
+            items = [(r, Counter(c)) for r, c in self.counts.items() if route is None or r == route]
+        return ''.join(folded(counts, root=r) for r, counts in items)
+
+    def routes(self) -> dict:
+        with self._lock:
+            return {route: sum(counts.values()) for route, counts in self.counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+            self.samples = 0
+
+
+background = BackgroundSampler()
@@ -0,0 +1,184 @@
+"""Statement timing, per-request statement counts and the slow-query log.
+
+Engine events time every statement of every engine in the process. Each request runs with a
+`RequestStats` in a context variable (see `RequestControlMiddleware` in `backend/api.py`), so statements
+know the route they ran for and requests know how many statements they issued and how long the
+database took.
+
+- A statement slower than `SLOW_QUERY_MS` (default 200) is logged with its route and redacted
+  parameters (values are replaced by their type, numbers are kept). On Postgres a fraction
+  `SLOW_QUERY_EXPLAIN_RATE` (default 0, off) of slow SELECTs is explained with
+  `EXPLAIN (ANALYZE, BUFFERS)`, which runs the query a second time, and the plan is logged.
+- A request slower than `SLOW_REQUEST_MS` (default 1000) or issuing more than
+  `SLOW_REQUEST_MAX_STATEMENTS` (default 100) statements is logged with its counts.
+- `top_statements()` lists the slowest statements seen by this worker since startup, aggregated by
+  statement text (IN-lists of any length count as one statement), for `GET /admin/slow-queries`.
+"""
+import contextvars
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', '0'))
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '1000'))
+SLOW_REQUEST_MAX_STATEMENTS = int(os.getenv('SLOW_REQUEST_MAX_STATEMENTS', '100'))
+MAX_TRACKED_STATEMENTS = 500
+MAX_LOGGED_PARAMETERS = 20
+
+logger = logging.getLogger('backend.querylog')
+
+_BIND_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)\s*\)')
+
+
+class RequestStats:
+    __slots__ = ('method', 'path', 'scope', 'statements', 'db_ms')
+
+    def __init__(self, method: str, path: str, scope: dict | None = None):
+        self.method = method
+        self.path = path
+        self.scope = scope
+        self.statements = 0
+        self.db_ms = 0.0
+
+    @property
+    def route(self) -> str:
+        # the route template (`/cases/{case_id}`) once routing has matched, else the raw path
+        route = (self.scope or {}).get('route')
+        return f"{self.method} {getattr(route, 'path', None) or self.path}"
+
+
+current_request: contextvars.ContextVar = contextvars.ContextVar('querylog_request', default=None)
+
+_lock = threading.Lock()
+_statements = {}
+
+
+def normalize(statement: str) -> str:
+    return _BIND_LIST.sub('(?...)', ' '.join(statement.split()))
+
+
+def _redact_value(value):
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f'<{type(value).__name__}:{len(value)}>'
+    return f'<{type(value).__name__}>'
+
+
+def redact(parameters):
+    """Parameter values with strings, blobs and JSON replaced by their type (and length)."""
+    if isinstance(parameters, dict):
+        items = list(parameters.items())[:MAX_LOGGED_PARAMETERS]
+        return {key: _redact_value(value) for key, value in items}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(value) for value in list(parameters)[:MAX_LOGGED_PARAMETERS]]
+    return _redact_value(parameters)
+
+
+def record(statement: str, elapsed_ms: float, route: str | None):
+    key = normalize(statement)
+    with _lock:
+        entry = _statements.get(key)
+        if entry is None:
+            if len(_statements) >= MAX_TRACKED_STATEMENTS:
+                # forget the statement with the least total time to stay bounded
+                del _statements[min(_statements, key=lambda k: _statements[k]['total_ms'])]
+            entry = _statements[key] = {'statement': key, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                        'max_route': None}
+        entry['count'] += 1
+        entry['total_ms'] += elapsed_ms
+        if elapsed_ms >= entry['max_ms']:
+            entry['max_ms'] = elapsed_ms
+            entry['max_route'] = route
+
+
+def top_statements(limit: int = 20, order_by: str = 'max_ms') -> list[dict]:
+    with _lock:
+        entries = [dict(entry) for entry in _statements.values()]
+    for entry in entries:
+        entry['mean_ms'] = round(entry['total_ms'] / entry['count'], 3)
+        entry['total_ms'] = round(entry['total_ms'], 3)
+        entry['max_ms'] = round(entry['max_ms'], 3)
+    entries.sort(key=lambda entry: entry[order_by], reverse=True)
+    return entries[:limit]
+
+
+def reset():
+    with _lock:
+        _statements.clear()
+
+
+def _explain(cursor, statement, parameters) -> str | None:
+    """EXPLAIN (ANALYZE, BUFFERS) on a fresh cursor of the same DBAPI connection (Postgres SELECTs only).
+
+    It runs inside a savepoint that is always rolled back, so a failed EXPLAIN (statement_timeout,
+    parameters it cannot bind) does not leave the request's transaction aborted.
+    """
+    dbapi_connection = cursor.connection
+    # outside a transaction a failure aborts nothing, and SAVEPOINT is not allowed
+    savepoint = not getattr(dbapi_connection, 'autocommit', False)
+    explain_cursor = dbapi_connection.cursor()
+    try:
+        if savepoint:
+            explain_cursor.execute('SAVEPOINT querylog_explain')
+        try:
+            explain_cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + statement, parameters)
+            return '\n'.join(row[0] for row in explain_cursor.fetchall())
+        finally:
+            if savepoint:
+                explain_cursor.execute('ROLLBACK TO SAVEPOINT querylog_explain')
+                explain_cursor.execute('RELEASE SAVEPOINT querylog_explain')
+    finally:
+        explain_cursor.close()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('querylog_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('querylog_started')
+    if not started:
+        return
+    elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+    stats = current_request.get()
+    route = stats.route if stats is not None else None
+    if stats is not None:
+        stats.statements += 1
+        stats.db_ms += elapsed_ms
+    record(statement, elapsed_ms, route)
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+    logger.warning('Slow query %.1fms route=%s params=%s sql=%s', elapsed_ms, route or '-',
+                   redact(parameters) if not executemany else f'<executemany:{len(parameters)}>',
+                   ' '.join(statement.split())[:2000])
+    if (SLOW_QUERY_EXPLAIN_RATE and not executemany and conn.dialect.name == 'postgresql'
+            and statement.lstrip()[:6].upper() == 'SELECT' and random.random() < SLOW_QUERY_EXPLAIN_RATE):
+        try:
+            logger.warning('Plan of slow query (route=%s):\n%s', route or '-', _explain(cursor, statement, parameters))
+        except Exception as e:
+            logger.warning('Could not EXPLAIN slow query: %s', e)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute; drop its start time
+    conn = exception_context.connection
+    started = conn.info.get('querylog_started') if conn is not None else None
+    if started:
+        started.pop()
+
+
+def log_request(stats: RequestStats, elapsed_ms: float, status_code: int | None):
+    if elapsed_ms >= SLOW_REQUEST_MS or stats.statements > SLOW_REQUEST_MAX_STATEMENTS:
+        logger.warning('Slow request %s status=%s %.1fms statements=%d db=%.1fms', stats.route, status_code,
+                       elapsed_ms, stats.statements, stats.db_ms)
@@ -0,0 +1,160 @@
+"""Per-client rate limiting and load shedding.
+
+`RateLimiter` keeps one token bucket per (bucket, client). A client is the verified token's user id
+(or `sub`) when a bearer token is sent, otherwise the client IP. Buckets are chosen per request:
+
+- `import`: `/import...` (bulk uploads), `RATE_LIMIT_IMPORT`, default `10/60` (10 per minute, burst 10)
+- `login`: `/auth/login`, `RATE_LIMIT_LOGIN`, default `20/60`
+- `case_reads`: `GET /cases...`, `RATE_LIMIT_CASE_READS`, default `600/60`
+- `default`: everything else, `RATE_LIMIT_DEFAULT`, unlimited unless set
+
+Rate limiting is off unless `RATE_LIMIT_ENABLED=1`. Limits apply per worker process.
+
+`InFlightLimiter` caps the number of requests a worker handles at once (`MAX_IN_FLIGHT_REQUESTS`,
+default 200, 0 disables). Above the cap, requests are answered with 503 and `Retry-After` right
+away instead of queueing behind the sync threadpool. Health and metrics endpoints are never limited.
+Decisions are counted in `backend/metrics.py`.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from backend import metrics
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '').strip().lower() in ('1', 'true', 'yes')
+MAX_IN_FLIGHT_REQUESTS = int(os.getenv('MAX_IN_FLIGHT_REQUESTS', '200'))
+LOAD_SHED_RETRY_AFTER = int(os.getenv('LOAD_SHED_RETRY_AFTER', '1'))
+# only honour X-Forwarded-For behind a proxy that sets it
+TRUST_PROXY_HEADERS = os.getenv('TRUST_PROXY_HEADERS', '').strip().lower() in ('1', 'true', 'yes')
+MAX_TRACKED_CLIENTS = 10000
+UNLIMITED_PATH_PREFIXES = ('/health', '/metrics')
+
+DEFAULT_LIMITS = {
+    'import': os.getenv('RATE_LIMIT_IMPORT', '10/60'),
+    'login': os.getenv('RATE_LIMIT_LOGIN', '20/60'),
+    'case_reads': os.getenv('RATE_LIMIT_CASE_READS', '600/60'),
+    'default': os.getenv('RATE_LIMIT_DEFAULT', ''),
+}
+
+metrics.describe('rate_limit_allowed_total', 'counter', 'Requests admitted by the rate limiter, per bucket')
+metrics.describe('rate_limit_dropped_total', 'counter', 'Requests rejected with 429, per bucket')
+metrics.describe('load_shed_dropped_total', 'counter', 'Requests rejected with 503 by the in-flight cap')
+metrics.describe('http_requests_in_flight', 'gauge', 'Requests currently being handled by this worker')
+
+
+def parse_limit(spec: str | None) -> tuple[float, float] | None:
+    """`'N/S'` -> (refill rate per second, burst N); empty or invalid -> None (unlimited)."""
+    if not spec:
+        return None
+    try:
+        count, seconds = spec.split('/', 1)
+        count, seconds = float(count), float(seconds)
+    except ValueError:
+        logging.warning('Ignoring invalid rate limit %r; use <requests>/<seconds>', spec)
+        return None
+    if count <= 0 or seconds <= 0:
+        return None
+    return count / seconds, count
+
+
+class TokenBucket:
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Consume one token; returns 0 when allowed, else the seconds until a token is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def bucket_for(method: str, path: str) -> str:
+    if path.startswith('/api/'):
+        path = path[len('/api'):]
+    if path.startswith('/import'):
+        return 'import'
+    if path.startswith('/auth/login'):
+        return 'login'
+    if method in ('GET', 'HEAD') and path.startswith('/cases'):
+        return 'case_reads'
+    return 'default'
+
+
+def is_unlimited(path: str) -> bool:
+    if path.startswith('/api/'):
+        path = path[len('/api'):]
+    return path.startswith(UNLIMITED_PATH_PREFIXES)
+
+
+class RateLimiter:
+    def __init__(self, limits: dict | None = None, max_clients: int = MAX_TRACKED_CLIENTS, clock=time.monotonic):
+        self.limits = {name: parse_limit(spec) for name, spec in (limits or DEFAULT_LIMITS).items()}
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, bucket: str, client: str) -> float:
+        """0 when the request may proceed, else the number of seconds to wait (for `Retry-After`)."""
+        limit = self.limits.get(bucket)
+        if limit is None:
+            return 0.0
+        key = (bucket, client)
+        now = self.clock()
+        with self._lock:
+            token_bucket = self._buckets.get(key)
+            if token_bucket is None:
+                token_bucket = self._buckets[key] = TokenBucket(limit[0], limit[1], now)
+                if len(self._buckets) > self.max_clients:
+                    # forget the least recently seen client; it starts again with a full bucket
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            wait = token_bucket.take(now)
+        if wait:
+            metrics.inc('rate_limit_dropped_total', {'bucket': bucket})
+        else:
+            metrics.inc('rate_limit_allowed_total', {'bucket': bucket})
+        return wait
+
+
+class InFlightLimiter:
+    """Counts requests in progress. Used from the event loop, but locked so threaded callers are safe too."""
+
+    def __init__(self, limit: int = MAX_IN_FLIGHT_REQUESTS):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.limit and self.in_flight >= self.limit:
+                metrics.inc('load_shed_dropped_total')
+                return False
+            self.in_flight += 1
+            metrics.set_gauge('http_requests_in_flight', self.in_flight)
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            metrics.set_gauge('http_requests_in_flight', self.in_flight)
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
+
+
+rate_limiter = RateLimiter()
+in_flight = InFlightLimiter()
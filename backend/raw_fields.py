@@ -0,0 +1,187 @@
+"""Known aliases of Kobo/webhook fields inside `Case.raw`, and the typed columns promoted from them.
+
+Submissions arrive in several shapes (flat, wrapped in `body`, older form versions with different
+names), so each logical field has an ordered alias list. The API uses these tables to promote wrapper
+fields inside `raw`; the write hook in `backend/indexing.py` uses them to fill the typed `Case`
+columns (`category`, `case_number`, `beneficiary_name`, `submitted_at`) that list filters and
+statistics query instead of the JSON.
+"""
+import base64
+import json
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+from backend.models import Case
+
+SUBMISSION_TIME_FIELDS = (
+    '_submission_time', 'submissiontime', 'submission_time', 'end', 'start',
+    'submitted_at', 'submissiondate', 'submissionDate',
+)
+CASE_ID_FIELDS = ('case_id', 'caseNumber', '_id', 'kobo_case_id', 'kobo_caseNumber', 'kobo__id')
+CASE_NUMBER_FIELDS = ('case_number', 'caseNumber', 'case_id', 'kobo_caseNumber', 'kobo_case_id')
+ROSTER_FIELDS = (
+    'family_roster', 'family', 'roster', 'household', 'household_members', 'members',
+    'family_members', 'familymembers', 'householdMembers',
+)
+CATEGORY_FIELDS = (
+    'law_followup', 'eng_followup', 'category', 'case_category', 'caseCategory',
+    'law_followup1', 'law_followup3', 'law_followup4', 'law_followup5',
+)
+# Order used to pick the single category of a case: explicit category fields first, then the
+# follow-up answers in the order the dashboard lists them.
+CATEGORY_PRIORITY = (
+    'category', 'case_category', 'caseCategory',
+    'law_followup5', 'law_followup4', 'law_followup3', 'law_followup1', 'law_followup',
+    'eng_followup1', 'eng_followup',
+)
+BENEFICIARY_NAME_FIELDS = ('beneficiary_name', 'beneficiary_last_name')
+# Everything `promote_wrapper_fields` may copy to the top level
+PROMOTED_RAW_KEYS = SUBMISSION_TIME_FIELDS + CASE_ID_FIELDS + ROSTER_FIELDS + ('formFields',) + CATEGORY_FIELDS
+
+PROMOTED_COLUMNS = ('category', 'case_number', 'beneficiary_name', 'submitted_at')
+_MAX_TEXT = 255
+# `_body_backup` copies of at least this many bytes of JSON are stored zlib-compressed
+BODY_BACKUP_COMPRESS_MIN = 256
+
+
+def encode_body_backup(body: dict) -> dict:
+    """Storage form of `_body_backup`: the body itself when small, else `{'$zlib': <base64 zlib JSON>}`.
+    The backup duplicates fields that are also promoted to the top level, so storing it compressed
+    keeps it from doubling the size of every case row.
+    """
+    data = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(data) < BODY_BACKUP_COMPRESS_MIN:
+        return dict(body)
+    return {'$zlib': base64.b64encode(zlib.compress(data, 6)).decode('ascii')}
+
+
+def decode_body_backup(value) -> dict | None:
+    """Inverse of `encode_body_backup`; plain dict backups written before compression pass through."""
+    if isinstance(value, dict) and set(value) == {'$zlib'}:
+        try:
+            return json.loads(zlib.decompress(base64.b64decode(value['$zlib'])).decode('utf-8'))
+        except (ValueError, zlib.error):
+            return None
+    return value if isinstance(value, dict) else None
+
+
+def promote_wrapper_fields(raw: dict) -> dict:
+    """Copy known fields found under `raw['body']` to the top level (without overwriting), keeping the original
+    body as `_body_backup` (see `encode_body_backup`). Mutates and returns `raw`; non-dict input and non-JSON
+    string bodies are left alone.
+    """
+    if not isinstance(raw, dict):
+        return raw
+    body = raw.get('body')
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            body = None
+    if not isinstance(body, dict):
+        return raw
+    if '_body_backup' not in raw:
+        raw['_body_backup'] = encode_body_backup(body)
+    for field in SUBMISSION_TIME_FIELDS + CASE_ID_FIELDS + ROSTER_FIELDS:
+        if body.get(field) is not None and raw.get(field) is None:
+            raw[field] = body.get(field)
+    if body.get('formFields') is not None and raw.get('formFields') is None:
+        raw['formFields'] = body.get('formFields')
+    # the UI renders the family roster from formFields.family
+    if raw.get('formFields') is None:
+        roster = next((body[k] for k in ROSTER_FIELDS if body.get(k) is not None), None)
+        if roster is not None:
+            raw['formFields'] = {'family': roster}
+    for field in CATEGORY_FIELDS:
+        if body.get(field) is not None and raw.get(field) is None:
+            raw[field] = body.get(field)
+    return raw
+
+
+def raw_value(raw, key: str):
+    """Scalar value of `key` at the top level of raw, or under a wrapped `body` dict."""
+    if not isinstance(raw, dict):
+        return None
+    value = raw.get(key)
+    if value is None and isinstance(raw.get('body'), dict):
+        value = raw['body'].get(key)
+    if isinstance(value, (dict, list)):
+        return None
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+
+def first_value(raw, keys):
+    for key in keys:
+        value = raw_value(raw, key)
+        if value is not None:
+            return value
+    return None
+
+
+def _text(value):
+    if value is None:
+        return None
+    return str(value).strip()[:_MAX_TEXT] or None
+
+
+def parse_submission_time(value) -> datetime | None:
+    """Parse epoch seconds/milliseconds or ISO-like strings into a naive UTC datetime."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        if isinstance(value, str) and value.strip().isdigit():
+            value = int(value.strip())
+        if isinstance(value, (int, float)):
+            ts = int(value)
+            if ts > 1e12:  # milliseconds
+                ts = ts // 1000
+            return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+        if isinstance(value, str):
+            s = value.strip()
+            if ' ' in s and 'T' not in s:
+                s = s.replace(' ', 'T', 1)
+            dt = datetime.fromisoformat(s.replace('Z', '+00:00'))
+            if dt.tzinfo is not None:
+                dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+            return dt
+    except (ValueError, OverflowError, OSError):
+        return None
+    return None
+
+
+def beneficiary_full_name(raw) -> str | None:
+    """Join the beneficiary name fields found at the top level of raw (or under a wrapped `body`)."""
+    parts = [str(v).strip() for v in (raw_value(raw, k) for k in BENEFICIARY_NAME_FIELDS) if v is not None]
+    return ' '.join(parts) or None
+
+
+def promoted_values(raw) -> dict:
+    """Typed column values for a case derived from its raw payload."""
+    submitted_at = None
+    for key in SUBMISSION_TIME_FIELDS:
+        submitted_at = parse_submission_time(raw_value(raw, key))
+        if submitted_at is not None:
+            break
+    return {
+        'category': _text(first_value(raw, CATEGORY_PRIORITY)),
+        'case_number': _text(first_value(raw, CASE_NUMBER_FIELDS)),
+        'beneficiary_name': _text(beneficiary_full_name(raw)),
+        'submitted_at': submitted_at,
+    }
+
+
+def sync_promoted_columns(session: Session):
+    """Refresh the promoted columns of new cases and cases whose raw changed. Called from `before_flush`."""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Case):
+            continue
+        if obj not in session.new and not inspect(obj).attrs.raw.history.has_changes():
+            continue
+        for column, value in promoted_values(obj.raw).items():
+            if getattr(obj, column) != value:
+                setattr(obj, column, value)
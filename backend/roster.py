@@ -0,0 +1,229 @@
+"""Family roster extraction from KoBo repeat-group columns.
+
+KoBo flattens the family repeat group into one column per slot and question, e.g.
+`group_fj2tt69_partnernu1_7_1_partner_name` (slot `7_1`, field `name`); some payloads carry a ready-made
+roster array instead (`formFields.family` or one of `ROSTER_FIELDS`). The roster is extracted once per
+write into `family_members` rows, with their number in `Case.family_member_count`, so roster filters and
+statistics are indexed SQL instead of every client regex-parsing every case.
+
+Column names repeat across thousands of rows, so each distinct name is parsed once (`roster_key` is
+memoized) against the precompiled pattern tables below.
+"""
+import functools
+import re
+from datetime import date, datetime
+
+from sqlalchemy import delete, inspect
+from sqlalchemy.orm import Session
+
+from backend.models import Case, FamilyMember
+from backend.raw_fields import ROSTER_FIELDS, parse_submission_time
+
+ROSTER_GROUP = 'group_fj2tt69_partnernu1_'
+# Slot order of the KoBo form (the order the UI lists members); other slots follow in numeric order
+SLOT_ORDER = ('7_1', '5_1', '3_1', '2_1', '1', '6_1', '4_1')
+MAX_AGE = 130
+# cheap pre-check before parsing a key; survives any separator KoBo or a spreadsheet put in the name
+_ROSTER_MARKER = 'partnernu1'
+
+_KEY_RE = re.compile(r'^' + ROSTER_GROUP + r'(\d+(?:_\d+)*)_(.+)$')
+_NON_KEY_CHARS = re.compile(r'[^a-z0-9_]+')
+_UNDERSCORES = re.compile(r'_+')
+# First match wins, so the more specific questions come first (`partner_lastname` before `partner_name`)
+_SUFFIX_FIELDS = tuple((re.compile(pattern), field) for pattern, field in (
+    (r'relation|kinship', 'relation'),
+    (r'govreg|registr', 'govreg'),
+    (r'last|family_name|surname|title', 'last_name'),
+    (r'name', 'name'),
+    (r'gender|sex', 'gender'),
+    (r'(?:^|_)age(?:_|$)', 'age'),
+    (r'^partner$|birth|dob|date', 'birth_date'),
+    (r'national|country', 'nationality'),
+))
+# Keys of members in roster arrays, compared lowercased without separators
+_MEMBER_ALIASES = {
+    'name': 'name', 'firstname': 'name', 'givenname': 'name', 'partnername': 'name',
+    'lastname': 'last_name', 'familyname': 'last_name', 'surname': 'last_name', 'partnerlastname': 'last_name',
+    'relation': 'relation', 'relationship': 'relation', 'kinship': 'relation', 'partnerrelation1': 'relation',
+    'gender': 'gender', 'sex': 'gender',
+    'birthdate': 'birth_date', 'dateofbirth': 'birth_date', 'dob': 'birth_date', 'partner': 'birth_date',
+    'age': 'age',
+    'nationality': 'nationality', 'partnernationality': 'nationality',
+    'govreg': 'govreg', 'registered': 'govreg', 'partnergovreg': 'govreg',
+}
+_LENGTHS = {'name': 255, 'last_name': 255, 'relation': 64, 'gender': 32, 'nationality': 64, 'govreg': 64}
+
+
+def _suffix_field(suffix: str) -> str | None:
+    for pattern, field in _SUFFIX_FIELDS:
+        if pattern.search(suffix):
+            return field
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def roster_key(key: str) -> tuple | None:
+    """`(slot, field)` for a repeat-group column name, or None for any other key."""
+    normalized = _UNDERSCORES.sub('_', _NON_KEY_CHARS.sub('_', key.lower()))
+    # keys flattened from `group/slot/question` paths can repeat the group prefix; the last one is the question
+    start = normalized.rfind(ROSTER_GROUP)
+    if start < 0:
+        return None
+    match = _KEY_RE.match(normalized[start:])
+    if match is None:
+        return None
+    field = _suffix_field(match.group(2))
+    return (match.group(1), field) if field else None
+
+
+@functools.lru_cache(maxsize=1024)
+def _member_field(key: str) -> str | None:
+    field = _MEMBER_ALIASES.get(re.sub(r'[^a-z0-9]', '', key.lower()))
+    if field is None:
+        parsed = roster_key(key)
+        field = parsed[1] if parsed else None
+    return field
+
+
+def _slot_sort_key(slot: str):
+    if slot in SLOT_ORDER:
+        return (0, SLOT_ORDER.index(slot), ())
+    return (1, 0, tuple(int(part) for part in slot.split('_')))
+
+
+def _blank(value) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip()) or isinstance(value, (dict, list))
+
+
+def _birth_date(value) -> date | None:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    # a year alone is a common answer; parse_submission_time would read it as epoch seconds
+    if str(value).strip().isdigit() and len(str(value).strip()) == 4:
+        year = int(str(value).strip())
+        return date(year, 1, 1) if 1880 <= year <= 2100 else None
+    parsed = parse_submission_time(value)
+    return parsed.date() if parsed is not None else None
+
+
+def _age(value) -> int | None:
+    try:
+        age = int(float(value))
+    except (TypeError, ValueError):
+        return None
+    return age if 0 <= age <= MAX_AGE else None
+
+
+def age_on(birth_date: date, reference: date) -> int | None:
+    age = reference.year - birth_date.year - ((reference.month, reference.day) < (birth_date.month, birth_date.day))
+    return age if 0 <= age <= MAX_AGE else None
+
+
+def normalize_member(fields: dict, reference: date | None = None) -> dict | None:
+    """Typed member values from `{field: raw value}`; None when every field is blank."""
+    member = {}
+    for field, value in fields.items():
+        if _blank(value):
+            continue
+        if field == 'birth_date':
+            member[field] = _birth_date(value)
+        elif field == 'age':
+            member[field] = _age(value)
+        else:
+            text = str(value).strip()[:_LENGTHS[field]]
+            member[field] = text.casefold() if field in ('relation', 'gender') else text
+    member = {field: value for field, value in member.items() if value is not None}
+    if not member:
+        return None
+    if 'age' not in member and 'birth_date' in member and reference is not None:
+        age = age_on(member['birth_date'], reference)
+        if age is not None:
+            member['age'] = age
+    return member
+
+
+def _group_columns(sources) -> dict:
+    slots = {}
+    for source in sources:
+        for key, value in source.items():
+            parsed = roster_key(key) if isinstance(key, str) and _ROSTER_MARKER in key.lower() else None
+            if parsed is None:
+                continue
+            slot, field = parsed
+            # the first source wins: top-level values over `body` and `formFields` copies
+            slots.setdefault(slot, {}).setdefault(field, value)
+    return slots
+
+
+def _roster_array(sources) -> list | None:
+    for source in sources:
+        form_fields = source.get('formFields')
+        if isinstance(form_fields, dict) and isinstance(form_fields.get('family'), list):
+            return form_fields['family']
+        for key in ROSTER_FIELDS:
+            if isinstance(source.get(key), list):
+                return source[key]
+    return None
+
+
+def extract_roster(raw, reference: date | None = None) -> list[dict]:
+    """Normalized family members of a case, in form order.
+
+    Repeat-group columns are read from the top level of raw, a wrapped `body` and `formFields`; when there
+    are none, the first roster array found is used. `reference` (the submission date) turns birth dates
+    into ages when no age was answered.
+    """
+    if not isinstance(raw, dict):
+        return []
+    sources = [raw]
+    for nested in (raw.get('body'), raw.get('formFields')):
+        if isinstance(nested, dict):
+            sources.append(nested)
+    members = []
+    slots = _group_columns(sources)
+    if slots:
+        for slot in sorted(slots, key=_slot_sort_key):
+            member = normalize_member(slots[slot], reference)
+            if member is not None:
+                members.append({'slot': slot, **member})
+        return members
+    for entry in _roster_array(sources) or ():
+        if not isinstance(entry, dict):
+            continue
+        fields = {}
+        for key, value in entry.items():
+            field = _member_field(key) if isinstance(key, str) else None
+            if field is not None:
+                fields.setdefault(field, value)
+        member = normalize_member(fields, reference)
+        if member is not None:
+            slot = entry.get('slot')
+            members.append({'slot': str(slot)[:32] if slot else None, **member})
+    return members
+
+
+def _reference_date(case: Case) -> date:
+    started = case.submitted_at or case.created_at
+    return started.date() if started is not None else datetime.utcnow().date()
+
+
+def sync_family_members(session: Session):
+    """Rewrite the roster rows of new cases and cases whose raw changed. Called from `before_flush`, after the
+    promoted columns are refreshed (ages are computed on the submission date)."""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Case):
+            continue
+        is_new = obj in session.new
+        if not is_new and not inspect(obj).attrs.raw.history.has_changes():
+            continue
+        members = extract_roster(obj.raw, _reference_date(obj))
+        if obj.id is not None:
+            session.execute(
+                delete(FamilyMember).where(FamilyMember.case_id == obj.id),
+                execution_options={'synchronize_session': False},
+            )
+        obj.family_member_count = len(members)
+        for position, member in enumerate(members):
+            session.add(FamilyMember(case=obj, position=position, **member))
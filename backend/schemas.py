@@ -1,6 +1,8 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional
-from datetime import datetime
+from datetime import date, datetime
+
+from backend.raw_fields import decode_body_backup
 
 
 class UserBase(BaseModel):
@@ -53,11 +55,138 @@ class CaseRead(CaseBase):
     completed_at: Optional[datetime]
     assigned_to: Optional[UserRead]
     raw: Optional[dict]
+    category: Optional[str] = None
+    case_number: Optional[str] = None
+    beneficiary_name: Optional[str] = None
+    submitted_at: Optional[datetime] = None
+    comment_count: Optional[int] = None
+    family_member_count: Optional[int] = None
+
+    @field_validator('raw')
+    @classmethod
+    def decode_raw_body_backup(cls, raw):
+        # `_body_backup` is stored compressed (see raw_fields.encode_body_backup); every response gets the plain body
+        backup = raw.get('_body_backup') if isinstance(raw, dict) else None
+        if isinstance(backup, dict) and set(backup) == {'$zlib'}:
+            raw = {**raw, '_body_backup': decode_body_backup(backup)}
+        return raw
+
+    class Config:
+        orm_mode = True
+
+
+class FamilyMemberRead(BaseModel):
+    position: int
+    slot: Optional[str] = None
+    name: Optional[str] = None
+    last_name: Optional[str] = None
+    relation: Optional[str] = None
+    gender: Optional[str] = None
+    birth_date: Optional[date] = None
+    age: Optional[int] = None
+    nationality: Optional[str] = None
+    govreg: Optional[str] = None
 
     class Config:
         orm_mode = True
 
 
+class CaseSearchResults(BaseModel):
+    total: int
+    limit: int
+    offset: int
+    items: list[CaseRead]
+
+
+class CaseAssigneeCount(BaseModel):
+    user_id: int
+    name: Optional[str] = None
+    count: int
+
+
+class CaseCompletionStats(BaseModel):
+    completed: int
+    avg_days: Optional[float] = None
+
+
+class CaseFamilyStats(BaseModel):
+    members: int
+    cases_with_roster: int
+    by_size: dict[str, int]
+    by_relation: dict[str, int]
+    member_age_buckets: dict[str, int]
+
+
+class CaseStats(BaseModel):
+    total: int
+    assigned: int
+    unassigned: int
+    by_status: dict[str, int]
+    by_category: dict[str, int]
+    by_assignee: list[CaseAssigneeCount]
+    age_buckets: dict[str, int]
+    completion: CaseCompletionStats
+    family: CaseFamilyStats
+    generated_at: datetime
+
+
+class AutoAssignRequest(BaseModel):
+    ability: str
+    strategy: Optional[str] = None
+    status: Optional[str] = 'Pending'
+    job_id: Optional[int] = None
+    case_ids: Optional[list[int]] = None
+    limit: int = 500
+
+
+class CaseAssignment(BaseModel):
+    case_id: int
+    user_id: int
+    user_name: Optional[str] = None
+
+
+class AutoAssignResult(BaseModel):
+    ability: str
+    strategy: str
+    assigned: int
+    assignments: list[CaseAssignment]
+    # open cases per candidate after this batch
+    open_cases: list[CaseAssigneeCount]
+
+
+class CaseBatchOperation(BaseModel):
+    op: str  # status | assign | delete
+    case_id: int
+    # op=status
+    status: Optional[str] = None
+    resolve_comment: Optional[str] = None
+    # op=assign: user_id, else user (name), else ability; none of them unassigns
+    user_id: Optional[int] = None
+    user: Optional[str] = None
+    ability: Optional[str] = None
+    strategy: Optional[str] = None
+
+
+class CaseBatchRequest(BaseModel):
+    operations: list[CaseBatchOperation]
+
+
+class CaseBatchItemResult(BaseModel):
+    index: int
+    op: str
+    case_id: int
+    ok: bool
+    status_code: int
+    detail: Optional[str] = None
+    assigned_to_id: Optional[int] = None
+
+
+class CaseBatchResult(BaseModel):
+    applied: int
+    failed: int
+    results: list[CaseBatchItemResult]
+
+
 class CommentCreate(BaseModel):
     content: str
 
@@ -1,132 +1,287 @@
 """
-Simple backfill/rollback script to promote nested raw.body fields into top-level raw keys for existing cases.
+Backfill/rollback script to promote nested raw.body fields into top-level raw keys for existing cases.
 This is safe to run on sqlite or postgres (requires proper DATABASE_URL env var set).
 Usage:
-  python -m backend.scripts.migration_promote_raw --apply
-  python -m backend.scripts.migration_promote_raw --rollback
+  python -m backend.scripts.migration_promote_raw                  # dry-run, samples a few batches
+  python -m backend.scripts.migration_promote_raw --full           # dry-run over every row
+  python -m backend.scripts.migration_promote_raw --apply [--batch-size 1000] [--workers 4] [--checkpoint FILE]
+  python -m backend.scripts.migration_promote_raw --rollback [--checkpoint FILE]
+
+Rows are processed in primary-key ranges of `--batch-size` cases, one transaction per range, so memory
+and transaction length stay bounded regardless of table size. With `--checkpoint` the highest fully
+processed id is recorded after every batch and an interrupted run resumes from there (re-processing a
+batch is harmless: both directions are idempotent). `--workers` processes disjoint id ranges in
+parallel worker processes (Postgres only; SQLite serializes writers anyway).
 
 The script relies on SQLAlchemy models in backend.models and the engine from backend.api
 """
 import argparse
 import json
 import logging
+import multiprocessing
 import os
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from backend.api import SessionLocal
 from backend.models import Case, Base
 from backend import api as api_module
+from backend import raw_fields
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_SAMPLE_BATCHES = 20
 
 
 def promote_body_to_raw(raw: dict) -> dict:
     """Promote known wrapper keys from raw['body'] to raw top-level, while preserving _body_backup.
-    Returns the modified dict (mutates a copy)
+    Returns the modified dict (mutates the given dict; callers pass a copy)
     """
-    if not isinstance(raw, dict):
-        return raw
-    body = raw.get('body')
-    if isinstance(body, str):
-        try:
-            body = json.loads(body)
-        except Exception:
-            # non-json body - keep as-is under 'body'
-            return raw
-    if not isinstance(body, dict):
-        return raw
-    # preserve backup
-    if '_body_backup' not in raw:
-        try:
-            raw['_body_backup'] = dict(body)
-        except Exception:
-            raw['_body_backup'] = body
-    # candidates
-    candidates = ['_submission_time','submissiontime','submission_time','end','start','submitted_at','submissiondate','submissionDate',
-                  'case_id','caseNumber','_id','kobo_case_id','kobo_caseNumber','kobo__id']
-    for field in candidates:
-        if body.get(field) is not None and raw.get(field) is None:
-            raw[field] = body.get(field)
-    roster_aliases = ['family_roster','family','roster','household','household_members','members','family_members','familymembers','householdMembers']
-    for alias in roster_aliases:
-        if body.get(alias) is not None and raw.get(alias) is None:
-            raw[alias] = body.get(alias)
-    if body.get('formFields') is not None and raw.get('formFields') is None:
-        raw['formFields'] = body.get('formFields')
-    category_aliases = ['law_followup','eng_followup','category','case_category','caseCategory','law_followup1','law_followup3','law_followup4','law_followup5']
-    for alias in category_aliases:
-        if body.get(alias) is not None and raw.get(alias) is None:
-            raw[alias] = body.get(alias)
-    return raw
-
-
-def apply_backfill(session: Session, dry_run: bool = True) -> int:
-    """Apply the promotion migration to existing Case.raw values. Returns count of modified rows."""
-    cases = session.query(Case).all()
-    modified = 0
-    for c in cases:
-        if not c.raw or not isinstance(c.raw, dict):
-            continue
-        body = c.raw.get('body')
-        if not isinstance(body, dict) and not isinstance(body, str):
-            continue
-        new_raw = promote_body_to_raw(dict(c.raw))
-        # If promotion changed anything (i.e., new keys present that weren't before)
-        if new_raw != c.raw:
-            modified += 1
+    return raw_fields.promote_wrapper_fields(raw)
+
+
+def _promoted(raw):
+    """New raw for a case that still needs promotion, or None when there is nothing to change."""
+    if not isinstance(raw, dict) or not isinstance(raw.get('body'), (dict, str)):
+        return None
+    new_raw = promote_body_to_raw(dict(raw))
+    return new_raw if new_raw != raw else None
+
+
+def _restored(raw):
+    """Raw with `body` restored from `_body_backup` and promoted keys removed, or None without a backup."""
+    backup = raw_fields.decode_body_backup(raw.get('_body_backup')) if isinstance(raw, dict) else None
+    if backup is None:
+        return None
+    restored = {k: v for k, v in raw.items() if k not in raw_fields.PROMOTED_RAW_KEYS and k != '_body_backup'}
+    restored['body'] = backup
+    return restored
+
+
+TRANSFORMS = {'apply': _promoted, 'rollback': _restored}
+
+
+def iter_id_ranges(session: Session, batch_size: int = DEFAULT_BATCH_SIZE, after_id: int = 0):
+    """Yield `(lo, hi)` id ranges (lo exclusive, hi inclusive) holding at most `batch_size` cases each.
+    Boundaries are found with keyset queries on the primary key, so gaps in ids are handled and no
+    payloads are read.
+    """
+    lo = after_id
+    while True:
+        hi = session.execute(
+            select(Case.id).where(Case.id > lo).order_by(Case.id).offset(batch_size - 1).limit(1)
+        ).scalar()
+        if hi is None:
+            hi = session.execute(select(func.max(Case.id)).where(Case.id > lo)).scalar()
+            if hi is not None:
+                yield lo, hi
+            return
+        yield lo, hi
+        lo = hi
+
+
+def process_range(session: Session, operation: str, lo: int, hi: int, dry_run: bool = True) -> tuple:
+    """Transform every case with `lo < id <= hi` in one transaction. Returns `(scanned, modified)`.
+
+    Only `id` and `raw` are loaded, streamed with `yield_per`. Changed rows are written with a single
+    executemany UPDATE by primary key; the promoted columns and search documents derived from raw do
+    not change because they already read fields under `body`.
+    """
+    transform = TRANSFORMS[operation]
+    rows = session.execute(
+        select(Case.id, Case.raw).where(Case.id > lo, Case.id <= hi).order_by(Case.id)
+        .execution_options(yield_per=500)
+    )
+    scanned = 0
+    updates = []
+    for case_id, raw in rows:
+        scanned += 1
+        new_raw = transform(raw)
+        if new_raw is not None:
+            updates.append({'id': case_id, 'raw': new_raw})
             if dry_run:
-                logging.info('Would modify case id=%s', c.id)
-            else:
-                c.raw = new_raw
-                session.add(c)
-    if not dry_run:
+                logging.debug('Would modify case id=%s', case_id)
+    if updates and not dry_run:
+        session.execute(update(Case), updates)
         session.commit()
-    return modified
+    else:
+        session.rollback()
+    return scanned, len(updates)
+
 
+def _read_checkpoint(path, operation) -> int:
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as fh:
+        data = json.load(fh)
+    if data.get('operation') != operation:
+        raise SystemExit(f"Checkpoint {path} belongs to '{data.get('operation')}', not '{operation}'")
+    return int(data.get('last_id') or 0)
 
-def rollback_backfill(session: Session) -> int:
-    """Rollback previously applied backfill by copying `_body_backup` back into `body` and removing promoted keys listed above.
+
+def _write_checkpoint(path, operation, last_id, totals):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as fh:
+        json.dump({'operation': operation, 'last_id': last_id, **totals}, fh)
+    os.replace(tmp, path)
+
+
+def _worker_process_range(operation, lo, hi, dry_run):
+    db = SessionLocal()
+    try:
+        return lo, hi, process_range(db, operation, lo, hi, dry_run=dry_run)
+    finally:
+        db.close()
+
+
+def _report(totals, started):
+    elapsed = max(time.monotonic() - started, 1e-9)
+    totals['seconds'] = round(elapsed, 3)
+    totals['rows_per_sec'] = round(totals['scanned'] / elapsed, 1)
+    return totals
+
+
+def run_backfill(session: Session, operation: str = 'apply', dry_run: bool = True,
+                 batch_size: int = DEFAULT_BATCH_SIZE, checkpoint: str | None = None, workers: int = 1) -> dict:
+    """Run `operation` ('apply' or 'rollback') over all cases in id-range batches.
+    Returns `{'scanned', 'modified', 'batches', 'seconds', 'rows_per_sec'}`.
+    """
+    if workers > 1 and session.get_bind().dialect.name == 'sqlite':
+        logging.warning('SQLite allows a single writer; ignoring --workers=%s', workers)
+        workers = 1
+    start_after = _read_checkpoint(checkpoint, operation)
+    if start_after:
+        logging.info('Resuming %s after case id %s', operation, start_after)
+    totals = {'scanned': 0, 'modified': 0, 'batches': 0}
+    started = time.monotonic()
+
+    def record(hi, scanned, modified):
+        totals['scanned'] += scanned
+        totals['modified'] += modified
+        totals['batches'] += 1
+        if checkpoint and not dry_run:
+            _write_checkpoint(checkpoint, operation, hi, {'scanned': totals['scanned'], 'modified': totals['modified']})
+        rate = totals['scanned'] / max(time.monotonic() - started, 1e-9)
+        logging.info('%s: %s rows scanned, %s modified, up to id %s (%.0f rows/sec)',
+                     operation, totals['scanned'], totals['modified'], hi, rate)
+
+    ranges = iter_id_ranges(session, batch_size, after_id=start_after)
+    if workers <= 1:
+        for lo, hi in ranges:
+            scanned, modified = process_range(session, operation, lo, hi, dry_run=dry_run)
+            record(hi, scanned, modified)
+    else:
+        # Ranges are handed out in id order; the checkpoint only advances past a range once every
+        # range before it has finished, so a resume never skips unprocessed rows.
+        in_order = deque()
+        done = {}
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < workers * 2:
+                    next_range = next(ranges, None)
+                    if next_range is None:
+                        exhausted = True
+                        break
+                    in_order.append(next_range)
+                    pending.add(pool.submit(_worker_process_range, operation, *next_range, dry_run))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    lo, hi, counts = future.result()
+                    done[(lo, hi)] = counts
+                while in_order and in_order[0] in done:
+                    lo, hi = in_order.popleft()
+                    record(hi, *done.pop((lo, hi)))
+        session.rollback()
+    if checkpoint and not dry_run and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return _report(totals, started)
+
+
+def sample_backfill(session: Session, operation: str = 'apply', batches: int = DEFAULT_SAMPLE_BATCHES,
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """Dry-run a few randomly placed batches and extrapolate how many rows would change."""
+    started = time.monotonic()
+    total, min_id, max_id = session.execute(select(func.count(Case.id), func.min(Case.id), func.max(Case.id))).one()
+    totals = {'scanned': 0, 'modified': 0, 'batches': 0, 'total_rows': total}
+    if total:
+        sample_size = max(1, min(batch_size, total // max(batches, 1) or 1))
+        starts = sorted({random.randint(min_id, max_id) for _ in range(batches)})
+        for start in starts:
+            for lo, hi in iter_id_ranges(session, sample_size, after_id=start - 1):
+                scanned, modified = process_range(session, operation, lo, hi, dry_run=True)
+                totals['scanned'] += scanned
+                totals['modified'] += modified
+                totals['batches'] += 1
+                break
+    scanned = totals['scanned']
+    totals['estimated_modified'] = round(totals['modified'] * total / scanned) if scanned else 0
+    return _report(totals, started)
+
+
+def apply_backfill(session: Session, dry_run: bool = True, batch_size: int = DEFAULT_BATCH_SIZE,
+                   checkpoint: str | None = None, workers: int = 1) -> int:
+    """Apply the promotion migration to existing Case.raw values. Returns count of modified rows."""
+    stats = run_backfill(session, 'apply', dry_run=dry_run, batch_size=batch_size,
+                         checkpoint=checkpoint, workers=workers)
+    return stats['modified']
+
+
+def rollback_backfill(session: Session, batch_size: int = DEFAULT_BATCH_SIZE,
+                      checkpoint: str | None = None, workers: int = 1) -> int:
+    """Rollback previously applied backfill by copying `_body_backup` back into `body` and removing promoted keys.
     Returns number of rows restored.
     """
-    cases = session.query(Case).all()
-    restored = 0
-    fields_to_remove = ['_submission_time','submissiontime','submission_time','end','start','submitted_at','submissiondate','submissionDate',
-                        'case_id','caseNumber','_id','kobo_case_id','kobo_caseNumber','kobo__id','family','formFields','family_roster','roster','household','household_members','members','family_members','familymembers','householdMembers','law_followup','eng_followup','category','case_category','caseCategory','law_followup1','law_followup3','law_followup4','law_followup5']
-    for c in cases:
-        if not c.raw or not isinstance(c.raw, dict):
-            continue
-        if '_body_backup' in c.raw and isinstance(c.raw['_body_backup'], dict):
-            # restore
-            orig_body = dict(c.raw['_body_backup'])
-            # remove promoted fields
-            for f in fields_to_remove:
-                c.raw.pop(f, None)
-            c.raw['body'] = orig_body
-            c.raw.pop('_body_backup', None)
-            session.add(c)
-            restored += 1
-    session.commit()
-    return restored
+    stats = run_backfill(session, 'rollback', dry_run=False, batch_size=batch_size,
+                         checkpoint=checkpoint, workers=workers)
+    return stats['modified']
 
 
 def main():
     parser = argparse.ArgumentParser(description='Promote nested raw.body fields into top-level raw for existing cases')
     parser.add_argument('--apply', action='store_true', help='Actually write changes (default is dry-run)')
     parser.add_argument('--rollback', action='store_true', help='Rollback changes using _body_backup')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Cases per batch/transaction')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel worker processes over disjoint id ranges')
+    parser.add_argument('--checkpoint', help='File recording progress so an interrupted run can resume')
+    parser.add_argument('--full', action='store_true', help='Dry-run over every row instead of sampling')
+    parser.add_argument('--sample-batches', type=int, default=DEFAULT_SAMPLE_BATCHES,
+                        help='Batches to sample in a dry-run (default %(default)s)')
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
     session = SessionLocal()
     # If using sqlite and running this script for the first time in a local dev env, create tables to allow the script to proceed.
     db_url = os.environ.get('DATABASE_URL', '')
     if db_url.startswith('sqlite'):
         Base.metadata.create_all(bind=api_module.engine)
 
+    operation = 'rollback' if args.rollback else 'apply'
+    dry_run = not (args.apply or args.rollback)
+    try:
+        if dry_run and not args.full:
+            stats = sample_backfill(session, operation, batches=args.sample_batches, batch_size=args.batch_size)
+            print(f"Dry-run (sampled {stats['scanned']} of {stats['total_rows']} cases): "
+                  f"~{stats['estimated_modified']} cases would be modified ({stats['rows_per_sec']} rows/sec)")
+            return
+        stats = run_backfill(session, operation, dry_run=dry_run, batch_size=args.batch_size,
+                             checkpoint=args.checkpoint, workers=args.workers)
+    finally:
+        session.close()
+    summary = f"{stats['scanned']} cases scanned in {stats['seconds']}s ({stats['rows_per_sec']} rows/sec)"
     if args.rollback:
-        n = rollback_backfill(session)
-        print(f'Restored {n} cases from _body_backup')
-        return
-    n = apply_backfill(session, dry_run=not args.apply)
-    if args.apply:
-        print(f'Applied promotion on {n} cases')
+        print(f"Restored {stats['modified']} cases from _body_backup; {summary}")
+    elif args.apply:
+        print(f"Applied promotion on {stats['modified']} cases; {summary}")
     else:
-        print(f'Dry-run: {n} cases would be modified')
+        print(f"Dry-run: {stats['modified']} cases would be modified; {summary}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,38 @@
+"""
+Retention job for import row payloads: clears the stored row data of successfully imported rows
+older than N days (the created case keeps its own copy), in batches of one transaction each.
+Usage:
+  python -m backend.scripts.prune_import_rows --dry-run
+  python -m backend.scripts.prune_import_rows [--older-than-days 90] [--batch-size 500] [--archive rows.ndjson.gz]
+
+Defaults come from IMPORT_ROW_RETENTION_DAYS. Run it from cron or a scheduled container job.
+"""
+import argparse
+import json
+import logging
+
+from backend.api import SessionLocal
+from backend import import_payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prune payloads of old, successfully imported rows')
+    parser.add_argument('--older-than-days', type=int, default=import_payloads.IMPORT_ROW_RETENTION_DAYS)
+    parser.add_argument('--batch-size', type=int, default=import_payloads.DEFAULT_PRUNE_BATCH)
+    parser.add_argument('--archive', help='Append pruned payloads to this gzip NDJSON file first')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would be pruned')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    db = SessionLocal()
+    try:
+        metrics = import_payloads.prune_import_payloads(
+            db, older_than_days=args.older_than_days, batch_size=args.batch_size,
+            archive_path=args.archive, dry_run=args.dry_run,
+        )
+    finally:
+        db.close()
+    print(json.dumps(metrics, indent=2))
+
+
+if __name__ == '__main__':
+    main()
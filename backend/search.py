@@ -0,0 +1,159 @@
+"""Full-text case search.
+
+Every case keeps a denormalized `search_text` document (title, description, comment text and a
+few identifying raw fields) that is rebuilt whenever the case or its comments are written through
+the ORM. The database indexes that document:
+
+- Postgres: a generated `search_vector tsvector` column with a GIN index (see migration 007).
+- SQLite: an external-content FTS5 table `cases_fts` kept in sync by triggers, created by
+  `ensure_search_index` so local runs and tests need no migration step.
+
+Dialects without either fall back to a LIKE scan over `search_text`.
+"""
+import logging
+import re
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+from backend.models import Case, Comment
+from backend.names import fold_arabic
+
+# Raw keys that identify a case or beneficiary. Sensitive document numbers are deliberately excluded
+# so they cannot be probed through search by non-admin users.
+SEARCH_RAW_FIELDS = (
+    'case_id', 'case_number', 'caseNumber', 'kobo_case_id', '_uuid',
+    'beneficiary_name', 'beneficiary_last_name', 'name', 'uploaded_by',
+)
+SEARCH_MAX_TOKENS = 8
+
+SQLITE_FTS_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5("
+    "search_text, content='cases', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ai AFTER INSERT ON cases BEGIN "
+    "INSERT INTO cases_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_ad AFTER DELETE ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+    "CREATE TRIGGER IF NOT EXISTS cases_fts_au AFTER UPDATE OF search_text ON cases BEGIN "
+    "INSERT INTO cases_fts(cases_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+    "INSERT INTO cases_fts(rowid, search_text) VALUES (new.id, new.search_text); END",
+)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _raw_field(raw: dict, key: str):
+    value = raw.get(key)
+    if value is None and isinstance(raw.get('body'), dict):
+        value = raw['body'].get(key)
+    return value
+
+
+def build_search_text(title, description, raw, comments=()) -> str:
+    """Assemble the searchable document for a case. Arabic spelling variants are folded so that
+    queries written with or without hamza/diacritics match the same rows.
+    """
+    parts = [title, description]
+    if isinstance(raw, dict):
+        for key in SEARCH_RAW_FIELDS:
+            value = _raw_field(raw, key)
+            if value is not None and not isinstance(value, (dict, list)):
+                parts.append(str(value))
+    parts.extend(comments)
+    return '\n'.join(fold_arabic(str(p).strip()) for p in parts if p is not None and str(p).strip())
+
+
+def query_tokens(q: str) -> list:
+    """Split user input into folded word tokens; punctuation and query operators are dropped."""
+    return _TOKEN_RE.findall(fold_arabic(q or ''))[:SEARCH_MAX_TOKENS]
+
+
+def _attr_changed(obj, *names) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+def sync_search_text(session: Session):
+    """Rebuild `search_text` for new/changed cases and append new comment text. Called from `before_flush`."""
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Case):
+            continue
+        if obj not in session.new and not _attr_changed(obj, 'title', 'description', 'raw'):
+            continue
+        comments = ()
+        if obj.id is not None:
+            rows = session.query(Comment.content).filter(Comment.case_id == obj.id).order_by(Comment.id)
+            comments = [content for (content,) in rows]
+        obj.search_text = build_search_text(obj.title, obj.description, obj.raw, comments)
+    for obj in session.new:
+        if not isinstance(obj, Comment) or not obj.content:
+            continue
+        case = obj.case
+        if case is None and obj.case_id is not None:
+            case = session.get(Case, obj.case_id)
+        if case is not None:
+            append_comment_text(case, obj.content)
+
+
+def with_comment_text(search_text: str | None, content: str) -> str:
+    """Search document with a new comment appended. Bulk comment INSERTs bypass `sync_search_text`
+    and use this (or `append_comment_text` on a loaded case) themselves."""
+    return '\n'.join(p for p in (search_text, fold_arabic(content.strip())) if p)
+
+
+def append_comment_text(case: Case, content: str):
+    case.search_text = with_comment_text(case.search_text, content)
+
+
+def ensure_search_index(engine) -> bool:
+    """Create the SQLite FTS5 index when missing. Postgres is handled by migrations; returns True when usable."""
+    if engine.dialect.name != 'sqlite':
+        return engine.dialect.name == 'postgresql'
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'cases_fts'")).first() is not None
+            for stmt in SQLITE_FTS_STATEMENTS:
+                conn.execute(text(stmt))
+            if not existed:
+                conn.execute(text("INSERT INTO cases_fts(cases_fts) VALUES ('rebuild')"))
+        return True
+    except Exception as e:
+        logging.warning('SQLite FTS5 index unavailable, search falls back to LIKE scans: %s', e)
+        return False
+
+
+def _has_sqlite_fts(db: Session) -> bool:
+    return db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'cases_fts'")).first() is not None
+
+
+def search_case_ids(db: Session, q: str, limit: int = 20, offset: int = 0):
+    """Return `(total, [(case_id, rank), ...])` for a query, best matches first.
+    Every token must match; the last token also matches as a prefix so partial input finds results.
+    """
+    tokens = query_tokens(q)
+    if not tokens:
+        return 0, []
+    dialect = db.get_bind().dialect.name
+    params = {'limit': limit, 'offset': offset}
+    if dialect == 'postgresql':
+        params['q'] = ' & '.join(tokens[:-1] + [tokens[-1] + ':*'])
+        where = "search_vector @@ to_tsquery('simple', :q)"
+        total = db.execute(text(f'SELECT count(*) FROM cases WHERE {where}'), params).scalar()
+        rows = db.execute(text(
+            "SELECT id, ts_rank_cd(search_vector, to_tsquery('simple', :q)) AS rank FROM cases "
+            f'WHERE {where} ORDER BY rank DESC, id DESC LIMIT :limit OFFSET :offset'), params).all()
+        return total, [(r[0], float(r[1])) for r in rows]
+    if dialect == 'sqlite' and _has_sqlite_fts(db):
+        params['q'] = ' '.join(f'"{t}"' for t in tokens[:-1]) + f' "{tokens[-1]}"*'
+        total = db.execute(text('SELECT count(*) FROM cases_fts WHERE cases_fts MATCH :q'), params).scalar()
+        rows = db.execute(text(
+            'SELECT rowid, bm25(cases_fts) AS rank FROM cases_fts WHERE cases_fts MATCH :q '
+            'ORDER BY rank, rowid DESC LIMIT :limit OFFSET :offset'), params).all()
+        # bm25() is lower-is-better; negate so callers always see higher-is-better
+        return total, [(r[0], -float(r[1])) for r in rows]
+    query = db.query(Case.id)
+    for t in tokens:
+        query = query.filter(Case.search_text.ilike(f'%{t}%'))
+    total = query.count()
+    rows = query.order_by(Case.id.desc()).limit(limit).offset(offset).all()
+    return total, [(r[0], 0.0) for r in rows]
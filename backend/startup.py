@@ -0,0 +1,124 @@
+"""One-time startup tasks: database check, search index, migration check and default admin seeding.
+`preload_caches` fills the read caches so the first requests of a worker are served warm.
+
+With a single uvicorn process they run when the app starts (the lifespan of `create_app()` apps, the
+startup event of `backend.api.app`). Under gunicorn (`SERVER_MODE=gunicorn`, see `backend/gunicorn.conf.py`)
+the master runs them once before forking and sets `STARTUP_TASKS_DONE=1`, which workers inherit and
+which makes their startup skip them.
+Seeding is also safe against a concurrent seeder (a second container): a duplicate admin is rolled back.
+"""
+import functools
+import logging
+import os
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from backend import directory, maintenance, search, stats
+from backend.models import User
+
+STARTUP_TASKS_ENV = 'STARTUP_TASKS_DONE'
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), 'alembic.ini')
+
+
+def startup_tasks_done() -> bool:
+    return os.getenv(STARTUP_TASKS_ENV, '').strip().lower() in ('1', 'true', 'yes')
+
+
+def mark_startup_tasks_done():
+    os.environ[STARTUP_TASKS_ENV] = '1'
+
+
+def check_database(engine) -> bool:
+    try:
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        return True
+    except Exception as e:
+        logging.warning('[startup] database not reachable: %s', e)
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def script_heads() -> frozenset:
+    """Head revisions of the migration scripts shipped with this code (parsed once per process)."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option('script_location', os.path.join(os.path.dirname(__file__), 'alembic'))
+    return frozenset(ScriptDirectory.from_config(config).get_heads())
+
+
+def database_revisions(engine) -> frozenset:
+    """Revisions recorded in alembic_version; empty for databases created without Alembic."""
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as conn:
+        return frozenset(MigrationContext.configure(conn).get_current_heads())
+
+
+def check_migrations(engine):
+    """Warn when the database is not at the newest Alembic revision. Databases without Alembic are skipped."""
+    try:
+        heads = script_heads()
+        current = database_revisions(engine)
+    except Exception as e:
+        logging.warning('[startup] could not check migrations: %s', e)
+        return
+    if not current:
+        logging.info('[startup] no alembic_version in the database; skipping migration check')
+    elif current != heads:
+        logging.warning('[startup] database at revision %s, code expects %s; run `alembic upgrade head`',
+                        ', '.join(sorted(current)), ', '.join(sorted(heads)))
+
+
+def seed_admin(session_factory, hash_password):
+    """Create the default admin when there are no users (INITIAL_ADMIN_* env vars override the defaults)."""
+    db = session_factory()
+    try:
+        if db.query(User.id).first() is not None:
+            return
+        admin_user = os.getenv('INITIAL_ADMIN_USERNAME', 'admin')
+        admin_email = os.getenv('INITIAL_ADMIN_EMAIL', 'admin@example.com')
+        admin_pass = os.getenv('INITIAL_ADMIN_PASSWORD', 'admin123')
+        db.add(User(username=admin_user, email=admin_email, password_hash=hash_password(admin_pass),
+                    role='admin', name='Administrator'))
+        try:
+            db.commit()
+        except IntegrityError:
+            # another process seeded the same admin first
+            db.rollback()
+            return
+        # Log to keep track; avoid exposing password in logs
+        print(f"[startup] created default admin user '{admin_user}' (email: {admin_email})")
+    finally:
+        db.close()
+
+
+def run_startup_tasks(engine, session_factory, hash_password):
+    check_database(engine)
+    # Local SQLite databases are created without migrations; make sure the FTS index exists
+    try:
+        search.ensure_search_index(engine)
+    except Exception as e:
+        logging.warning('Could not prepare search index: %s', e)
+    check_migrations(engine)
+    try:
+        seed_admin(session_factory, hash_password)
+    except Exception as e:
+        print('[startup] error seeding admin user:', e)
+
+
+def preload_caches(session_factory):
+    """Fill the user directory, case stats and maintenance schedule caches. Failures only cost a cold cache."""
+    db = session_factory()
+    try:
+        for load in (directory.list_users, directory.list_abilities, stats.get_case_stats, maintenance.get_schedule):
+            try:
+                load(db)
+            except Exception as e:
+                logging.warning('[startup] could not preload %s: %s', load.__name__, e)
+                db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,138 @@
+"""Dashboard statistics computed with grouped SQL instead of loading every case.
+
+The numbers mirror what the Statistics page used to derive client-side from `GET /cases`: counts by
+status, category and assignee, case age buckets based on the submission time, and the average time
+from creation to completion. Family roster figures come from the `family_members` rows extracted at
+write time (see `backend/roster.py`). Only typed, indexed columns are read; `raw` is never touched (the
+category and submission time are promoted at write time, see `backend/raw_fields.py`).
+"""
+import os
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import and_, case, extract, func, literal, select
+from sqlalchemy.orm import Session
+
+from backend.cache import TTLCache
+from backend.models import Case, FamilyMember, User
+
+# (label, maximum age in days); anything older falls into the last open-ended bucket
+AGE_BUCKETS = (('0-7', 7), ('8-30', 30), ('31-90', 90))
+AGE_BUCKET_OLDEST = '91+'
+AGE_BUCKET_UNKNOWN = 'unknown'
+# (label, maximum age in years) of family members; older members fall into the open-ended bucket
+MEMBER_AGE_BUCKETS = (('0-4', 4), ('5-17', 17), ('18-59', 59))
+MEMBER_AGE_OLDEST = '60+'
+# families of this many members or more are counted together
+FAMILY_SIZE_CAP = 6
+
+stats_cache = TTLCache(ttl=float(os.getenv('CASE_STATS_CACHE_TTL', '60')), maxsize=4, namespace='case_stats')
+
+
+def _count_by_status(db: Session):
+    rows = db.execute(
+        select(Case.status, func.count(), func.count(Case.assigned_to_id)).group_by(Case.status)
+    ).all()
+    by_status = {}
+    total = assigned = 0
+    for status, count, assigned_count in rows:
+        label = status or 'unknown'
+        by_status[label] = by_status.get(label, 0) + count
+        total += count
+        assigned += assigned_count
+    return total, assigned, by_status
+
+
+def _count_by_assignee(db: Session):
+    rows = db.execute(
+        select(User.id, User.name, User.username, func.count(Case.id))
+        .join(Case, Case.assigned_to_id == User.id)
+        .group_by(User.id, User.name, User.username)
+        .order_by(func.count(Case.id).desc(), User.id)
+    ).all()
+    return [{'user_id': uid, 'name': name or username, 'count': count} for uid, name, username, count in rows]
+
+
+def _count_by_category(db: Session):
+    rows = db.execute(
+        select(Case.category, func.count()).where(Case.category.is_not(None))
+        .group_by(Case.category).order_by(func.count().desc())
+    ).all()
+    return {category: count for category, count in rows}
+
+
+def _count_by_age(db: Session, today):
+    started = func.coalesce(Case.submitted_at, Case.created_at)
+    whens = [(started.is_(None), literal(AGE_BUCKET_UNKNOWN))]
+    for label, max_days in AGE_BUCKETS:
+        whens.append((started >= datetime.combine(today - timedelta(days=max_days), time.min), literal(label)))
+    # bucket in a subquery so GROUP BY references a plain column rather than repeating the bound CASE
+    buckets = select(case(*whens, else_=literal(AGE_BUCKET_OLDEST)).label('bucket')).subquery()
+    counts = dict(db.execute(select(buckets.c.bucket, func.count()).group_by(buckets.c.bucket)).all())
+    labels = [label for label, _ in AGE_BUCKETS] + [AGE_BUCKET_OLDEST, AGE_BUCKET_UNKNOWN]
+    return {label: counts.get(label, 0) for label in labels}
+
+
+def _completion(db: Session):
+    done = and_(Case.completed_at.is_not(None), Case.created_at.is_not(None))
+    dialect = db.get_bind().dialect.name
+    if dialect == 'sqlite':
+        days = func.julianday(Case.completed_at) - func.julianday(Case.created_at)
+    elif dialect == 'postgresql':
+        days = extract('epoch', Case.completed_at - Case.created_at) / 86400.0
+    else:
+        days = None
+    if days is not None:
+        completed, avg_days = db.execute(select(func.count(), func.avg(days)).where(done)).one()
+    else:
+        spans = [(end - start).total_seconds() / 86400.0
+                 for start, end in db.execute(select(Case.created_at, Case.completed_at).where(done))]
+        completed, avg_days = len(spans), (sum(spans) / len(spans) if spans else None)
+    return {'completed': completed, 'avg_days': round(float(avg_days), 2) if avg_days is not None else None}
+
+
+def _family(db: Session):
+    # both groupings have few distinct values (sizes, ages in years), so buckets are folded here
+    by_size = {str(n): 0 for n in range(FAMILY_SIZE_CAP)}
+    by_size[f'{FAMILY_SIZE_CAP}+'] = 0
+    members = cases_with_roster = 0
+    for size, count in db.execute(select(Case.family_member_count, func.count()).group_by(Case.family_member_count)):
+        size = size or 0
+        by_size[str(size) if size < FAMILY_SIZE_CAP else f'{FAMILY_SIZE_CAP}+'] += count
+        members += size * count
+        cases_with_roster += count if size else 0
+    by_relation = {relation: count for relation, count in db.execute(
+        select(FamilyMember.relation, func.count()).where(FamilyMember.relation.is_not(None))
+        .group_by(FamilyMember.relation).order_by(func.count().desc())
+    )}
+    labels = [label for label, _ in MEMBER_AGE_BUCKETS] + [MEMBER_AGE_OLDEST, AGE_BUCKET_UNKNOWN]
+    ages = dict.fromkeys(labels, 0)
+    for age, count in db.execute(select(FamilyMember.age, func.count()).group_by(FamilyMember.age)):
+        if age is None:
+            label = AGE_BUCKET_UNKNOWN
+        else:
+            label = next((label for label, max_age in MEMBER_AGE_BUCKETS if age <= max_age), MEMBER_AGE_OLDEST)
+        ages[label] += count
+    return {'members': members, 'cases_with_roster': cases_with_roster, 'by_size': by_size,
+            'by_relation': by_relation, 'member_age_buckets': ages}
+
+
+def compute_case_stats(db: Session, now: datetime | None = None) -> dict:
+    now = now or datetime.utcnow()
+    total, assigned, by_status = _count_by_status(db)
+    return {
+        'total': total,
+        'assigned': assigned,
+        'unassigned': total - assigned,
+        'by_status': by_status,
+        'by_category': _count_by_category(db),
+        'by_assignee': _count_by_assignee(db),
+        'age_buckets': _count_by_age(db, now.date()),
+        'completion': _completion(db),
+        'family': _family(db),
+        'generated_at': now,
+    }
+
+
+def get_case_stats(db: Session) -> dict:
+    """Cached `compute_case_stats`; the cache is cleared whenever a transaction writing cases commits."""
+    return stats_cache.get_or_compute('cases', lambda: compute_case_stats(db))
@@ -1,3 +1,4 @@
+import contextlib
 import os
 import pytest
 
@@ -5,6 +6,7 @@ import pytest
 os.environ['DATABASE_URL'] = os.getenv('DATABASE_URL', 'sqlite:///:memory:')
 
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from backend import api
 from backend.models import Base
 
@@ -17,3 +19,28 @@ def client():
         yield c
     # Drop tables after tests (safe for in-memory SQLite)
     Base.metadata.drop_all(bind=api.engine)
+
+
+@pytest.fixture
+def admin_headers(client):
+    res = client.post('/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert res.status_code == 200
+    return {'Authorization': f"Bearer {res.json()['token']}"}
+
+
+@pytest.fixture
+def statement_counter():
+    """`with statement_counter() as statements:` collects the SQL run on the test engine inside the block."""
+    @contextlib.contextmanager
+    def count():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(api.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(api.engine, 'before_cursor_execute', before_cursor_execute)
+    return count
@@ -0,0 +1,49 @@
+from backend.benchmarks import common, compare
+
+
+def _run(revision, **p50_by_scenario):
+    return {'meta': {'revision': revision, 'dialect': 'sqlite'},
+            'results': [{'scenario': name, 'rows': 1000, 'p50_ms': p50} for name, p50 in p50_by_scenario.items()]}
+
+
+def test_compare_flags_regressions_above_threshold_and_noise_floor():
+    base = _run('a', list_cases=100.0, get_case=0.5, login=300.0)
+    head = _run('b', list_cases=125.0, get_case=0.9, search=4.0)
+    rows = {row['scenario']: row for row in compare.compare(base, head, threshold=10, min_delta_ms=1)}
+    assert rows['list_cases']['regressed'] and rows['list_cases']['change_pct'] == 25.0
+    # +80% but under a millisecond is noise
+    assert not rows['get_case']['regressed']
+    assert rows['search']['base'] is None and rows['login']['head'] is None
+    assert not rows['search']['regressed'] and not rows['login']['regressed']
+
+
+def test_kobo_submission_is_a_webhook_envelope_with_a_roster(client):
+    res = client.post('/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    headers = {'Authorization': f"Bearer {res.json()['token']}"}
+    envelope = common.kobo_submission(3)
+    assert set(envelope['body']) >= {'case_id', 'beneficiary_name', 'group_fj2tt69_partnernu1_3_1_partner_name'}
+    res = client.post('/cases', json={'title': 'Kobo Submission', 'raw': envelope}, headers=headers)
+    assert res.status_code == 201
+    try:
+        case = res.json()
+        assert case['case_number'] == 'BENCH-000003'
+        assert case['raw']['group_fj2tt69_partnernu1_3_1_partner_name'] == 'فرد 3_1 3'
+    finally:
+        client.delete(f"/cases/{res.json()['id']}", headers=headers)
+
+
+def test_load_step_verdicts():
+    from argparse import Namespace
+
+    from backend.benchmarks import loadtest
+
+    args = Namespace(slo_p95_ms=500, max_error_rate=0.01)
+    samples = [(0.0, 'GET /cases', 100.0, True, 200)] * 99 + [(0.0, 'POST /cases', 900.0, False, 503)]
+    step = loadtest.step_report(10, samples, 10.0)
+    assert step['overall']['rps'] == 10.0
+    assert step['endpoints']['POST /cases']['error_statuses'] == {'503': 1}
+    assert loadtest.verdict(step, None, args) is None
+    assert loadtest.verdict(loadtest.step_report(10, samples[-2:], 10.0), None, args).startswith('p95')
+    # twice the users, barely more throughput
+    more_users = loadtest.step_report(20, samples + samples[:5], 10.0)
+    assert loadtest.verdict(more_users, step, args).startswith('throughput plateaued')
@@ -0,0 +1,69 @@
+import io
+
+from openpyxl import Workbook
+
+from backend.names import normalize_name
+
+
+def test_normalize_name_folds_arabic_spelling_variants():
+    assert normalize_name('أحمد') == normalize_name('احمد') == normalize_name('إحمد')
+    assert normalize_name('فاطمة') == normalize_name('فاطمه')
+    assert normalize_name('مصطفى') == normalize_name('مصطفي')
+    assert normalize_name('مُحَمَّد') == normalize_name('محمد')
+    assert normalize_name('عـــلي') == 'علي'
+    assert normalize_name('  Ahmad   AL-Ali ') == 'ahmad al ali'
+
+
+def test_possible_duplicates_match_spelling_variants(client, admin_headers):
+    res = client.post('/cases', json={
+        'title': 'Dup original',
+        'raw': {'beneficiary_name': 'فاطمة', 'beneficiary_last_name': 'الأسعد'},
+    }, headers=admin_headers)
+    assert res.status_code == 201
+    original_id = res.json()['id']
+    res = client.post('/cases', json={
+        'title': 'Dup variant',
+        'raw': {'body': {'beneficiary_name': 'فاطِمه', 'beneficiary_last_name': 'الاسعد'}},
+    }, headers=admin_headers)
+    assert res.status_code == 201
+    variant_id = res.json()['id']
+    client.post('/cases', json={'title': 'Dup other', 'raw': {'beneficiary_name': 'يوسف'}}, headers=admin_headers)
+
+    res = client.get('/cases/duplicates', params={'name': 'فاطمة الأسعد'})
+    assert res.status_code == 200
+    ids = [m['case_id'] for m in res.json()]
+    assert original_id in ids and variant_id in ids
+    assert all(m['score'] == 1.0 for m in res.json() if m['case_id'] in (original_id, variant_id))
+
+    res = client.get(f'/cases/{original_id}/duplicates')
+    assert [m['case_id'] for m in res.json()] == [variant_id]
+
+    # renaming the beneficiary refreshes the index
+    res = client.put(f'/cases/{variant_id}', json={'raw': {'beneficiary_name': 'يوسف'}}, headers=admin_headers)
+    assert res.status_code == 200
+    assert client.get(f'/cases/{original_id}/duplicates').json() == []
+
+    assert client.get('/cases/999999/duplicates').status_code == 404
+
+
+def test_import_reports_possible_name_duplicates(client, admin_headers):
+    res = client.post('/cases', json={'title': 'Imported dup target', 'raw': {'beneficiary_name': 'إبراهيم'}},
+                      headers=admin_headers)
+    target_id = res.json()['id']
+
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Title', 'beneficiary_name', '_uuid'])
+    ws.append(['Row one', 'ابراهيم', 'dup-import-uuid-1'])
+    ws.append(['Row two', 'سلمى', 'dup-import-uuid-2'])
+    stream = io.BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+    files = {'file': ('dups.xlsx', stream, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')}
+    res = client.post('/import', headers=admin_headers, files=files)
+    assert res.status_code == 200
+    body = res.json()
+    assert body['imported'] == 2
+    flagged = {d['row']: d['case_ids'] for d in body['possible_duplicates']}
+    assert target_id in flagged.get(2, [])
+    assert 3 not in flagged
@@ -0,0 +1,112 @@
+from backend import api
+
+
+def _create_users(client, headers, ability, count):
+    ids = []
+    for i in range(count):
+        payload = {'name': f'{ability}-{i}', 'ability': ability, 'password': 'Str0ngPassw0rd!'}
+        res = client.post('/users', json=payload, headers=headers)
+        assert res.status_code == 201
+        ids.append(res.json()['id'])
+    return ids
+
+
+def _create_cases(client, headers, count, status='Pending'):
+    ids = []
+    for i in range(count):
+        res = client.post('/cases', json={'title': f'Auto assign {i}', 'status': status}, headers=headers)
+        assert res.status_code == 201
+        ids.append(res.json()['id'])
+    return ids
+
+
+def test_single_assignment_by_ability_picks_least_loaded_user(client, admin_headers):
+    first, second = _create_users(client, admin_headers, 'aa-single', 2)
+    busy, new = _create_cases(client, admin_headers, 2, status='open')
+    assert client.post(f'/cases/{busy}/assign', json={'user': 'aa-single-0'}, headers=admin_headers).status_code == 200
+
+    res = client.post(f'/cases/{new}/assign', json={'ability': 'aa-single'}, headers=admin_headers)
+    assert res.status_code == 200
+    assert res.json()['assigned_to']['id'] == second
+
+
+def test_batch_least_loaded_balances_open_cases(client, admin_headers):
+    users = _create_users(client, admin_headers, 'aa-balance', 3)
+    for case_id in _create_cases(client, admin_headers, 2, status='open'):
+        client.post(f'/cases/{case_id}/assign', json={'user': 'aa-balance-0'}, headers=admin_headers)
+    case_ids = _create_cases(client, admin_headers, 7)
+
+    res = client.post('/cases/auto-assign', json={'ability': 'aa-balance', 'case_ids': case_ids}, headers=admin_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert body['assigned'] == 7 and body['strategy'] == 'least_loaded'
+    assert {a['case_id'] for a in body['assignments']} == set(case_ids)
+    assert sorted(c['count'] for c in body['open_cases']) == [3, 3, 3]
+    assert sum(1 for a in body['assignments'] if a['user_id'] == users[0]) == 1
+
+    case = client.get(f'/cases/{case_ids[0]}', headers=admin_headers).json()
+    assert case['assigned_to']['name'].startswith('aa-balance-')
+    comments = client.get(f'/cases/{case_ids[0]}/comments').json()
+    assert comments[-1]['content'] == f"Assigned to {case['assigned_to']['name']}"
+
+    # already assigned cases are left alone
+    again = client.post('/cases/auto-assign', json={'ability': 'aa-balance', 'case_ids': case_ids},
+                        headers=admin_headers)
+    assert again.json()['assigned'] == 0
+
+
+def test_round_robin_resumes_after_last_assignee(client, admin_headers):
+    users = _create_users(client, admin_headers, 'aa-rr', 3)
+    case_ids = _create_cases(client, admin_headers, 4)
+    payload = {'ability': 'aa-rr', 'strategy': 'round_robin', 'case_ids': case_ids[:2]}
+    res = client.post('/cases/auto-assign', json=payload, headers=admin_headers)
+    assert [a['user_id'] for a in res.json()['assignments']] == users[:2]
+
+    payload['case_ids'] = case_ids[2:]
+    res = client.post('/cases/auto-assign', json=payload, headers=admin_headers)
+    assert [a['user_id'] for a in res.json()['assignments']] == [users[2], users[0]]
+
+
+def test_batch_uses_constant_statements(client, admin_headers, statement_counter):
+    _create_users(client, admin_headers, 'aa-const', 2)
+    small = _create_cases(client, admin_headers, 2)
+    large = _create_cases(client, admin_headers, 12)
+
+    def run(case_ids):
+        payload = {'ability': 'aa-const', 'case_ids': case_ids}
+        return client.post('/cases/auto-assign', json=payload, headers=admin_headers)
+
+    with statement_counter() as small_statements:
+        res_small = run(small)
+    with statement_counter() as large_statements:
+        res_large = run(large)
+    assert res_small.json()['assigned'] == 2 and res_large.json()['assigned'] == 12
+    # the rotation cursor row is inserted by the first batch and may be unchanged by the second
+    assert len(large_statements) <= len(small_statements)
+
+
+def test_auto_assign_errors(client, admin_headers):
+    res = client.post('/cases/auto-assign', json={'ability': 'aa-nobody'}, headers=admin_headers)
+    assert res.status_code == 404
+    _create_users(client, admin_headers, 'aa-errors', 1)
+    res = client.post('/cases/auto-assign', json={'ability': 'aa-errors', 'strategy': 'random'}, headers=admin_headers)
+    assert res.status_code == 400
+
+
+def test_cursor_is_upserted_and_locked(client, statement_counter):
+    from backend import assignment
+    from backend.models import AssignmentCursor
+
+    db = api.SessionLocal()
+    try:
+        with statement_counter() as statements:
+            cursor = assignment.lock_cursor(db, 'aa-cursor')
+        assert cursor.ability == 'aa-cursor' and cursor.last_user_id is None
+        assert any('ON CONFLICT' in s.upper() for s in statements)
+        # a second run (as a concurrent request would) finds the row instead of inserting a duplicate
+        db.commit()
+        assert assignment.lock_cursor(db, 'aa-cursor') is not None
+        db.commit()
+        assert db.query(AssignmentCursor).filter_by(ability='aa-cursor').count() == 1
+    finally:
+        db.close()
@@ -0,0 +1,81 @@
+from sqlalchemy import inspect
+
+from backend import api
+from backend.models import Case
+from backend.raw_fields import decode_body_backup, encode_body_backup, promote_wrapper_fields
+from backend.scripts.migration_promote_raw import apply_backfill, rollback_backfill
+
+
+def _big_body(tag):
+    return {f'question_{n}': f'{tag} إجابة طويلة رقم {n}' for n in range(40)}
+
+
+def test_body_backup_is_compressed_and_round_trips():
+    body = _big_body('roundtrip')
+    encoded = encode_body_backup(body)
+    assert set(encoded) == {'$zlib'}
+    assert decode_body_backup(encoded) == body
+    small = {'caseNumber': 'S-1'}
+    assert encode_body_backup(small) == small
+    assert decode_body_backup(small) == small
+    raw = promote_wrapper_fields({'body': dict(body, caseNumber='RT-1')})
+    assert raw['caseNumber'] == 'RT-1'
+    assert decode_body_backup(raw['_body_backup'])['caseNumber'] == 'RT-1'
+
+
+def test_rollback_restores_compressed_backup(client):
+    db = api.SessionLocal()
+    body = dict(_big_body('rollback'), caseNumber='MIG-ZIP')
+    c = Case(title='Compressed Backup Case', raw={'body': body})
+    db.add(c)
+    db.commit()
+    apply_backfill(db, dry_run=False)
+    db.refresh(c)
+    assert set(c.raw['_body_backup']) == {'$zlib'}
+    assert rollback_backfill(db) >= 1
+    db.refresh(c)
+    assert c.raw == {'body': body}
+    db.close()
+
+
+def test_raw_is_not_loaded_by_status_only_paths(client, admin_headers, statement_counter):
+    payload = {'title': 'Deferred raw', 'raw': {'body': _big_body('deferred')}}
+    res = client.post('/cases', json=payload, headers=admin_headers)
+    case_id = res.json()['id']
+
+    db = api.SessionLocal()
+    case = db.get(Case, case_id)
+    assert 'raw' in inspect(case).unloaded
+    db.close()
+
+    with statement_counter() as statements:
+        res = client.post(f'/cases/{case_id}/comments', json={'content': 'note'}, headers=admin_headers)
+    assert res.status_code == 201
+    case_selects = [s for s in statements if s.lstrip().upper().startswith('SELECT') and 'FROM cases' in s]
+    assert case_selects and all('cases.raw' not in s for s in case_selects)
+
+    # endpoints that return raw still include it
+    assert client.get(f'/cases/{case_id}').json()['raw']['question_1'].startswith('deferred')
+    listed = next(c for c in client.get('/cases', headers=admin_headers).json() if c['id'] == case_id)
+    assert listed['raw']['question_1'].startswith('deferred')
+
+
+def test_responses_return_the_body_backup_decoded(client, admin_headers):
+    body = dict(_big_body('response'), caseNumber='RESP-ZIP')
+    res = client.post('/cases', json={'title': 'Decoded backup', 'raw': {'body': body}}, headers=admin_headers)
+    case_id = res.json()['id']
+    try:
+        db = api.SessionLocal()
+        assert set(db.get(Case, case_id).raw['_body_backup']) == {'$zlib'}
+        db.close()
+        # write endpoints answer with the same raw shape as reads
+        assert res.json()['raw']['_body_backup'] == body
+        res = client.put(f'/cases/{case_id}', json={'raw': {'body': body}}, headers=admin_headers)
+        assert res.json()['raw']['_body_backup'] == body
+        res = client.post(f'/cases/{case_id}/assign', json={'user': 'admin'}, headers=admin_headers)
+        assert res.status_code == 200 and res.json()['raw']['_body_backup'] == body
+        assert client.get(f'/cases/{case_id}', headers=admin_headers).json()['raw']['_body_backup'] == body
+        listed = next(c for c in client.get('/cases', headers=admin_headers).json() if c['id'] == case_id)
+        assert listed['raw']['_body_backup'] == body
+    finally:
+        client.delete(f'/cases/{case_id}', headers=admin_headers)
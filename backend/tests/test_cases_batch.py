@@ -0,0 +1,93 @@
+def _create_cases(client, headers, count, prefix='Batch case'):
+    ids = []
+    for i in range(count):
+        res = client.post('/cases', json={'title': f'{prefix} {i}', 'status': 'Pending'}, headers=headers)
+        assert res.status_code == 201
+        ids.append(res.json()['id'])
+    return ids
+
+
+def test_batch_status_changes_keep_resolve_comment_rule(client, admin_headers):
+    review, resolved, rejected = _create_cases(client, admin_headers, 3)
+    before = client.get('/cases/stats').json()['by_status']
+    res = client.post('/cases/batch', json={'operations': [
+        {'op': 'status', 'case_id': review, 'status': 'In Review'},
+        {'op': 'status', 'case_id': resolved, 'status': 'Completed', 'resolve_comment': 'batch resolved ok'},
+        {'op': 'status', 'case_id': rejected, 'status': 'Closed'},
+        {'op': 'status', 'case_id': 99999999, 'status': 'In Review'},
+    ]}, headers=admin_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert (body['applied'], body['failed']) == (2, 2)
+    assert [r['status_code'] for r in body['results']] == [200, 200, 400, 404]
+    assert 'Resolve comment is required' in body['results'][2]['detail']
+
+    assert client.get(f'/cases/{review}', headers=admin_headers).json()['status'] == 'In Review'
+    done = client.get(f'/cases/{resolved}', headers=admin_headers).json()
+    assert done['status'] == 'Completed' and done['completed_at'] is not None
+    assert [c['content'] for c in client.get(f'/cases/{resolved}/comments').json()] == ['batch resolved ok']
+    assert client.get(f'/cases/{rejected}', headers=admin_headers).json()['status'] == 'Pending'
+
+    # bulk statements still invalidate the cached dashboard numbers and refresh search documents
+    after = client.get('/cases/stats').json()['by_status']
+    assert after.get('In Review', 0) == before.get('In Review', 0) + 1
+    found = client.get('/cases/search', params={'q': 'batch resolved'}).json()['items']
+    assert [c['id'] for c in found] == [resolved]
+
+
+def test_batch_assign_and_delete(client, admin_headers):
+    res = client.post('/users', json={'name': 'batch-zeta', 'ability': 'batch-team', 'password': 'Str0ngPassw0rd!'},
+                      headers=admin_headers)
+    zeta = res.json()['id']
+    by_id, by_ability, removed = _create_cases(client, admin_headers, 3)
+    res = client.post('/cases/batch', json={'operations': [
+        {'op': 'assign', 'case_id': by_id, 'user_id': zeta},
+        {'op': 'assign', 'case_id': by_ability, 'ability': 'batch-team'},
+        {'op': 'assign', 'case_id': removed, 'user': 'batch-new-person'},
+        {'op': 'delete', 'case_id': removed},
+        {'op': 'status', 'case_id': removed, 'status': 'In Review'},
+    ]}, headers=admin_headers)
+    results = res.json()['results']
+    assert [r['ok'] for r in results] == [True, True, True, True, False]
+    assert results[4]['status_code'] == 409
+    assert results[0]['assigned_to_id'] == zeta and results[1]['assigned_to_id'] == zeta
+
+    case = client.get(f'/cases/{by_ability}', headers=admin_headers).json()
+    assert case['assigned_to']['name'] == 'batch-zeta'
+    assert client.get(f'/cases/{by_ability}/comments').json()[-1]['content'] == 'Assigned to batch-zeta'
+    assert client.get(f'/cases/{removed}', headers=admin_headers).status_code == 404
+    assert 'batch-new-person' in {u['name'] for u in client.get('/users').json()}
+
+
+def test_batch_delete_requires_admin_or_internal(client, admin_headers):
+    case_id = _create_cases(client, admin_headers, 1)[0]
+    res = client.post('/auth/register', json={'username': 'batch_plain', 'email': 'batch_plain@example.org',
+                                              'password': 'Str0ngPassw0rd!'})
+    plain = {'Authorization': f"Bearer {res.json()['token']}"}
+    res = client.post('/cases/batch', json={'operations': [{'op': 'delete', 'case_id': case_id}]}, headers=plain)
+    assert res.status_code == 200
+    assert res.json()['results'][0]['status_code'] == 403
+    assert client.get(f'/cases/{case_id}', headers=admin_headers).status_code == 200
+
+
+def test_batch_statement_count_does_not_grow_with_size(client, admin_headers, statement_counter):
+
+    def run(case_ids):
+        operations = [{'op': 'status', 'case_id': case_id, 'status': 'Completed', 'resolve_comment': 'bulk close'}
+                      for case_id in case_ids]
+        return client.post('/cases/batch', json={'operations': operations}, headers=admin_headers)
+
+    small = _create_cases(client, admin_headers, 2)
+    large = _create_cases(client, admin_headers, 20)
+    with statement_counter() as small_statements:
+        res_small = run(small)
+    with statement_counter() as large_statements:
+        res_large = run(large)
+    assert res_small.json()['applied'] == 2 and res_large.json()['applied'] == 20
+    assert len(large_statements) == len(small_statements)
+
+
+def test_batch_rejects_empty_and_oversized_requests(client, admin_headers):
+    assert client.post('/cases/batch', json={'operations': []}, headers=admin_headers).status_code == 400
+    operations = [{'op': 'status', 'case_id': 1, 'status': 'x'}] * 501
+    assert client.post('/cases/batch', json={'operations': operations}, headers=admin_headers).status_code == 400
@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+
+
+def test_export_ndjson_streams_flattened_and_redacted_rows(client, admin_headers):
+    payload = {
+        'title': 'Export NDJSON case',
+        'raw': {'body': {'case_id': 'EXP-1', 'beneficiary_name': 'سارة', 'id_card_nu': 'SECRET-1'}},
+    }
+    res = client.post('/cases', json=payload, headers=admin_headers)
+    assert res.status_code == 201
+    case_id = res.json()['id']
+
+    # anonymous export hides sensitive keys
+    res = client.get('/cases/export?format=ndjson')
+    assert res.status_code == 200
+    assert res.headers['content-type'].startswith('application/x-ndjson')
+    lines = [json.loads(line) for line in res.text.splitlines() if line.strip()]
+    found = next(r for r in lines if r['id'] == case_id)
+    assert found['raw']['case_id'] == 'EXP-1'
+    assert found['raw']['beneficiary_name'] == 'سارة'
+    assert 'id_card_nu' not in found['raw']
+
+    # admin export keeps them
+    res = client.get('/cases/export?format=ndjson', headers=admin_headers)
+    found = next(json.loads(line) for line in res.text.splitlines() if json.loads(line)['id'] == case_id)
+    assert found['raw']['id_card_nu'] == 'SECRET-1'
+
+
+def test_export_csv_with_selected_raw_columns(client, admin_headers):
+    payload = {'title': 'Export CSV case', 'raw': {'case_id': 'EXP-2', 'family': [{'name': 'Ali'}]}}
+    res = client.post('/cases', json=payload, headers=admin_headers)
+    assert res.status_code == 201
+
+    res = client.get('/cases/export?format=csv&columns=id,title,status,case_id,family')
+    assert res.status_code == 200
+    assert res.headers['content-type'].startswith('text/csv')
+    rows = list(csv.DictReader(io.StringIO(res.text.lstrip('\ufeff'))))
+    row = next(r for r in rows if r['title'] == 'Export CSV case')
+    assert row['case_id'] == 'EXP-2'
+    assert json.loads(row['family']) == [{'name': 'Ali'}]
+
+    # default columns include flattened raw keys discovered from the table
+    res = client.get('/cases/export?format=csv')
+    header = next(csv.reader(io.StringIO(res.text.lstrip('\ufeff'))))
+    assert header[:3] == ['id', 'title', 'description']
+    assert 'case_id' in header
+    assert 'id_card_nu' not in header
+
+
+def test_export_rejects_unknown_format(client):
+    res = client.get('/cases/export?format=pdf')
+    assert res.status_code == 400
+
+
+def test_export_xlsx_mirrors_raw_headers(client, admin_headers):
+    from openpyxl import load_workbook
+
+    payload = {'title': 'Export XLSX case', 'raw': {'case_id': 'EXP-3', 'beneficiary_name': 'محمد'}}
+    res = client.post('/cases', json=payload, headers=admin_headers)
+    assert res.status_code == 201
+
+    res = client.get('/cases/export?format=xlsx')
+    assert res.status_code == 200
+    assert res.headers['content-type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    wb = load_workbook(io.BytesIO(res.content), read_only=True)
+    rows = list(wb.active.iter_rows(values_only=True))
+    header = list(rows[0])
+    # raw keys lead, case status and assignee follow
+    assert header.index('case_id') < header.index('status')
+    assert 'assigned_to' in header
+    row = next(dict(zip(header, r)) for r in rows[1:] if r[header.index('title')] == 'Export XLSX case')
+    assert row['case_id'] == 'EXP-3'
+    assert row['beneficiary_name'] == 'محمد'
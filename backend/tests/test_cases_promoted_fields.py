@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from backend.raw_fields import parse_submission_time, promoted_values
+
+
+def test_promoted_values_read_aliases_and_wrapped_body():
+    values = promoted_values({
+        'body': {'caseNumber': 'HLP-9', 'law_followup': 'housing', 'beneficiary_name': 'سلمى',
+                 'beneficiary_last_name': 'الخطيب'},
+        'submissiontime': 1735725600000,
+    })
+    assert values == {
+        'category': 'housing',
+        'case_number': 'HLP-9',
+        'beneficiary_name': 'سلمى الخطيب',
+        'submitted_at': datetime(2025, 1, 1, 10, 0),
+    }
+    assert promoted_values(None)['category'] is None
+    assert parse_submission_time('2025-01-01 12:00:00') == datetime(2025, 1, 1, 12, 0)
+    assert parse_submission_time('2025-01-01T12:00:00+02:00') == datetime(2025, 1, 1, 10, 0)
+    assert parse_submission_time('not a date') is None
+
+
+def test_list_filters_use_promoted_columns(client, admin_headers):
+    created = []
+    for i, submitted in enumerate(('2024-03-01T08:00:00Z', '2024-03-05T08:00:00Z', '2024-04-01T08:00:00Z')):
+        raw = {'case_number': f'PROMO-{i}', 'case_category': 'promo-cat', '_submission_time': submitted}
+        res = client.post('/cases', json={'title': f'Promoted {i}', 'status': 'promo-status', 'raw': raw},
+                          headers=admin_headers)
+        assert res.status_code == 201
+        body = res.json()
+        assert body['case_number'] == f'PROMO-{i}'
+        assert body['category'] == 'promo-cat'
+        created.append(body['id'])
+
+    res = client.get('/cases', params={'category': 'promo-cat', 'sort': '-submitted_at'}, headers=admin_headers)
+    assert res.status_code == 200
+    assert [c['id'] for c in res.json()] == created[::-1]
+
+    res = client.get('/cases', params={'category': 'promo-cat', 'submitted_from': '2024-03-02T00:00:00Z',
+                                       'submitted_to': '2024-04-01T00:00:00Z'}, headers=admin_headers)
+    assert [c['id'] for c in res.json()] == [created[1]]
+
+    res = client.get('/cases', params={'case_number': 'PROMO-2', 'status': 'promo-status'}, headers=admin_headers)
+    assert [c['id'] for c in res.json()] == [created[2]]
+
+    # editing raw keeps the typed columns in sync
+    res = client.put(f'/cases/{created[2]}', json={'raw': {'case_number': 'PROMO-2b'}}, headers=admin_headers)
+    assert res.status_code == 200
+    assert res.json()['case_number'] == 'PROMO-2b'
+    assert res.json()['category'] is None
+    assert client.get('/cases', params={'case_number': 'PROMO-2'}).json() == []
+
+    assert client.get('/cases', params={'sort': 'raw'}).status_code == 400
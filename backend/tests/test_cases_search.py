@@ -0,0 +1,56 @@
+def test_search_matches_title_raw_fields_and_comments(client, admin_headers):
+    res = client.post('/cases', json={
+        'title': 'Search target',
+        'description': 'boundary dispute in Aleppo',
+        'raw': {'body': {'case_id': 'SRCH-77', 'beneficiary_name': 'خالد', 'id_card_nu': '99887766'}},
+    }, headers=admin_headers)
+    assert res.status_code == 201
+    case_id = res.json()['id']
+    client.post('/cases', json={'title': 'Unrelated search noise', 'description': 'other'}, headers=admin_headers)
+
+    # case number promoted from the wrapped body becomes the title and is searchable
+    res = client.get('/cases/search', params={'q': 'SRCH-77'})
+    assert res.status_code == 200
+    data = res.json()
+    assert data['total'] >= 1
+    assert data['items'][0]['id'] == case_id
+    assert 'id_card_nu' not in data['items'][0]['raw']
+
+    assert any(c['id'] == case_id for c in client.get('/cases/search', params={'q': 'خالد'}).json()['items'])
+    assert any(c['id'] == case_id for c in client.get('/cases/search', params={'q': 'Alep'}).json()['items'])
+
+    # sensitive document numbers are not indexed
+    assert client.get('/cases/search', params={'q': '99887766'}).json()['total'] == 0
+
+    # comment text is indexed as soon as the comment is written
+    assert client.get('/cases/search', params={'q': 'tenancy'}).json()['total'] == 0
+    res = client.post(f'/cases/{case_id}/comments', json={'content': 'tenancy contract received'},
+                      headers=admin_headers)
+    assert res.status_code == 201
+    ids = [c['id'] for c in client.get('/cases/search', params={'q': 'tenancy'}).json()['items']]
+    assert ids == [case_id]
+
+    # updates rebuild the document
+    res = client.put(f'/cases/{case_id}', json={'description': 'inheritance question'}, headers=admin_headers)
+    assert res.status_code == 200
+    assert client.get('/cases/search', params={'q': 'Aleppo'}).json()['total'] == 0
+    ids = [c['id'] for c in client.get('/cases/search', params={'q': 'inheritance'}).json()['items']]
+    assert ids == [case_id]
+
+
+def test_search_paginates(client, admin_headers):
+    for i in range(3):
+        client.post('/cases', json={'title': f'Pagination marker {i}'}, headers=admin_headers)
+    first = client.get('/cases/search', params={'q': 'marker', 'limit': 2}).json()
+    second = client.get('/cases/search', params={'q': 'marker', 'limit': 2, 'offset': 2}).json()
+    assert first['total'] == 3
+    assert len(first['items']) == 2
+    assert len(second['items']) == 1
+    assert not {c['id'] for c in first['items']} & {c['id'] for c in second['items']}
+
+
+def test_search_ignores_operator_input(client):
+    res = client.get('/cases/search', params={'q': '"* OR NEAR('})
+    assert res.status_code == 200
+    empty = client.get('/cases/search', params={'q': '!!!'}).json()
+    assert empty == {'total': 0, 'limit': 20, 'offset': 0, 'items': []}
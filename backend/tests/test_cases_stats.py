@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from backend.cache import TTLCache
+
+
+def test_case_stats_aggregates_match_cases(client, admin_headers):
+    before = client.get('/cases/stats').json()
+    old = (datetime.utcnow() - timedelta(days=200)).isoformat() + 'Z'
+    recent = (datetime.utcnow() - timedelta(days=2)).isoformat() + 'Z'
+    payloads = [
+        {'title': 'Stats A', 'status': 'stats-open', 'raw': {'law_followup1': 'stats-cat-a', '_submission_time': old}},
+        {'title': 'Stats B', 'status': 'stats-open',
+         'raw': {'body': {'law_followup5': 'stats-cat-a', 'eng_followup1': 'stats-cat-b', '_submission_time': recent}}},
+        {'title': 'Stats C', 'status': 'stats-review', 'raw': {'eng_followup1': 'stats-cat-b'}},
+    ]
+    for payload in payloads:
+        assert client.post('/cases', json=payload, headers=admin_headers).status_code == 201
+
+    res = client.get('/cases/stats')
+    assert res.status_code == 200
+    body = res.json()
+    assert body['total'] == before['total'] + 3
+    assert body['total'] == len(client.get('/cases', headers=admin_headers).json())
+    assert body['assigned'] + body['unassigned'] == body['total']
+    assert body['by_status']['stats-open'] == 2
+    assert body['by_status']['stats-review'] == 1
+    # one category per case: law follow-ups take precedence over the engineering follow-up
+    assert body['by_category']['stats-cat-a'] == 2
+    assert body['by_category']['stats-cat-b'] == 1
+    assert body['age_buckets']['91+'] == before['age_buckets']['91+'] + 1
+    # the case without a submission time is aged from created_at (today)
+    assert body['age_buckets']['0-7'] == before['age_buckets']['0-7'] + 2
+    assert sum(body['age_buckets'].values()) == body['total']
+
+
+def test_case_stats_cache_invalidated_on_writes(client, admin_headers):
+    first = client.get('/cases/stats').json()
+    # served from cache while nothing changes
+    assert client.get('/cases/stats').json()['generated_at'] == first['generated_at']
+
+    res = client.post('/cases', json={'title': 'Stats cached'}, headers=admin_headers)
+    case_id = res.json()['id']
+    second = client.get('/cases/stats').json()
+    assert second['total'] == first['total'] + 1
+
+    payload = {'status': 'Completed', 'resolve_comment': 'done'}
+    res = client.put(f'/cases/{case_id}', json=payload, headers=admin_headers)
+    assert res.status_code == 200
+    third = client.get('/cases/stats').json()
+    assert third['by_status']['Completed'] == second['by_status'].get('Completed', 0) + 1
+    assert third['completion']['completed'] == second['completion']['completed'] + 1
+    assert third['completion']['avg_days'] is not None
+
+    assert client.delete(f'/cases/{case_id}', headers=admin_headers).status_code == 200
+    assert client.get('/cases/stats').json()['total'] == first['total']
+
+
+def test_stats_cache_ignores_results_computed_before_invalidation():
+    cache = TTLCache(ttl=60)
+
+    def compute():
+        cache.invalidate()  # a write committed while the query was running
+        return 'stale'
+
+    assert cache.get_or_compute('k', compute) == 'stale'
+    assert cache.get('k') is None
+    assert cache.get_or_compute('k', lambda: 'fresh') == 'fresh'
+    assert cache.get('k') == 'fresh'
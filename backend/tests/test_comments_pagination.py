@@ -0,0 +1,61 @@
+def _case_with_comments(client, headers, count):
+    case_id = client.post('/cases', json={'title': 'Comment pages'}, headers=headers).json()['id']
+    for i in range(count):
+        res = client.post(f'/cases/{case_id}/comments', json={'content': f'note {i}'}, headers=headers)
+        assert res.status_code == 201
+    return case_id
+
+
+def test_comments_cursor_pagination(client, admin_headers):
+    case_id = _case_with_comments(client, admin_headers, 5)
+
+    everything = client.get(f'/cases/{case_id}/comments')
+    assert [c['content'] for c in everything.json()] == [f'note {i}' for i in range(5)]
+    assert everything.headers['X-Total-Count'] == '5'
+    assert 'X-Next-Cursor' not in everything.headers
+
+    seen, cursor = [], None
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        res = client.get(f'/cases/{case_id}/comments', params=params)
+        assert res.status_code == 200
+        seen.extend(c['content'] for c in res.json())
+        cursor = res.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert seen == [f'note {i}' for i in range(5)]
+
+    assert client.get(f'/cases/{case_id}/comments', params={'cursor': 'not-a-cursor'}).status_code == 400
+
+
+def test_comments_after_returns_only_newer(client, admin_headers):
+    case_id = _case_with_comments(client, admin_headers, 2)
+    last_seen = client.get(f'/cases/{case_id}/comments').json()[-1]['id']
+    assert client.get(f'/cases/{case_id}/comments', params={'after': last_seen}).json() == []
+
+    client.post(f'/cases/{case_id}/comments', json={'content': 'fresh'}, headers=admin_headers)
+    newer = client.get(f'/cases/{case_id}/comments', params={'after': last_seen}).json()
+    assert [c['content'] for c in newer] == ['fresh']
+
+
+def test_comment_authors_are_eager_loaded(client, admin_headers, statement_counter):
+    case_id = _case_with_comments(client, admin_headers, 6)
+    with statement_counter() as statements:
+        res = client.get(f'/cases/{case_id}/comments')
+    assert all(c['user'] and c['user']['username'] == 'admin' for c in res.json())
+    # comments with authors, plus the case's comment count
+    assert len(statements) == 2
+
+
+def test_comment_count_maintained_on_cases(client, admin_headers):
+    case_id = _case_with_comments(client, admin_headers, 3)
+    assert client.get(f'/cases/{case_id}', headers=admin_headers).json()['comment_count'] == 3
+
+    client.post(f'/cases/{case_id}/assign', json={'user': 'comment-count-user'}, headers=admin_headers)
+    client.post('/cases/batch', json={'operations': [
+        {'op': 'status', 'case_id': case_id, 'status': 'Closed', 'resolve_comment': 'closing'},
+        {'op': 'assign', 'case_id': case_id, 'user': 'comment-count-user'},
+    ]}, headers=admin_headers)
+    case = client.get(f'/cases/{case_id}', headers=admin_headers).json()
+    assert case['comment_count'] == 6
+    assert case['comment_count'] == len(client.get(f'/cases/{case_id}/comments').json())
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+
+from backend import api, deletion
+from backend.models import Case, Comment, ImportJob, ImportRow
+
+
+def _create_user(client, headers, name):
+    res = client.post('/users', json={'name': name, 'password': 'Str0ngPassw0rd!'}, headers=headers)
+    assert res.status_code == 201
+    return res.json()['id']
+
+
+def test_delete_user_with_many_cases_uses_fixed_statements(client, admin_headers, statement_counter):
+    user_id = _create_user(client, admin_headers, 'delete-many-owner')
+    now = datetime.utcnow()
+    with api.SessionLocal() as db:
+        db.execute(insert(Case), [{'title': f'owned {i}', 'status': 'Pending', 'assigned_to_id': user_id,
+                                   'created_at': now, 'updated_at': now} for i in range(10000)])
+        first_case = db.execute(select(func.min(Case.id)).where(Case.assigned_to_id == user_id)).scalar()
+        db.add(Comment(case_id=first_case, user_id=user_id, content='written by the deleted user'))
+        db.add(ImportJob(uploader_id=user_id, uploader_name='delete-many-owner', filename='owned.xlsx'))
+        db.commit()
+
+    with statement_counter() as statements:
+        res = client.delete(f'/users/{user_id}', headers=admin_headers)
+    assert res.status_code == 204
+    # auth lookup, user lookup, 3 UPDATEs and 1 DELETE; nothing per assigned case
+    assert len(statements) <= 8
+
+    with api.SessionLocal() as db:
+        assert db.execute(select(func.count()).where(Case.assigned_to_id == user_id)).scalar() == 0
+        assert db.execute(select(func.count()).where(Case.title.like('owned %'), Case.assigned_to_id.is_(None))
+                          ).scalar() == 10000
+        comment = db.execute(select(Comment).where(Comment.content == 'written by the deleted user')).scalar_one()
+        assert comment.user_id is None
+        job = db.execute(select(ImportJob).where(ImportJob.filename == 'owned.xlsx')).scalar_one()
+        assert job.uploader_id is None and job.uploader_name == 'delete-many-owner'
+    assert 'delete-many-owner' not in {u['name'] for u in client.get('/users').json()}
+
+    # keep the shared test database small for the tests that list every case
+    with api.SessionLocal() as db:
+        owned = db.execute(select(Case.id).where(Case.title.like('owned %'))).scalars().all()
+        assert deletion.delete_cases(db, owned)['deleted_cases'] == 10000
+        db.commit()
+
+
+def test_delete_user_reassigns_cases(client, admin_headers):
+    leaving = _create_user(client, admin_headers, 'delete-leaving')
+    successor = _create_user(client, admin_headers, 'delete-successor')
+    case_id = client.post('/cases', json={'title': 'Handed over'}, headers=admin_headers).json()['id']
+    client.post(f'/cases/{case_id}/assign', json={'user': 'delete-leaving'}, headers=admin_headers)
+
+    assert client.delete(f'/users/{leaving}', params={'reassign_to': leaving}, headers=admin_headers).status_code == 400
+    res = client.delete(f'/users/{leaving}', params={'reassign_to': 99999999}, headers=admin_headers)
+    assert res.status_code == 404
+    res = client.delete(f'/users/{leaving}', params={'reassign_to': successor}, headers=admin_headers)
+    assert res.status_code == 204
+    assert client.get(f'/cases/{case_id}', headers=admin_headers).json()['assigned_to']['id'] == successor
+
+
+def test_delete_case_removes_dependents(client, admin_headers):
+    res = client.post('/cases', json={'title': 'Delete me', 'raw': {'beneficiary_name': 'Delete Target'}},
+                      headers=admin_headers)
+    case_id = res.json()['id']
+    client.post(f'/cases/{case_id}/comments', json={'content': 'first'}, headers=admin_headers)
+    client.post(f'/cases/{case_id}/comments', json={'content': 'second'}, headers=admin_headers)
+    with api.SessionLocal() as db:
+        job = ImportJob(filename='delete-case.xlsx')
+        db.add(job)
+        db.flush()
+        db.add(ImportRow(job_id=job.id, row_number=2, status='success', case_id=case_id))
+        db.commit()
+
+    res = client.delete(f'/cases/{case_id}', headers=admin_headers)
+    assert res.status_code == 200
+    assert res.json()['deleted_comments'] == 2 and res.json()['updated_import_rows'] == 1
+    with api.SessionLocal() as db:
+        assert db.execute(select(func.count()).where(Comment.case_id == case_id)).scalar() == 0
+        assert db.execute(select(func.count()).where(ImportRow.case_id == case_id)).scalar() == 0
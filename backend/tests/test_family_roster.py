@@ -0,0 +1,78 @@
+from datetime import date
+
+from backend import api, roster
+from backend.models import FamilyMember
+
+
+def test_extract_roster_from_repeat_group_columns():
+    raw = {
+        'group_fj2tt69_partnernu1_3_1_partner_name': 'Omar',
+        'group_fj2tt69_partnernu1_3_1_partner_relation1': 'Child',
+        'group_fj2tt69_partnernu1_3_1_partner': '2020-03-01',
+        'group_fj2tt69_partnernu1_7_1_partner_name': 'سارة',
+        'group_fj2tt69_partnernu1_7_1_partner_lastname': 'العلي',
+        'group_fj2tt69_partnernu1_7_1_partner_relation1': 'wife',
+        'group_fj2tt69_partnernu1_7_1_partner': '1958',
+        # a flattened `group/slot/question` path repeating the prefix
+        'group_fj2tt69_partnernu1_12_1/group_fj2tt69_partnernu1_12_1_partner_name': 'Late entry',
+        'group_fj2tt69_partnernu1_5_1_partner_name': '',
+        'beneficiary_name': 'محمد',
+    }
+    members = roster.extract_roster(raw, reference=date(2025, 1, 1))
+    assert [m['slot'] for m in members] == ['7_1', '3_1', '12_1']
+    assert members[0] == {'slot': '7_1', 'name': 'سارة', 'last_name': 'العلي', 'relation': 'wife',
+                          'birth_date': date(1958, 1, 1), 'age': 67}
+    assert members[1]['relation'] == 'child' and members[1]['age'] == 4
+    assert members[2] == {'slot': '12_1', 'name': 'Late entry'}
+
+
+def test_extract_roster_from_wrapped_body_and_arrays():
+    wrapped = {'body': {'group_fj2tt69_partnernu1_1_partner_name': 'Ali'}, 'kobo_case_id': 'k-1'}
+    assert roster.extract_roster(wrapped) == [{'slot': '1', 'name': 'Ali'}]
+    array = {'formFields': {'family': [{'name': 'Huda', 'lastName': 'Saleh', 'relation': 'Daughter', 'age': '7'},
+                                       {'note': 'nothing usable'}]}}
+    assert roster.extract_roster(array) == [
+        {'slot': None, 'name': 'Huda', 'last_name': 'Saleh', 'relation': 'daughter', 'age': 7}]
+
+
+def test_roster_is_stored_at_ingest_and_filterable(client, admin_headers):
+    payload = {'title': 'Kobo Submission', 'raw': {'body': {
+        'case_number': 'ROSTER-1',
+        '_submission_time': '2025-01-01T10:00:00Z',
+        'group_fj2tt69_partnernu1_7_1_partner_name': 'Mona',
+        'group_fj2tt69_partnernu1_7_1_partner_relation1': 'wife',
+        'group_fj2tt69_partnernu1_5_1_partner_name': 'Sami',
+        'group_fj2tt69_partnernu1_5_1_partner_relation1': 'child',
+        'group_fj2tt69_partnernu1_5_1_partner': '2022-05-01',
+    }}}
+    res = client.post('/cases', json=payload, headers=admin_headers)
+    assert res.status_code == 201
+    case = res.json()
+    assert case['family_member_count'] == 2
+    try:
+        family = client.get(f"/cases/{case['id']}/family").json()
+        assert [(m['position'], m['name'], m['relation'], m['age']) for m in family] == [
+            (0, 'Mona', 'wife', None), (1, 'Sami', 'child', 2)]
+
+        ids = {c['id'] for c in client.get('/cases', params={'member_relation': 'Child', 'member_age_max': 4}).json()}
+        assert case['id'] in ids
+        assert case['id'] not in {c['id'] for c in client.get(
+            '/cases', params={'member_relation': 'child', 'member_age_min': 5}).json()}
+        assert case['id'] in {c['id'] for c in client.get('/cases', params={'family_size_min': 2}).json()}
+        stats = client.get('/cases/stats').json()['family']
+        assert stats['by_relation']['child'] >= 1 and stats['member_age_buckets']['0-4'] >= 1
+
+        # a raw update re-extracts the roster
+        raw = dict(case['raw'])
+        raw['group_fj2tt69_partnernu1_5_1_partner_name'] = ''
+        raw['group_fj2tt69_partnernu1_5_1_partner_relation1'] = ''
+        raw['group_fj2tt69_partnernu1_5_1_partner'] = ''
+        raw.pop('_body_backup', None)
+        res = client.put(f"/cases/{case['id']}", json={'title': case['title'], 'raw': raw}, headers=admin_headers)
+        assert res.status_code == 200 and res.json()['family_member_count'] == 1
+        assert [m['name'] for m in client.get(f"/cases/{case['id']}/family").json()] == ['Mona']
+    finally:
+        assert client.delete(f"/cases/{case['id']}", headers=admin_headers).status_code == 200
+    with api.SessionLocal() as db:
+        assert db.query(FamilyMember).filter(FamilyMember.case_id == case['id']).count() == 0
+    assert client.get(f"/cases/{case['id']}/family").status_code == 404
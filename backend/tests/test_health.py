@@ -0,0 +1,62 @@
+from backend import api, health
+from backend.models import ImportJob, ImportRow
+
+
+def test_live_does_not_touch_the_database(client, statement_counter):
+    with statement_counter() as statements:
+        assert client.get('/health/live').json() == {'status': 'ok'}
+    assert statements == []
+
+
+def test_ready_reports_checks_and_is_cached(client, statement_counter):
+    health.readiness_cache.invalidate()
+    res = client.get('/health/ready')
+    assert res.status_code == 200
+    body = res.json()
+    assert body['status'] == 'ok'
+    assert set(body['checks']) == {'database', 'pool', 'migrations', 'import_queue'}
+    # the test database is built with create_all, not Alembic
+    assert body['checks']['migrations']['state'] == 'unmanaged'
+    assert body['checks']['migrations']['head']
+
+    with statement_counter() as statements:
+        again = client.get('/health/ready').json()
+    assert statements == []
+    assert again['checked_at'] == body['checked_at']
+
+
+def test_ready_fails_on_import_backlog(client, monkeypatch):
+    with api.SessionLocal() as db:
+        job = ImportJob(filename='backlog.xlsx')
+        db.add(job)
+        db.flush()
+        db.add_all([ImportRow(job_id=job.id, row_number=i, status='pending') for i in range(3)])
+        db.commit()
+        job_id = job.id
+    try:
+        monkeypatch.setattr(health, 'HEALTH_MAX_PENDING_IMPORT_ROWS', 2)
+        health.readiness_cache.invalidate()
+        res = client.get('/health/ready')
+        assert res.status_code == 503
+        queue = res.json()['checks']['import_queue']
+        assert queue['ok'] is False and queue['pending_rows'] >= 3
+    finally:
+        with api.SessionLocal() as db:
+            db.query(ImportRow).filter(ImportRow.job_id == job_id).delete()
+            db.query(ImportJob).filter(ImportJob.id == job_id).delete()
+            db.commit()
+        health.readiness_cache.invalidate()
+
+
+def test_ready_fails_when_database_is_down(client, monkeypatch):
+    def broken(engine):
+        raise ConnectionError('db down')
+
+    monkeypatch.setattr(health, 'check_database', broken)
+    health.readiness_cache.invalidate()
+    try:
+        res = client.get('/health/ready')
+        assert res.status_code == 503
+        assert res.json()['checks'] == {'database': {'ok': False, 'error': 'ConnectionError'}}
+    finally:
+        health.readiness_cache.invalidate()
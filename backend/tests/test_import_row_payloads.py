@@ -0,0 +1,73 @@
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+from openpyxl import Workbook
+
+from backend import api, import_payloads
+from backend.models import ImportRow
+
+
+def _import(client, headers, titles):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['Title', 'notes'])
+    for t in titles:
+        ws.append([t, 'ملاحظات طويلة ' * 20])
+    stream = io.BytesIO()
+    wb.save(stream)
+    stream.seek(0)
+    files = {'file': ('payloads.xlsx', stream, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')}
+    res = client.post('/import', headers=headers, files=files)
+    assert res.status_code == 200
+    return res.json()['job_id']
+
+
+def test_import_row_payloads_are_compressed(client, admin_headers):
+    job_id = _import(client, admin_headers, ['Compressed row'])
+    db = api.SessionLocal()
+    row = db.query(ImportRow).filter(ImportRow.job_id == job_id).one()
+    assert row.raw is None
+    assert row.raw_zlib is not None and len(row.raw_zlib) < len(json.dumps(row.payload).encode())
+    db.close()
+    job = client.get(f'/import/jobs/{job_id}', headers=admin_headers).json()
+    assert job['rows'][0]['raw']['Title'] == 'Compressed row'
+    listed = next(j for j in client.get('/import/jobs').json() if j['id'] == job_id)
+    assert listed['total_rows'] == 1 and listed['success'] == 1
+
+
+def test_failed_only_mode_drops_successful_payloads(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(import_payloads, 'IMPORT_ROW_PAYLOAD_STORAGE', 'failed_only')
+    job_id = _import(client, admin_headers, ['Dropped payload'])
+    job = client.get(f'/import/jobs/{job_id}', headers=admin_headers).json()
+    assert job['rows'][0]['status'] == 'success'
+    assert job['rows'][0]['raw'] is None
+
+
+def test_prune_clears_old_successful_payloads(client, admin_headers, tmp_path):
+    old_job = _import(client, admin_headers, ['Old row 1', 'Old row 2'])
+    recent_job = _import(client, admin_headers, ['Recent row'])
+    db = api.SessionLocal()
+    db.query(ImportRow).filter(ImportRow.job_id == old_job).update(
+        {ImportRow.created_at: datetime.utcnow() - timedelta(days=400)}, synchronize_session=False)
+    db.commit()
+
+    dry = import_payloads.prune_import_payloads(db, older_than_days=365, dry_run=True)
+    assert dry['rows_pruned'] >= 2
+
+    archive = tmp_path / 'pruned.ndjson.gz'
+    metrics = import_payloads.prune_import_payloads(db, older_than_days=365, batch_size=1, archive_path=str(archive))
+    assert metrics['rows_pruned'] == dry['rows_pruned']
+    assert metrics['batches'] == metrics['rows_pruned']
+    assert metrics['payload_bytes_reclaimed'] > 0
+    with gzip.open(archive, 'rt', encoding='utf-8') as fh:
+        archived = [json.loads(line) for line in fh]
+    assert {'Old row 1', 'Old row 2'} <= {a['payload']['Title'] for a in archived}
+
+    assert import_payloads.prune_import_payloads(db, older_than_days=365)['rows_pruned'] == 0
+    db.close()
+    old_rows = client.get(f'/import/jobs/{old_job}', headers=admin_headers).json()['rows']
+    assert all(r['raw'] is None and r['case_id'] for r in old_rows)
+    recent_rows = client.get(f'/import/jobs/{recent_job}', headers=admin_headers).json()['rows']
+    assert recent_rows[0]['raw']['Title'] == 'Recent row'
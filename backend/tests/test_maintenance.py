@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from backend import api, maintenance
+from backend.cache import LocalVersionStore, TTLCache
+from backend.models import MaintenanceWindow
+
+
+def _window(client, headers, start, end, message):
+    res = client.post('/maintenance', json={'start': start.isoformat() + 'Z', 'end': end.isoformat() + 'Z',
+                                            'message': message}, headers=headers)
+    assert res.status_code == 200
+    return res.json()
+
+
+def test_maintenance_windows_are_persisted(client, admin_headers):
+    now = datetime.utcnow()
+    entry = _window(client, admin_headers, now + timedelta(days=1), now + timedelta(days=1, hours=2),
+                    'persisted window')
+    assert entry['start'].endswith('+00:00')
+    assert any(m['id'] == entry['id'] for m in client.get('/maintenance').json())
+
+    # survives a restart: the table, not process memory, is the source of truth
+    maintenance.schedule_cache.invalidate()
+    with api.SessionLocal() as db:
+        assert db.get(MaintenanceWindow, entry['id']).message == 'persisted window'
+    assert any(m['id'] == entry['id'] for m in client.get('/maintenance').json())
+
+    assert client.delete(f"/maintenance/{entry['id']}", headers=admin_headers).status_code == 200
+    assert all(m['id'] != entry['id'] for m in client.get('/maintenance').json())
+
+
+def test_invalidation_reaches_other_workers():
+    store = LocalVersionStore()
+    worker_a = TTLCache(ttl=60, maxsize=1, namespace='maintenance', store=store)
+    worker_b = TTLCache(ttl=60, maxsize=1, namespace='maintenance', store=store)
+    worker_b.set('schedule', 'old snapshot')
+    worker_a.invalidate()
+    assert worker_b.get('schedule') is None
+
+
+def test_active_window_lookup_is_memoized():
+    now = datetime(2030, 1, 1, 12, 0)
+    windows = [
+        MaintenanceWindow(id=1, start_at=now - timedelta(hours=1), end_at=now + timedelta(hours=1), message='a'),
+        MaintenanceWindow(id=2, start_at=now + timedelta(hours=3), end_at=now + timedelta(hours=4), message='b'),
+    ]
+    schedule = maintenance.Schedule(windows)
+    assert schedule.active(now)['id'] == 1
+    assert schedule._memo[1] == now + timedelta(hours=1)
+    assert schedule.active(now + timedelta(minutes=30))['id'] == 1
+    assert schedule.active(now + timedelta(hours=2)) is None
+    assert schedule.active(now + timedelta(hours=3, minutes=1))['id'] == 2
+    assert schedule.active(now + timedelta(hours=5)) is None
+
+
+def test_enforced_window_blocks_writes_for_non_admins(client, admin_headers, monkeypatch):
+    res = client.post('/auth/register', json={'username': 'maint_plain', 'email': 'maint_plain@example.org',
+                                              'password': 'Str0ngPassw0rd!'})
+    plain = {'Authorization': f"Bearer {res.json()['token']}"}
+    now = datetime.utcnow()
+    entry = _window(client, admin_headers, now - timedelta(minutes=5), now + timedelta(minutes=30), 'upgrading')
+    monkeypatch.setattr(maintenance, 'MAINTENANCE_ENFORCE', True)
+    try:
+        blocked = client.post('/cases', json={'title': 'during maintenance'}, headers=plain)
+        assert blocked.status_code == 503
+        assert blocked.json()['detail'] == 'upgrading'
+        assert 0 < int(blocked.headers['Retry-After']) <= 1800
+        assert client.get('/cases', headers=plain).status_code == 200
+        res = client.post('/cases', json={'title': 'admin during maintenance'}, headers=admin_headers)
+        assert res.status_code == 201
+    finally:
+        monkeypatch.setattr(maintenance, 'MAINTENANCE_ENFORCE', False)
+        client.delete(f"/maintenance/{entry['id']}", headers=admin_headers)
+    assert client.post('/cases', json={'title': 'after maintenance'}, headers=plain).status_code == 201
@@ -1,7 +1,9 @@
+import json
+
 import pytest
 from backend import api
 from backend.models import Case
-from backend.scripts.migration_promote_raw import apply_backfill, rollback_backfill
+from backend.scripts.migration_promote_raw import apply_backfill, rollback_backfill, run_backfill, sample_backfill
 
 
 def test_apply_backfill_promotes_keys():
@@ -69,3 +71,40 @@ def test_get_case_after_migration_is_flattened(client):
     assert 'formFields' in found['raw'] and isinstance(found['raw']['formFields'], dict)
     assert found['raw']['formFields'].get('family') is not None
     db.close()
+
+
+def test_batched_backfill_resumes_from_checkpoint(client, tmp_path):
+    db = api.SessionLocal()
+    cases = [Case(title=f'Batch Migration {i}', raw={'body': {'caseNumber': f'BATCH-{i}'}}) for i in range(5)]
+    db.add_all(cases)
+    db.commit()
+    ids = [c.id for c in cases]
+    # pretend an earlier run stopped after the second case
+    checkpoint = tmp_path / 'promote.ckpt'
+    checkpoint.write_text(json.dumps({'operation': 'apply', 'last_id': ids[1]}))
+
+    stats = run_backfill(db, 'apply', dry_run=False, batch_size=2, checkpoint=str(checkpoint))
+    assert stats['modified'] == 3
+    assert stats['batches'] >= 2
+    assert stats['rows_per_sec'] > 0
+    assert not checkpoint.exists()
+    db.expire_all()
+    promoted = {c.id: db.get(Case, c.id).raw.get('caseNumber') for c in cases}
+    assert promoted == {ids[0]: None, ids[1]: None, ids[2]: 'BATCH-2', ids[3]: 'BATCH-3', ids[4]: 'BATCH-4'}
+
+    # a dry-run sample reads only a few rows and extrapolates
+    sample = sample_backfill(db, 'apply', batches=2, batch_size=1)
+    assert 1 <= sample['scanned'] <= 2
+    assert sample['total_rows'] >= 5
+    assert apply_backfill(db, dry_run=False, batch_size=2) >= 2
+    assert apply_backfill(db, dry_run=True) == 0
+    db.close()
+
+
+def test_checkpoint_for_other_operation_is_rejected(tmp_path):
+    db = api.SessionLocal()
+    checkpoint = tmp_path / 'promote.ckpt'
+    checkpoint.write_text(json.dumps({'operation': 'rollback', 'last_id': 1}))
+    with pytest.raises(SystemExit):
+        run_backfill(db, 'apply', dry_run=False, checkpoint=str(checkpoint))
+    db.close()
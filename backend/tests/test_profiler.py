@@ -0,0 +1,54 @@
+import time
+
+from backend import directory, profiler
+
+
+def test_admin_request_profile(client, admin_headers, monkeypatch):
+    list_users = directory.list_users
+
+    def slow_directory_lookup(db):
+        time.sleep(0.1)
+        return list_users(db)
+
+    monkeypatch.setattr(directory, 'list_users', slow_directory_lookup)
+    res = client.get('/users', headers={**admin_headers, 'X-Profile': '1'})
+    assert res.status_code == 200
+    profile_id = res.headers['X-Profile-Id']
+
+    res = client.get(f'/admin/profiles/{profile_id}', headers=admin_headers)
+    assert res.status_code == 200
+    assert res.headers['X-Profile-Route'] == 'GET /users'
+    lines = res.text.splitlines()
+    assert lines and all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    assert any('slow_directory_lookup (test_profiler.py' in line for line in lines)
+    profiles = client.get('/admin/profiles', headers=admin_headers).json()['profiles']
+    assert any(p['id'] == int(profile_id) for p in profiles)
+
+
+def test_profile_flag_is_ignored_for_non_admins(client):
+    res = client.post('/auth/register', json={'username': 'profiler_user', 'email': 'profiler_user@example.com',
+                                              'password': 'Str0ngPassw0rd!'})
+    headers = {'Authorization': f"Bearer {res.json()['token']}"}
+    res = client.get('/cases', params={'profile': '1'}, headers=headers)
+    assert 'X-Profile-Id' not in res.headers
+    assert client.get('/admin/profiles', headers=headers).status_code == 403
+
+
+def test_background_sampler_aggregates_per_route(client, admin_headers, monkeypatch):
+    sampler = profiler.BackgroundSampler()
+    # started threads are not needed here: the endpoint samples itself
+    monkeypatch.setattr(sampler, 'ensure_started', lambda: None)
+    monkeypatch.setattr(profiler, 'background', sampler)
+    monkeypatch.setattr(profiler, 'PROFILE_BACKGROUND', True)
+    list_abilities = directory.list_abilities
+
+    def sampled_abilities(db):
+        sampler.sample(exclude=0)
+        return list_abilities(db)
+
+    monkeypatch.setattr(directory, 'list_abilities', sampled_abilities)
+    assert client.get('/abilities', headers=admin_headers).status_code == 200
+    # the TestClient thread waiting on the request is attributed to it too
+    assert list(sampler.routes()) == ['GET /abilities']
+    text = client.get('/admin/profiles/background', params={'route': 'GET /abilities'}, headers=admin_headers).text
+    assert text.startswith('GET /abilities;') and 'sampled_abilities (test_profiler.py' in text
@@ -0,0 +1,91 @@
+import logging
+
+import pytest
+
+from backend import querylog
+
+
+def test_normalize_and_redact():
+    assert querylog.normalize('SELECT * FROM cases\n WHERE id IN (?, ?, ?)') == 'SELECT * FROM cases WHERE id IN (?...)'
+    assert querylog.normalize('WHERE id IN (%(id_1_1)s, %(id_1_2)s)') == 'WHERE id IN (?...)'
+    assert querylog.redact(('Fatima Ali', 12, None, b'\x00\x01', {'a': 1})) == [
+        '<str:10>', 12, None, '<bytes:2>', '<dict>']
+    assert querylog.redact({'name': 'secret'}) == {'name': '<str:6>'}
+
+
+def test_slow_statements_are_logged_with_route(client, admin_headers, monkeypatch, caplog):
+    monkeypatch.setattr(querylog, 'SLOW_QUERY_MS', 0)
+    querylog.reset()
+    with caplog.at_level(logging.WARNING, logger='backend.querylog'):
+        assert client.get('/cases/999999', headers=admin_headers).status_code == 404
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith('Slow query')]
+    assert slow and all('route=GET /cases/{case_id}' in message for message in slow)
+    # parameter values are redacted, numbers kept
+    assert any('999999' in message for message in slow)
+
+
+def test_request_statement_budget_is_logged(client, admin_headers, monkeypatch, caplog):
+    monkeypatch.setattr(querylog, 'SLOW_REQUEST_MAX_STATEMENTS', 0)
+    with caplog.at_level(logging.WARNING, logger='backend.querylog'):
+        client.get('/cases', headers=admin_headers)
+    messages = [r.getMessage() for r in caplog.records if r.getMessage().startswith('Slow request GET /cases ')]
+    assert messages and 'statements=' in messages[0]
+
+
+def test_admin_top_statements(client, admin_headers):
+    querylog.reset()
+    client.get('/cases', headers=admin_headers)
+    res = client.get('/admin/slow-queries', params={'limit': 3, 'order_by': 'count'}, headers=admin_headers)
+    assert res.status_code == 200
+    statements = res.json()['statements']
+    assert 0 < len(statements) <= 3
+    assert statements[0]['count'] >= statements[-1]['count']
+    assert {'statement', 'count', 'total_ms', 'mean_ms', 'max_ms', 'max_route'} <= set(statements[0])
+
+    res = client.post('/auth/register', json={'username': 'querylog_user', 'email': 'querylog_user@example.com',
+                                              'password': 'Str0ngPassw0rd!'})
+    assert res.status_code == 200
+    token = res.json()['token']
+    assert client.get('/admin/slow-queries', headers={'Authorization': f'Bearer {token}'}).status_code == 403
+
+
+class _FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql, parameters=None):
+        self.connection.executed.append(sql)
+        if sql.startswith('EXPLAIN') and self.connection.fail_explain:
+            raise RuntimeError('canceling statement due to statement timeout')
+        self.rows = [('Seq Scan on cases',)] if sql.startswith('EXPLAIN') else []
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class _FakeConnection:
+    autocommit = False
+
+    def __init__(self, fail_explain=False):
+        self.fail_explain = fail_explain
+        self.executed = []
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+
+def test_explain_runs_in_a_rolled_back_savepoint():
+    conn = _FakeConnection()
+    assert querylog._explain(conn.cursor(), 'SELECT 1', ()) == 'Seq Scan on cases'
+    assert conn.executed == ['SAVEPOINT querylog_explain', 'EXPLAIN (ANALYZE, BUFFERS) SELECT 1',
+                             'ROLLBACK TO SAVEPOINT querylog_explain', 'RELEASE SAVEPOINT querylog_explain']
+
+    # a failed EXPLAIN is rolled back to the savepoint, so the request's transaction stays usable
+    failing = _FakeConnection(fail_explain=True)
+    with pytest.raises(RuntimeError):
+        querylog._explain(failing.cursor(), 'SELECT 1', ())
+    assert failing.executed[-2:] == ['ROLLBACK TO SAVEPOINT querylog_explain', 'RELEASE SAVEPOINT querylog_explain']
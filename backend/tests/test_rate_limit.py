@@ -0,0 +1,81 @@
+from backend import metrics, ratelimit
+from backend.ratelimit import InFlightLimiter, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    limiter = RateLimiter({'login': '2/10'}, clock=clock)
+    assert limiter.check('login', 'ip:a') == 0
+    assert limiter.check('login', 'ip:a') == 0
+    assert limiter.check('login', 'ip:a') == 5  # one token every 5s
+    assert limiter.check('login', 'ip:b') == 0  # other clients have their own bucket
+    clock.now += 5
+    assert limiter.check('login', 'ip:a') == 0
+    # unconfigured buckets are unlimited
+    assert all(limiter.check('default', 'ip:a') == 0 for _ in range(50))
+
+
+def test_limiter_forgets_least_recent_clients():
+    limiter = RateLimiter({'login': '1/60'}, max_clients=2, clock=FakeClock())
+    for client_key in ('a', 'b', 'c'):
+        assert limiter.check('login', client_key) == 0
+    assert limiter.check('login', 'c') > 0
+    assert limiter.check('login', 'a') == 0  # evicted, starts with a full bucket
+
+
+def test_bucket_for_paths():
+    assert ratelimit.bucket_for('POST', '/api/import') == 'import'
+    assert ratelimit.bucket_for('POST', '/auth/login') == 'login'
+    assert ratelimit.bucket_for('GET', '/cases/12') == 'case_reads'
+    assert ratelimit.bucket_for('POST', '/cases') == 'default'
+    assert ratelimit.is_unlimited('/api/health') and ratelimit.is_unlimited('/metrics')
+
+
+def test_rate_limited_requests_get_429(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(ratelimit, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(ratelimit, 'rate_limiter', RateLimiter({'case_reads': '2/60'}, clock=FakeClock()))
+    dropped = metrics.value('rate_limit_dropped_total', {'bucket': 'case_reads'})
+
+    assert client.get('/cases', headers=admin_headers).status_code == 200
+    assert client.get('/cases', headers=admin_headers).status_code == 200
+    res = client.get('/cases', headers=admin_headers)
+    assert res.status_code == 429
+    assert res.headers['Retry-After'] == '30'
+    assert res.json()['bucket'] == 'case_reads'
+    # anonymous callers are keyed by IP, separately from the token's user
+    assert client.get('/cases').status_code != 429
+    # other buckets are unaffected
+    assert client.get('/health').status_code == 200
+
+    assert metrics.value('rate_limit_dropped_total', {'bucket': 'case_reads'}) == dropped + 1
+    body = client.get('/metrics').text
+    assert 'rate_limit_dropped_total{bucket="case_reads"}' in body
+    assert '# TYPE rate_limit_dropped_total counter' in body
+
+
+def test_in_flight_cap_sheds_with_503(client, monkeypatch):
+    limiter = InFlightLimiter(limit=1)
+    limiter.in_flight = 1  # a request is already being handled
+    monkeypatch.setattr(ratelimit, 'in_flight', limiter)
+    shed = metrics.value('load_shed_dropped_total')
+
+    res = client.get('/cases', headers={'Origin': 'http://localhost:5173'})
+    assert res.status_code == 503
+    assert res.headers['Retry-After'] == str(ratelimit.LOAD_SHED_RETRY_AFTER)
+    assert res.headers['Access-Control-Allow-Origin'] == 'http://localhost:5173'
+    assert metrics.value('load_shed_dropped_total') == shed + 1
+    # health checks are never shed
+    assert client.get('/health').status_code == 200
+
+    limiter.in_flight = 0
+    assert client.get('/health').status_code == 200
+    assert client.get('/cases').status_code != 503
+    assert limiter.in_flight == 0
@@ -0,0 +1,69 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+from backend import api, startup
+from backend.models import User
+
+
+def test_seed_admin_is_idempotent(client):
+    with api.SessionLocal() as db:
+        before = db.query(User).count()
+    assert before > 0
+    startup.seed_admin(api.SessionLocal, api.hash_password)
+    with api.SessionLocal() as db:
+        assert db.query(User).count() == before
+
+
+def test_workers_skip_tasks_done_by_master(monkeypatch):
+    calls = []
+    monkeypatch.setattr(startup, 'run_startup_tasks', lambda *args: calls.append(args))
+    monkeypatch.delenv(startup.STARTUP_TASKS_ENV, raising=False)
+    api.on_startup()
+    assert len(calls) == 1
+
+    startup.mark_startup_tasks_done()
+    try:
+        api.on_startup()
+        assert len(calls) == 1
+    finally:
+        os.environ.pop(startup.STARTUP_TASKS_ENV, None)
+
+
+def test_gunicorn_conf_worker_settings(monkeypatch):
+    path = os.path.join(os.path.dirname(api.__file__), 'gunicorn.conf.py')
+
+    def load():
+        spec = importlib.util.spec_from_file_location('gunicorn_conf', path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    conf = load()
+    assert conf.workers == conf.default_workers() >= 1
+    assert conf.worker_class == 'uvicorn.workers.UvicornWorker'
+    assert conf.max_requests > 0 and conf.preload_app is False
+
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    monkeypatch.setenv('GUNICORN_PRELOAD', '1')
+    conf = load()
+    assert conf.workers == 4 and conf.preload_app is True
+
+
+def test_gunicorn_master_does_not_import_the_app(tmp_path):
+    # workers forked on HUP inherit the master's modules; route code must be imported by the workers themselves
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    code = ('import importlib.util, sys\n'
+            "spec = importlib.util.spec_from_file_location('gunicorn_conf', 'backend/gunicorn.conf.py')\n"
+            'conf = importlib.util.module_from_spec(spec)\n'
+            'spec.loader.exec_module(conf)\n'
+            'conf.on_starting(None)\n'
+            "print(sorted(m for m in ('backend.api', 'backend.main', 'bcrypt') if m in sys.modules))\n")
+    env = {k: v for k, v in os.environ.items() if k != startup.STARTUP_TASKS_ENV}
+    env.update(DATABASE_URL=f"sqlite:///{tmp_path / 'master.db'}", PYTHONPATH=repo_root)
+    res = subprocess.run([sys.executable, '-c', code], cwd=repo_root, env=env, capture_output=True, text=True,
+                         timeout=120)
+    assert res.returncode == 0, res.stderr[-2000:]
+    assert res.stdout.strip().splitlines()[-1] == '[]'
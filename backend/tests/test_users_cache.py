@@ -0,0 +1,72 @@
+from sqlalchemy import create_engine
+
+from backend.cache import DatabaseVersionStore, TTLCache
+from backend.models import Base
+
+
+def _names(client):
+    return {u['name'] for u in client.get('/users').json()}
+
+
+def test_users_and_abilities_served_from_cache(client, statement_counter):
+    client.get('/users')
+    client.get('/abilities')
+    with statement_counter() as statements:
+        users, abilities = client.get('/users'), client.get('/abilities')
+    assert users.status_code == 200 and abilities.status_code == 200
+    assert not [s for s in statements if s.lstrip().upper().startswith('SELECT') and 'FROM users' in s]
+
+
+def test_user_writes_invalidate_directory(client, admin_headers):
+    _names(client)
+    payload = {'name': 'Cache Created', 'ability': 'cache-ability-a', 'password': 'Str0ngPassw0rd!'}
+    res = client.post('/users', json=payload, headers=admin_headers)
+    assert res.status_code == 201
+    user_id = res.json()['id']
+    assert 'Cache Created' in _names(client)
+    assert 'cache-ability-a' in client.get('/abilities').json()
+
+    payload = {'name': 'Cache Renamed', 'ability': 'cache-ability-b'}
+    res = client.put(f'/users/{user_id}', json=payload, headers=admin_headers)
+    assert res.status_code == 200
+    names = _names(client)
+    assert 'Cache Renamed' in names and 'Cache Created' not in names
+    abilities = client.get('/abilities').json()
+    assert 'cache-ability-b' in abilities and 'cache-ability-a' not in abilities
+
+    assert client.delete(f'/users/{user_id}', headers=admin_headers).status_code == 204
+    assert 'Cache Renamed' not in _names(client)
+
+    res = client.post('/auth/register', json={'username': 'cache_registered', 'email': 'cache_registered@example.org',
+                                              'password': 'Str0ngPassw0rd!', 'name': 'Cache Registered'})
+    assert res.status_code == 200
+    assert 'Cache Registered' in _names(client)
+
+
+def test_assign_auto_created_user_appears_in_directory(client, admin_headers):
+    case_id = client.post('/cases', json={'title': 'Cache assign'}, headers=admin_headers).json()['id']
+    client.get('/abilities')
+    res = client.post(f'/cases/{case_id}/assign', json={'ability': 'cache-ability-auto'}, headers=admin_headers)
+    assert res.status_code == 200
+    assert 'cache-ability-auto' in client.get('/abilities').json()
+    assert 'auto-cache-ability-auto' in _names(client)
+
+    # the next assignment resolves the user through the cached directory and does not create another one
+    res = client.post(f'/cases/{case_id}/assign', json={'ability': 'cache-ability-auto'}, headers=admin_headers)
+    assert res.status_code == 200
+    assert [u['name'] for u in client.get('/users').json()].count('auto-cache-ability-auto') == 1
+
+
+def test_database_version_store_shares_invalidation(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "versions.db"}')
+    Base.metadata.create_all(bind=engine, tables=[Base.metadata.tables['cache_versions']])
+    worker_a = TTLCache(ttl=60, namespace='users', store=DatabaseVersionStore(engine, check_interval=0))
+    worker_b = TTLCache(ttl=60, namespace='users', store=DatabaseVersionStore(engine, check_interval=0))
+    assert worker_a.get_or_compute('users', lambda: ['a']) == ['a']
+    assert worker_b.get_or_compute('users', lambda: ['a']) == ['a']
+
+    worker_a.invalidate()
+    assert worker_b.get('users') is None
+    assert worker_a.get('users') is None
+    assert worker_b.get_or_compute('users', lambda: ['b']) == ['b']
+    assert worker_b.get('users') == ['b']
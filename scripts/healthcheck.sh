@@ -2,7 +2,8 @@
 # Simple health check script for services
 set -e
 
-API_URL=${API_URL:-http://localhost:8000/api/health}
+# readiness: 503 unless the database is reachable and migrated (see backend/health.py)
+API_URL=${API_URL:-http://localhost:8000/api/health/ready}
 FRONTEND_URL=${FRONTEND_URL:-http://localhost:8080/health}
 
 echo "Checking backend: $API_URL"